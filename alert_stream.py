@@ -0,0 +1,163 @@
+# alert_stream.py -> per-city push of live-alert changes to subscribed clients (SSE)
+import json
+import queue
+import threading
+
+from gazetteer import normalize_name
+from live_alerts import load_live_alerts, track_city, alert_fingerprint
+
+WATCH_INTERVAL_S = 2      # How often subscribed cities are checked in the store
+HEARTBEAT_S = 15          # Comment line sent to idle streams to keep proxies from closing them
+SUBSCRIBER_QUEUE_SIZE = 8
+
+
+class AlertBroadcaster:
+    """
+    Fans live-alert updates out to every client subscribed to a city.
+
+    The refresh scheduler writes one result per city into the store; a
+    single watcher thread reads the store for each city that has at least one
+    subscriber and broadcasts only when the city's alert state
+    (live_alerts.alert_state) changes. Work therefore grows with the number
+    of distinct cities being watched, not with the number of clients.
+
+    Events are identified by the state's content fingerprint
+    (live_alerts.alert_fingerprint), not a counter: the same state has the
+    same id in every worker and after a restart, so a reconnecting client's
+    Last-Event-ID is always compared against real content.
+    """
+
+    def __init__(self, watch_interval=WATCH_INTERVAL_S, load_fn=load_live_alerts):
+        self.watch_interval = watch_interval
+        self.load_fn = load_fn
+        self._subscribers = {}  # city -> set of queues
+        self._state = {}        # city -> {"fingerprint", "seen", "payload"}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def subscribe(self, city):
+        """Returns a queue that receives (fingerprint, payload) for each change."""
+        city = normalize_name(city)
+        subscription = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(city, set()).add(subscription)
+            state = self._state.get(city)
+            if state is not None:
+                subscription.put((state["fingerprint"], state["payload"]))
+        self._ensure_watcher()
+        return subscription
+
+    def unsubscribe(self, city, subscription):
+        city = normalize_name(city)
+        with self._lock:
+            subscribers = self._subscribers.get(city)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[city]
+                    self._state.pop(city, None)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, city, result):
+        """
+        Broadcasts a result if the city's alert state changed since the last
+        one. Returns the new state's fingerprint, or None if nothing was sent.
+        """
+        city = normalize_name(city)
+        fingerprint = alert_fingerprint(result)
+        with self._lock:
+            state = self._state.get(city)
+            if state is not None and state["fingerprint"] == fingerprint:
+                state["seen"] = result["timestamp"]
+                return None
+
+            payload = dict(result, city=city, version=fingerprint)
+            self._state[city] = {
+                "fingerprint": fingerprint,
+                "seen": result["timestamp"],
+                "payload": payload
+            }
+            for subscription in self._subscribers.get(city, ()):
+                _offer(subscription, (fingerprint, payload))
+        return fingerprint
+
+    def poll_store(self):
+        """One watcher pass: publishes every subscribed city whose stored result is newer."""
+        with self._lock:
+            cities = [(city, (self._state.get(city) or {}).get("seen")) for city in self._subscribers]
+        for city, seen in cities:
+            track_city(city)
+            result = self.load_fn(city, max_age=None)
+            if result is not None and result["timestamp"] != seen:
+                self.publish(city, result)
+
+    def _ensure_watcher(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="alert-stream", daemon=True)
+                self._thread.start()
+
+    def _watch(self):
+        while not self._stopped.wait(self.watch_interval):
+            try:
+                self.poll_store()
+            except Exception as e:
+                print(f"Error watching live alerts: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _offer(subscription, item):
+    # A slow client must not block the broadcast; drop its oldest update,
+    # the newest one carries the full state anyway.
+    try:
+        subscription.put_nowait(item)
+    except queue.Full:
+        try:
+            subscription.get_nowait()
+        except queue.Empty:
+            pass
+        subscription.put_nowait(item)
+
+
+def sse_event(fingerprint, payload):
+    """Formats one update as a server-sent event, with the state fingerprint as its id."""
+    return f"id: {fingerprint}\nevent: alerts\ndata: {json.dumps(payload)}\n\n"
+
+
+def stream_events(broadcaster, city, last_event_id=None, heartbeat=HEARTBEAT_S):
+    """
+    Generator of SSE lines for one client until it disconnects. A client
+    reconnecting with Last-Event-ID equal to the current state's fingerprint
+    is not sent the state it already has; any other id gets the current
+    state straight away.
+
+    The generator blocks between events, so each open stream holds one
+    server thread for as long as the client stays connected. Serve the app
+    with threaded or async workers (e.g. gunicorn -k gthread --threads 100,
+    or -k gevent); with sync workers every stream takes a whole worker and
+    a few clients starve the rest of the API.
+    """
+    subscription = broadcaster.subscribe(city)
+    try:
+        yield f"retry: {heartbeat * 1000}\n\n"
+        while True:
+            try:
+                fingerprint, payload = subscription.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if fingerprint == last_event_id:
+                continue
+            yield sse_event(fingerprint, payload)
+    finally:
+        broadcaster.unsubscribe(city, subscription)
+
+
+# Process-wide broadcaster used by the Flask app.
+broadcaster = AlertBroadcaster()
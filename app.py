@@ -1,28 +1,35 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS  # Import CORS
-from openai import OpenAI
 from dotenv import load_dotenv
 import os
 import time
-import math
-from geo_module import get_city_coords
-
-# --- Import your data processing scripts here ---
-# from python.wsummary import get_weather_summary
-# from python.majoralert import get_major_alerts
-# from python.generalalert import get_general_alerts
+from geo_module import get_city_coords_cached, coords_cache
+from gazetteer import suggest_cities
+from emergency_contacts import get_emergency_contact_cached, contact_cache
+
+# --- Data processing pipeline for /api/live-alerts ---
+from live_alerts import get_or_refresh_live_alerts
+from alert_stream import broadcaster, stream_events
+from python.geo_math import describe_bounding_boxes
+from python.http_client import host_stats
+from python.conditional import SectionVersions, conditional_response
+from python.json_provider import FastJSONProvider
+from python.weather_history import get_default_store as get_weather_history, rows_to_columns, LEVELS
 
 # Load .env file
 load_dotenv(dotenv_path='./python/.env')
 
-# Initialize Flask & OpenAI
-app = Flask(_name_)
+# Initialize Flask (the OpenAI client lives in geo_module / emergency_contacts)
+app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson when installed, plus an encoded-bytes cache
 CORS(app)  # Enable CORS for all routes
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# In-memory cache for coordinates
-cache = {}
-CACHE_TTL = 300  # Cache time-to-live in seconds (5 minutes)
+# Section hashes behind the ETag / ?since= handling of /api/live-alerts
+live_alert_versions = SectionVersions()
+
+# Bounding box half-size for /getmaxmin-coordinates, in degrees
+DEFAULT_BBOX_DELTA = 0.1
+MAX_BBOX_DELTA = 5.0
 
 # --- NEW: The Main Endpoint for Live Data ---
 @app.route("/api/live-alerts", methods=["GET"])
@@ -30,35 +37,35 @@ def get_live_alerts():
     """
     This is the main endpoint your frontend will poll every 15 seconds.
     It should call your other python scripts to get live data.
+    Clients that can keep a connection open should use
+    /api/live-alerts/stream instead and only hear about changes.
     """
     try:
         # 1. Get city from query parameters, with a default value
         city = request.args.get("city", "mumbai") # Default to a city for testing
-
-        # 2. Call the imported functions from your other scripts
-        # (These function names are examples, change them to match your actual scripts)
-        # weather_summary = get_weather_summary(city)
-        # major_alerts = get_major_alerts(city)
-        # general_alerts = get_general_alerts(city)
-
-        # 3. For now, we'll use placeholder mock data
-        mock_data = {
-            "weather_summary": {"temp": "28°C", "condition": "Partly Cloudy"},
-            "major_alerts": [{"id": 1, "type": "Tsunami Warning", "level": "High"}],
-            "general_alerts": [{"id": 1, "type": "High Tide", "level": "Moderate"}]
-        }
-
-        # 4. Combine the data into a single JSON response
-        return jsonify({
+        city = city.lower().strip()
+
+        # 2. Serve what the refresh scheduler precomputed. Only a city seen
+        #    for the first time (or gone stale) is fetched on the request path,
+        #    running every source concurrently; sources that fail or time out
+        #    are listed under "errors" and the rest are still returned.
+        result, cached = get_or_refresh_live_alerts(city)
+        if result is None:
+            return jsonify({"error": "Failed to retrieve coordinates."}), 500
+
+        # 3. Combine the data into a single JSON response. Pollers that send
+        #    If-None-Match get a 304 when nothing changed, and ?since=<version>
+        #    returns only the sections that changed.
+        meta = {
             "city": city,
-            "timestamp": time.time(),
-            "data": mock_data # In the future, replace mock_data with real data
-            # "data": {
-            #    "weather_summary": weather_summary,
-            #    "major_alerts": major_alerts,
-            #    "general_alerts": general_alerts
-            # }
-        })
+            "timestamp": result["timestamp"],
+            "cached": cached,
+            "location": result["location"]
+        }
+        sections = dict(result["data"], errors=result["errors"])
+        full_body = dict(meta, data=result["data"], errors=result["errors"])
+        return conditional_response(live_alert_versions, city, sections, full_body,
+                                    meta=meta, stamp=result["timestamp"])
 
     except Exception as e:
         # Log the error for debugging
@@ -66,12 +73,63 @@ def get_live_alerts():
         return jsonify({"error": "Failed to fetch live alert data", "details": str(e)}), 500
 
 
+@app.route("/api/live-alerts/stream", methods=["GET"])
+def stream_live_alerts():
+    """
+    Server-sent events for one city: the current state on connect, then an
+    event only when the city's alert state changes (instead of polling
+    /api/live-alerts). Each event's id is the state's content fingerprint.
+    Every open stream holds a server thread; see alert_stream.stream_events
+    for the worker settings this needs.
+    """
+    city = request.args.get("city", "mumbai").lower().strip()
+    try:
+        result, _ = get_or_refresh_live_alerts(city)
+    except Exception as e:
+        print(f"Error in /api/live-alerts/stream: {e}")
+        return jsonify({"error": "Failed to fetch live alert data", "details": str(e)}), 500
+    if result is None:
+        return jsonify({"error": "Failed to retrieve coordinates."}), 500
+    broadcaster.publish(city, result)
+
+    events = stream_events(broadcaster, city, request.headers.get("Last-Event-ID"))
+    return Response(stream_with_context(events), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # Don't let nginx buffer the stream
+    })
+
+
+@app.route("/api/weather-history", methods=["GET"])
+def get_weather_history_series():
+    """
+    Recorded weather metrics for a city over the last ?hours= (default 24).
+    ?level= forces raw/1m/1h/1d; otherwise the resolution follows the window.
+    """
+    city = request.args.get("city", "mumbai").lower().strip()
+    level = request.args.get("level")
+    if level is not None and level not in LEVELS:
+        return jsonify({"error": f"level must be one of {', '.join(LEVELS)}"}), 400
+    try:
+        hours = float(request.args.get("hours", 24))
+    except ValueError:
+        return jsonify({"error": "hours must be a number"}), 400
+
+    coords, _ = get_city_coords_cached(city)
+    if coords is None:
+        return jsonify({"error": "Failed to retrieve coordinates."}), 500
+
+    end = time.time()
+    level, rows = get_weather_history().query(
+        coords["latitude"], coords["longitude"], end - hours * 3600, end, level
+    )
+    return jsonify({"city": city, "level": level, "series": rows_to_columns(rows)})
+
+
 # --- Your Existing Utility Endpoints (with fixes) ---
 
 @app.route("/get-coordinates", methods=["POST"])
 def get_coordinates():
     data = request.get_json()
-    p_id = data.get("_id")
     city = data.get("city")
 
     if not city:
@@ -79,72 +137,60 @@ def get_coordinates():
 
     city = city.lower().strip()
 
-    # Check cache first
-    if (p_id, city) in cache and time.time() - cache[(p_id, city)]["timestamp"] < CACHE_TTL:
-        return jsonify({
-            "coordinates": cache[(p_id, city)]["coords"],
-            "cached": True
-        })
-
-    # If not in cache or expired, fetch new data
-    coords_dict = get_city_coords(city)
+    # Served from the shared coordinate cache (see geo_module.coords_cache)
+    coords_dict, cached = get_city_coords_cached(city)
 
     if coords_dict is None:
-        return jsonify({"error": "Failed to retrieve coordinates."}), 500
+        # Close gazetteer names are offered as hints only, never as coordinates.
+        return jsonify({"error": "Failed to retrieve coordinates.", "suggestions": suggest_cities(city)}), 500
 
     coords_list = [coords_dict["latitude"], coords_dict["longitude"]]
-    
-    # Update cache
-    cache[(p_id, city)] = {
-        "coords": coords_list,
-        "timestamp": time.time()
-    }
 
     return jsonify({
         "coordinates": coords_list,
-        "cached": False
+        "cached": cached
     })
 
 @app.route("/getmaxmin-coordinates", methods=["GET"])
 def getmaxmin_coordinates():
-    city = request.args.get("city")
-    if not city:
+    """
+    Bounding box (+/- delta degrees) and radius for one city, or for a batch:
+    ?city=a&city=b or ?cities=a,b. ?delta= overrides the default 0.1 degrees.
+    """
+    cities = request.args.getlist("city")
+    cities += [c for c in request.args.get("cities", "").split(",") if c.strip()]
+    if not cities:
         return jsonify({"error": "City is required"}), 400
 
-    coords_dict = get_city_coords(city)
-
-    if coords_dict is None:
-        return jsonify({"error": "Failed to retrieve coordinates."}), 500
-
-    lat = coords_dict["latitude"]
-    lon = coords_dict["longitude"]
-
-    # Define a bounding box
-    delta = 0.1
-    lat_min = lat - delta
-    lat_max = lat + delta
-    lon_min = lon - delta
-    lon_max = lon + delta
-
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 6371  # Earth radius in kilometers
-        phi1, phi2 = math.radians(lat1), math.radians(lat2)
-        dphi = math.radians(lat2 - lat1)
-        dlambda = math.radians(lon2 - lon1)
-        a = math.sin(dphi / 2)*2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)*2
-        return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    diagonal = haversine(lat_min, lon_min, lat_max, lon_max)
-    radius = round(diagonal / 2, 2)
+    try:
+        delta = float(request.args.get("delta", DEFAULT_BBOX_DELTA))
+    except ValueError:
+        return jsonify({"error": "delta must be a number"}), 400
+    if not 0 < delta <= MAX_BBOX_DELTA:
+        return jsonify({"error": f"delta must be between 0 and {MAX_BBOX_DELTA}"}), 400
+
+    found, lats, lons, missing = [], [], [], []
+    for city in cities:
+        coords_dict, _ = get_city_coords_cached(city)
+        if coords_dict is None:
+            missing.append(city)
+            continue
+        found.append(city)
+        lats.append(coords_dict["latitude"])
+        lons.append(coords_dict["longitude"])
+
+    # All boxes and radii are computed in one vectorized pass.
+    boxes = describe_bounding_boxes(lats, lons, delta) if found else []
+
+    if len(cities) == 1:
+        if missing:
+            return jsonify({"error": "Failed to retrieve coordinates."}), 500
+        return jsonify(boxes[0])
 
     return jsonify({
-        "coordinates": {
-            "lat_min": round(lat_min, 2),
-            "lat_max": round(lat_max, 2),
-            "lon_min": round(lon_min, 2),
-            "lon_max": round(lon_max, 2),
-        },
-        "Radius_km": radius
+        "delta": delta,
+        "results": dict(zip(found, boxes)),
+        "missing": missing
     })
 
 @app.route("/get-emergency-contact", methods=["POST"])
@@ -158,31 +204,37 @@ def get_emergency_contact():
     city = city.lower().strip()
 
     try:
-        prompt = (
-            f"What is the general emergency contact number (police/fire/ambulance) for {city}? "
-            f"Reply with only the number and the service, e.g., '112 – General emergency'."
-        )
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that provides emergency contact numbers only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=50
-        )
-
-        emergency_info = response.choices[0].message.content.strip()
-
-        return jsonify({
-            "city": city,
-            "emergency_contact": emergency_info
-        })
+        # Bundled country table first, then earlier AI answers; the AI
+        # assistant is only asked about cities neither of them covers.
+        contact, cached = get_emergency_contact_cached(city)
+        if contact is None:
+            return jsonify({"error": "Failed to fetch emergency contact"}), 500
+
+        return jsonify(dict(contact, city=city, cached=cached))
 
     except Exception as e:
         return jsonify({"error": "Failed to fetch emergency contact", "details": str(e)}), 500
 
 
-if _name_ == '_main_':
+@app.route("/api/cache-stats", methods=["GET"])
+def get_cache_stats():
+    """Hit/miss/eviction counters for the in-process caches."""
+    return jsonify({
+        "coordinates": coords_cache.stats(),
+        "emergency_contacts": contact_cache.stats()
+    })
+
+
+@app.route("/api/upstream-stats", methods=["GET"])
+def get_upstream_stats():
+    """Per-host request counts, retries and latency for upstream APIs."""
+    return jsonify(host_stats())
+
+
+if __name__ == '__main__':
+    # Under gunicorn, run `python refresh_scheduler.py` as its own process
+    # instead, so the workers don't each refresh every city.
+    from refresh_scheduler import create_live_alerts_scheduler
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":  # The reloader's child only
+        create_live_alerts_scheduler().start()
     app.run(debug=True, port=5000)
\ No newline at end of file
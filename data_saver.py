@@ -4,11 +4,14 @@ import time
 import os
 from datetime import datetime
 
-from geo_module import get_city_coords
+from geo_module import get_city_coords, get_city_coords_many
+from python.event_log import get_default_log
 
-def update_and_save_data(city_name, file_path="city_coords_log.json"):
+LEGACY_LOG_PATH = "city_coords_log.json"
+
+def update_and_save_data(city_name, log=None):
     """
-    Fetches coordinates for a city and appends them to a JSON file.
+    Fetches coordinates for a city and appends them to the history log.
     """
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Fetching coordinates for {city_name}...")
     
@@ -18,37 +21,72 @@ def update_and_save_data(city_name, file_path="city_coords_log.json"):
         print("Failed to get coordinates, skipping update.")
         return
 
-    data = {}
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                print("Warning: JSON file is corrupt or empty. Starting with a new structure.")
-                data = {}
-    
-    if city_name not in data:
-        data[city_name] = []
-        
-    data[city_name].append({
+    # One INSERT per tick, whatever the size of the history.
+    now = datetime.now()
+    (log or get_default_log()).append(city_name, {
         "coordinates": [new_coords_dict["latitude"], new_coords_dict["longitude"]],
-        "timestamp": datetime.now().isoformat()
-    })
-
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=4)
+        "timestamp": now.isoformat()
+    }, ts=now.timestamp())
     
     print(f"Successfully updated and saved data for {city_name}.")
 
-def run_scheduler(city_to_track):
+def get_city_history(city_name, start=None, end=None, limit=None, log=None):
+    """
+    Returns the logged entries for a city between two datetimes (either may
+    be None), oldest first, in the {"coordinates", "timestamp"} shape.
+    """
+    start = start.timestamp() if start is not None else None
+    end = end.timestamp() if end is not None else None
+    return [value for _, value in (log or get_default_log()).query(city_name, start, end, limit)]
+
+def migrate_json_log(file_path=LEGACY_LOG_PATH, log=None):
     """
-    Schedules the data update to run every 5 minutes.
+    Moves the entries of the old rewrite-the-whole-file JSON log into the
+    history log, then renames the JSON file so it is only imported once.
     """
-    print(f"Starting scheduled task to track coordinates for {city_to_track}. Press Ctrl+C to stop.")
-    while True:
-        update_and_save_data(city_to_track)
-        print("Sleeping for 5 minutes...")
-        time.sleep(300)
+    if not os.path.exists(file_path):
+        return 0
+
+    with open(file_path, "r") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            print("Warning: JSON file is corrupt or empty. Nothing to migrate.")
+            data = {}
+
+    log = log or get_default_log()
+    migrated = 0
+    for city_name, entries in data.items():
+        log.append_many(city_name, [
+            (datetime.fromisoformat(entry["timestamp"]).timestamp(), entry) for entry in entries
+        ])
+        migrated += len(entries)
+
+    os.replace(file_path, file_path + ".migrated")
+    print(f"Migrated {migrated} entries from {file_path}.")
+    return migrated
+
+def run_scheduler(cities_to_track, interval=300):
+    """
+    Schedules the data update to run every `interval` seconds (5 minutes by
+    default) for one city or a list of cities, spread over the interval.
+    """
+    from refresh_scheduler import RefreshScheduler
+
+    if isinstance(cities_to_track, str):
+        cities_to_track = [cities_to_track]
+    migrate_json_log()
+    if len(cities_to_track) > 1:
+        # Geocode every city up front in batched AI requests; the scheduled
+        # updates then find the answers in the store.
+        get_city_coords_many(cities_to_track)
+
+    scheduler = RefreshScheduler(refresh_fn=update_and_save_data, max_workers=4)
+    for city in cities_to_track:
+        scheduler.track(city, interval, immediate=len(cities_to_track) == 1)
+
+    print(f"Starting scheduled task to track coordinates for {', '.join(cities_to_track)}. Press Ctrl+C to stop.")
+    scheduler.run_forever()
 
 if __name__ == "__main__":
     city_to_track = "Delhi"
@@ -0,0 +1,212 @@
+# emergency_contacts.py -> emergency numbers from a bundled table, with cached AI answers as fallback
+import os
+import threading
+from openai import OpenAI
+from dotenv import load_dotenv
+
+from gazetteer import get_gazetteer, normalize_name
+from ttl_cache import TTLCache
+from python.kv_store import get_default_store
+from llm_batch import batch_lookup
+
+load_dotenv()
+
+EMERGENCY_NUMBERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "emergency_numbers.tsv")
+
+# AI answers for cities outside the table are kept on disk (python/kv_store.py)
+# and re-asked after a month; numbers rarely change, but they can.
+CONTACT_NAMESPACE = "emergency_contact"
+CONTACT_STORE_TTL = 30 * 24 * 3600
+
+# In-process cache in front of both tiers; concurrent misses share one lookup.
+CONTACT_CACHE_SIZE = int(os.getenv("CONTACT_CACHE_SIZE", "10000"))
+CONTACT_CACHE_TTL = 3600
+contact_cache = TTLCache(maxsize=CONTACT_CACHE_SIZE, ttl=CONTACT_CACHE_TTL)
+
+_table = None
+_table_lock = threading.Lock()
+_client = None
+
+
+def _get_client():
+    # Created on first use so the table path works without an API key.
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def load_emergency_numbers(path=EMERGENCY_NUMBERS_PATH):
+    """Loads the tab-separated country table (see data/emergency_numbers.tsv)."""
+    table = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            country, name, general, police, ambulance, fire = line.split("\t")
+            table[country] = {
+                "country": name,
+                "general": general or None,
+                "police": police,
+                "ambulance": ambulance,
+                "fire": fire
+            }
+    return table
+
+
+def get_emergency_numbers():
+    """Returns the process-wide country table, loading it on first use."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = load_emergency_numbers()
+    return _table
+
+
+def format_contact(numbers):
+    """
+    One line in the style the endpoint has always returned, e.g.
+    "112 – General emergency (Police 100, Ambulance 108, Fire 101)".
+    """
+    services = f"Police {numbers['police']}, Ambulance {numbers['ambulance']}, Fire {numbers['fire']}"
+    if numbers["general"]:
+        if numbers["general"] == numbers["police"] == numbers["ambulance"] == numbers["fire"]:
+            return f"{numbers['general']} – General emergency"
+        return f"{numbers['general']} – General emergency ({services})"
+    return services
+
+
+def lookup_table_contact(city):
+    """
+    The bundled-table answer for a city in the gazetteer, or None.
+    Only an exact name that belongs to a single country qualifies: a wrong
+    country means wrong emergency numbers, so anything else ("East London",
+    a name shared by two countries) goes to the stored/AI answers instead.
+    """
+    gazetteer = get_gazetteer()
+    entry = gazetteer.lookup(city)
+    if entry is None or len(gazetteer.countries(city)) != 1:
+        return None
+    numbers = get_emergency_numbers().get(entry["country"])
+    if numbers is None:
+        return None
+    return {
+        "emergency_contact": format_contact(numbers),
+        "country": entry["country"],
+        "numbers": {k: numbers[k] for k in ("general", "police", "ambulance", "fire")},
+        "source": "table"
+    }
+
+
+def get_emergency_contact_llm(city):
+    """Asks the AI assistant for a city's emergency number. Returns the reply text."""
+    prompt = (
+        f"What is the general emergency contact number (police/fire/ambulance) for {city}? "
+        f"Reply with only the number and the service, e.g., '112 – General emergency'."
+    )
+
+    response = _get_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that provides emergency contact numbers only."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.2,
+        max_tokens=50
+    )
+
+    return response.choices[0].message.content.strip()
+
+
+def get_emergency_contact(city):
+    """
+    Returns {"emergency_contact", "source", ...} for a city, or None.
+    Cities in the gazetteer are answered from the bundled country table;
+    other cities come from the on-disk store of earlier AI answers, and the
+    AI assistant is only asked on a true miss.
+    """
+    if not city:
+        return None
+
+    contact = lookup_table_contact(city)
+    if contact is not None:
+        return contact
+
+    key = normalize_name(city)
+    store = get_default_store()
+    stored = store.get(CONTACT_NAMESPACE, key, max_age=CONTACT_STORE_TTL)
+    if stored is not None:
+        return dict(stored, source="store")
+
+    # Raises on API errors so the endpoint can report them; nothing is cached.
+    contact = {"emergency_contact": get_emergency_contact_llm(city)}
+    store.set(CONTACT_NAMESPACE, key, contact)
+    return dict(contact, source="ai")
+
+
+def get_emergency_contact_cached(city):
+    """
+    Same as get_emergency_contact, but served from the shared in-process
+    cache. Concurrent misses for the same city trigger a single lookup.
+    Returns (contact_or_None, cached).
+    """
+    if not city:
+        return None, False
+
+    return contact_cache.get_or_load(normalize_name(city), lambda: get_emergency_contact(city))
+
+
+def _valid_contact(item):
+    """Cleans one batched AI answer; None unless it looks like a phone number line."""
+    contact = item.get("emergency_contact")
+    if not isinstance(contact, str):
+        return None
+    contact = contact.strip()
+    if not contact or len(contact) > 120 or not any(ch.isdigit() for ch in contact):
+        return None
+    return contact
+
+
+def get_emergency_contacts_many(cities):
+    """
+    get_emergency_contact for many cities at once. Table and stored answers
+    are used first; the remaining cities are sent to the AI assistant in
+    batches, with a single-city request for any answer that is missing or
+    invalid. Returns {city: contact or None} and warms contact_cache.
+    """
+    results = {}
+    misses = []
+    store = get_default_store()
+    for city in dict.fromkeys(c for c in cities if c):
+        contact = lookup_table_contact(city)
+        if contact is None:
+            stored = store.get(CONTACT_NAMESPACE, normalize_name(city), max_age=CONTACT_STORE_TTL)
+            contact = dict(stored, source="store") if stored is not None else None
+        if contact is None:
+            misses.append(city)
+        else:
+            results[city] = contact
+
+    if misses:
+        answers = batch_lookup(
+            _get_client(), "gpt-4o-mini",
+            "You are a helpful assistant that provides emergency contact numbers only.",
+            "Give the general emergency contact number (police/fire/ambulance) for each city, "
+            "as only the number and the service, e.g., '112 – General emergency'.",
+            ("emergency_contact",),
+            misses, _valid_contact, fallback=get_emergency_contact_llm
+        )
+        for city, text in answers.items():
+            if text is None:
+                results[city] = None
+                continue
+            contact = {"emergency_contact": text}
+            store.set(CONTACT_NAMESPACE, normalize_name(city), contact)
+            results[city] = dict(contact, source="ai")
+
+    for city, contact in results.items():
+        if contact is not None:
+            contact_cache.set(normalize_name(city), contact)
+    return results
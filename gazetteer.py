@@ -0,0 +1,163 @@
+# gazetteer.py -> offline city lookup (exact and case-folded, with fuzzy "did you mean" suggestions)
+import os
+import re
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.tsv")
+
+# Minimum similarity (difflib ratio) for a suggestion. Kept high: the old
+# fuzzy match at 0.6 trigram similarity turned "East London" into London GB
+# and "Santiago de Cuba" into Santiago CL.
+SUGGEST_THRESHOLD = 0.85
+SUGGEST_LIMIT = 3
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def normalize_name(name):
+    """
+    Normalizes a place name for lookups: strips accents, case-folds and
+    collapses punctuation/whitespace ("São Paulo " -> "sao paulo").
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = name.casefold().replace("'", "")
+    name = re.sub(r"[^\w]+", " ", name)
+    return name.strip()
+
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """
+    In-memory index over the bundled city file. Exact and case-folded lookups
+    are a single dict hit. Fuzzy matching is only used for suggestions, never
+    for coordinates: it only scores entries that share at least one trigram
+    with the query.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.by_name = {}
+        self.countries_by_name = {}  # Every country a name or alias occurs in
+        self.trigram_index = {}
+        self.trigram_sets = {}
+
+        for entry_id, entry in enumerate(entries):
+            for name in [entry["name"]] + entry["aliases"]:
+                key = normalize_name(name)
+                # First entry wins, so order the file by importance.
+                self.by_name.setdefault(key, entry_id)
+                self.countries_by_name.setdefault(key, set()).add(entry["country"])
+                if key in self.trigram_sets:
+                    continue
+                grams = _trigrams(key)
+                self.trigram_sets[key] = grams
+                for gram in grams:
+                    self.trigram_index.setdefault(gram, []).append(key)
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        """Loads a tab-separated gazetteer file (see data/gazetteer.tsv)."""
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line or line.startswith("#"):
+                    continue
+                fields = line.split("\t")
+                aliases = fields[4].split("|") if len(fields) > 4 and fields[4] else []
+                entries.append({
+                    "name": fields[0],
+                    "country": fields[1],
+                    "latitude": float(fields[2]),
+                    "longitude": float(fields[3]),
+                    "aliases": aliases
+                })
+        return cls(entries)
+
+    def exact(self, name):
+        """Returns the entry for an exact (normalized) name or alias, or None."""
+        entry_id = self.by_name.get(normalize_name(name))
+        return None if entry_id is None else self.entries[entry_id]
+
+    def countries(self, name):
+        """The countries an exact (normalized) name or alias occurs in; empty if unknown."""
+        return self.countries_by_name.get(normalize_name(name), set())
+
+    def suggest(self, name, country=None, threshold=SUGGEST_THRESHOLD, limit=SUGGEST_LIMIT):
+        """
+        Entries whose name is close to `name` (difflib ratio over the
+        names sharing a trigram with it), best first, for "did you mean" hints. Never use them as coordinates.
+
+        Only names with the same number of words are considered, so a
+        qualified name ("East London", "Santiago de Cuba") does not suggest
+        the bare city. A "City, XX" query or the `country` argument (ISO
+        code) restricts suggestions to that country; any other qualifier
+        ("London, Ontario") cannot be checked and yields no suggestions.
+        """
+        if not name:
+            return []
+        if "," in name:
+            name, qualifier = name.split(",", 1)
+            qualifier = qualifier.strip().upper()
+            if len(qualifier) != 2 or (country and country.upper() != qualifier):
+                return []
+            country = qualifier
+
+        key = normalize_name(name)
+        words = len(key.split())
+        grams = _trigrams(key)
+
+        candidates = set()
+        for gram in grams:
+            candidates.update(self.trigram_index.get(gram, ()))
+
+        scored = {}
+        for candidate in candidates:
+            if len(candidate.split()) != words:
+                continue
+            entry_id = self.by_name[candidate]
+            if country and self.entries[entry_id]["country"] != country.upper():
+                continue
+            score = SequenceMatcher(None, key, candidate).ratio()
+            if score >= threshold and score > scored.get(entry_id, 0):
+                scored[entry_id] = score
+
+        ranked = sorted(scored, key=lambda entry_id: -scored[entry_id])
+        return [self.entries[entry_id] for entry_id in ranked[:limit]]
+
+    def lookup(self, name):
+        """Exact (normalized) lookup; unknown names return None."""
+        if not name:
+            return None
+        return self.exact(name)
+
+
+def get_gazetteer():
+    """Returns the process-wide gazetteer, loading it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = Gazetteer.load()
+    return _index
+
+
+def lookup_city(name):
+    """
+    Looks up a city in the bundled gazetteer by exact (normalized) name.
+    Returns a dict with name, country, latitude, longitude and aliases, or None.
+    """
+    return get_gazetteer().lookup(name)
+
+
+def suggest_cities(name, country=None):
+    """Close gazetteer names for an unknown city, as "Name, CC" strings (see Gazetteer.suggest)."""
+    return [f"{entry['name']}, {entry['country']}" for entry in get_gazetteer().suggest(name, country)]
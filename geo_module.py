@@ -5,18 +5,44 @@ from openai import OpenAI
 from dotenv import load_dotenv
 import os
 
+from gazetteer import lookup_city, normalize_name
+from ttl_cache import TTLCache
+from python.kv_store import get_default_store
+from llm_batch import batch_lookup
+
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def get_city_coords(city):
+# Set GEOCODE_LLM_FALLBACK=0 to never call the LLM for unknown cities.
+USE_LLM_FALLBACK = os.getenv("GEOCODE_LLM_FALLBACK", "1") != "0"
+
+# Shared coordinate cache, keyed on the normalized city name only so every
+# user asking for the same city shares one entry.
+COORDS_CACHE_SIZE = int(os.getenv("COORDS_CACHE_SIZE", "10000"))
+COORDS_CACHE_TTL = 300  # Cache time-to-live in seconds (5 minutes)
+coords_cache = TTLCache(maxsize=COORDS_CACHE_SIZE, ttl=COORDS_CACHE_TTL)
+
+# AI geocoding answers are also kept on disk (see python/kv_store.py) so a
+# restart or a new worker does not ask the LLM again. Cities don't move, so
+# the entries never expire.
+GEOCODE_NAMESPACE = "geocode"
+
+_client = None
+
+
+def _get_client():
+    # Created on first use so the offline path works without an API key.
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def get_city_coords_llm(city):
     """
     Fetches the latitude and longitude of a city using an AI assistant.
     Returns a dictionary with 'latitude' and 'longitude' or None on failure.
     """
-    if not city:
-        return None
-
-    response = client.chat.completions.create(
+    response = _get_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "You are a geolocation assistant. Return only JSON with latitude and longitude of the city, rounded to 2 decimal places."},
@@ -31,8 +57,111 @@ def get_city_coords(city):
         coords_dict = json.loads(ai_reply)
         lat = round(float(coords_dict["latitude"]), 2)
         lon = round(float(coords_dict["longitude"]), 2)
-        
+
         return {"latitude": lat, "longitude": lon}
     except Exception as e:
         print(f"Error parsing AI response: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def get_city_coords(city):
+    """
+    Returns a dictionary with 'latitude' and 'longitude' for a city, or None.
+    The bundled gazetteer answers known cities offline, then the on-disk
+    store is checked for earlier AI answers. The AI assistant is only asked
+    about names neither of them knows.
+    """
+    if not city:
+        return None
+
+    entry = lookup_city(city)
+    if entry is not None:
+        return {"latitude": entry["latitude"], "longitude": entry["longitude"]}
+
+    key = normalize_name(city)
+    store = get_default_store()
+    stored = store.get(GEOCODE_NAMESPACE, key)
+    if stored is not None:
+        return stored
+
+    if not USE_LLM_FALLBACK:
+        return None
+
+    try:
+        coords_dict = get_city_coords_llm(city)
+    except Exception as e:
+        print(f"Error fetching coordinates from AI assistant: {e}")
+        return None
+
+    if coords_dict is not None:
+        store.set(GEOCODE_NAMESPACE, key, coords_dict)
+    return coords_dict
+
+
+def get_city_coords_cached(city):
+    """
+    Same as get_city_coords, but served from the shared in-process cache.
+    Concurrent misses for the same city trigger a single lookup.
+    Returns (coords_dict_or_None, cached).
+    """
+    if not city:
+        return None, False
+
+    return coords_cache.get_or_load(normalize_name(city), lambda: get_city_coords(city))
+
+
+def _valid_coords(item):
+    """Cleans one batched AI answer; None unless it holds plausible coordinates."""
+    try:
+        lat = round(float(item["latitude"]), 2)
+        lon = round(float(item["longitude"]), 2)
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return {"latitude": lat, "longitude": lon}
+
+
+def get_city_coords_many(cities):
+    """
+    get_city_coords for many cities at once, e.g. when the refresh scheduler
+    picks up new cities or for a bulk import. Gazetteer and stored answers
+    are used first; the remaining cities are sent to the AI assistant in
+    batches (one request per llm_batch.BATCH_SIZE cities), with a single-city
+    request for any answer that is missing or invalid.
+
+    Returns {city: coords_dict or None} and warms coords_cache.
+    """
+    results = {}
+    misses = []
+    store = get_default_store()
+    for city in dict.fromkeys(c for c in cities if c):
+        entry = lookup_city(city)
+        if entry is not None:
+            results[city] = {"latitude": entry["latitude"], "longitude": entry["longitude"]}
+            continue
+        stored = store.get(GEOCODE_NAMESPACE, normalize_name(city))
+        if stored is not None:
+            results[city] = stored
+        else:
+            misses.append(city)
+
+    if misses and USE_LLM_FALLBACK:
+        answers = batch_lookup(
+            _get_client(), "gpt-4o-mini",
+            "You are a geolocation assistant. Return only JSON.",
+            "Give the latitude and longitude of each city, rounded to 2 decimal places.",
+            ("latitude", "longitude"),
+            misses, _valid_coords, fallback=get_city_coords_llm
+        )
+        for city, coords_dict in answers.items():
+            if coords_dict is not None:
+                store.set(GEOCODE_NAMESPACE, normalize_name(city), coords_dict)
+            results[city] = coords_dict
+    else:
+        results.update((city, None) for city in misses)
+
+    for city, coords_dict in results.items():
+        if coords_dict is not None:
+            coords_cache.set(normalize_name(city), coords_dict)
+    return results
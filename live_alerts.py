@@ -0,0 +1,247 @@
+# live_alerts.py -> runs every data source behind /api/live-alerts concurrently
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from geo_module import get_city_coords_cached
+from gazetteer import normalize_name
+from python import http_client
+from python.kv_store import get_default_store
+from python.quake_poller import get_default_feed
+from python.wsummary import (
+    fetch_weather_summary,
+    monitor_and_analyze_severe_weather,
+    fetch_and_generate_advice
+)
+
+# How long each source may take before we answer without it (seconds). The
+# same budget is the deadline for the source's upstream calls, so a source we
+# stopped waiting for does not keep a worker (and its fetch lock) busy on
+# retries nobody will use.
+SOURCE_TIMEOUTS = {
+    "weather_summary": 8,
+    "major_alerts": 8,
+    "general_alerts": 8,
+    "tsunami": 12
+}
+
+# Radius around the city that counts as "nearby" for earthquakes.
+TSUNAMI_RADIUS_KM = 500
+
+# Precomputed results written by the refresh scheduler (refresh_scheduler.py)
+# and read by the Flask endpoint, shared by every worker through the KV store.
+LIVE_ALERTS_NAMESPACE = "live_alerts"
+TRACKED_NAMESPACE = "tracked_cities"
+REFRESH_INTERVAL_S = 300
+STALE_AFTER_S = 2 * REFRESH_INTERVAL_S   # Older results are recomputed on request
+TRACK_TOUCH_S = 3600                     # Re-mark a tracked city at most hourly
+TRACK_TTL_S = 24 * 3600                  # Stop refreshing cities nobody asked for in a day
+
+# A shared pool instead of a per-request `with ThreadPoolExecutor()`: leaving
+# a `with` block waits for every worker, which would undo the timeouts.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="live-alerts")
+
+_risk_rules = None
+_risk_rules_lock = threading.Lock()
+
+
+def _get_risk_rules(tsunami):
+    """Builds the historical tsunami rules once per process."""
+    global _risk_rules
+    with _risk_rules_lock:
+        if _risk_rules is None:
+            csv_path = os.path.join(os.path.dirname(tsunami.__file__), tsunami.INPUT_CSV_PATH)
+            _risk_rules = tsunami.analyze_historical_data(csv_path) or []
+        return _risk_rules
+
+
+def get_tsunami_assessment(lat, lon):
+    """
+    Looks for the latest significant earthquake near the location and rates
+    its tsunami risk against the historical rules. Events come from the
+    shared quake feed the refresh scheduler keeps in the KV store; USGS is
+    only queried directly when no scheduler has polled recently.
+    """
+    # Imported lazily: tsunami.py pulls in pandas and the Gemini SDK.
+    from python import tsunami
+
+    rules = _get_risk_rules(tsunami)
+    feed = get_default_feed()
+    if feed.is_live():
+        earthquake = feed.latest_near(lat, lon, TSUNAMI_RADIUS_KM)
+    else:
+        location = {"lat": lat, "lon": lon, "radius_km": TSUNAMI_RADIUS_KM}
+        earthquake = tsunami.fetch_earthquake_for_location(location)
+
+    if not earthquake:
+        return {"status": "No significant event nearby."}
+
+    lon_eq, lat_eq, depth = earthquake['geometry']['coordinates']
+    assessment = tsunami.perform_initial_assessment(earthquake, rules)
+    return {
+        "status": "Alert!!! Earthquake Detected",
+        "event": {
+            "id": earthquake.get('id'),
+            "place": earthquake['properties'].get('place'),
+            "magnitude": earthquake['properties'].get('mag'),
+            "time": earthquake['properties'].get('time'),
+            "latitude": lat_eq,
+            "longitude": lon_eq,
+            "depth_km": depth
+        },
+        "assessment": assessment,
+        # Template text only: the live path never waits on Gemini.
+        "analysis": tsunami.template_analysis(earthquake, assessment)
+    }
+
+
+def _run_source(fn, args, deadline):
+    with http_client.deadline(deadline):
+        return fn(*args)
+
+
+def collect_live_alerts(lat, lon, api_key=None):
+    """
+    Runs the weather summary, severe-weather analysis, advice and tsunami
+    assessment in parallel. Each source has its own timeout; a source that
+    fails or times out is reported under "errors" and the rest are still
+    returned.
+    """
+    api_key = api_key or os.getenv("OPEN_WEATHER_API_KEY")
+
+    sources = {
+        "weather_summary": (fetch_weather_summary, (lat, lon, api_key)),
+        "major_alerts": (monitor_and_analyze_severe_weather, (lat, lon, api_key)),
+        "general_alerts": (fetch_and_generate_advice, (lat, lon, api_key)),
+        "tsunami": (get_tsunami_assessment, (lat, lon))
+    }
+
+    started = time.monotonic()
+    futures = {
+        name: _executor.submit(_run_source, fn, args, started + SOURCE_TIMEOUTS[name])
+        for name, (fn, args) in sources.items()
+    }
+
+    data = {}
+    errors = {}
+    for name, future in futures.items():
+        # Timeouts are measured from the moment everything was submitted.
+        remaining = SOURCE_TIMEOUTS[name] - (time.monotonic() - started)
+        try:
+            result = future.result(timeout=max(remaining, 0))
+        except FutureTimeout:
+            errors[name] = f"Timed out after {SOURCE_TIMEOUTS[name]}s"
+            data[name] = None
+            continue
+        except Exception as e:
+            errors[name] = str(e)
+            data[name] = None
+            continue
+
+        # The wsummary fetchers print their errors and return None.
+        if result is None:
+            errors[name] = "Source returned no data"
+        data[name] = result
+
+    return {"data": data, "errors": errors}
+
+
+def get_live_alerts_for_city(city):
+    """
+    Resolves a city to coordinates and collects its live alerts.
+    Returns None if the city cannot be located.
+    """
+    coords, _ = get_city_coords_cached(city)
+    if coords is None:
+        return None
+
+    result = collect_live_alerts(coords["latitude"], coords["longitude"])
+    result["location"] = {"latitude": coords["latitude"], "longitude": coords["longitude"]}
+    return result
+
+
+def save_live_alerts(city, result):
+    """Stores a get_live_alerts_for_city() result, stamped with when it was collected."""
+    if result is None:
+        return None
+    entry = dict(result, timestamp=time.time())
+    get_default_store().set(LIVE_ALERTS_NAMESPACE, normalize_name(city), entry)
+    return entry
+
+
+def load_live_alerts(city, max_age=STALE_AFTER_S):
+    """Returns the stored result for a city, or None if missing or stale."""
+    return get_default_store().get(LIVE_ALERTS_NAMESPACE, normalize_name(city), max_age=max_age)
+
+
+def track_city(city, interval=REFRESH_INTERVAL_S):
+    """Asks the refresh scheduler to keep this city's alerts fresh."""
+    store = get_default_store()
+    key = normalize_name(city)
+    if store.get(TRACKED_NAMESPACE, key, max_age=TRACK_TOUCH_S) is None:
+        store.set(TRACKED_NAMESPACE, key, {"interval": interval})
+
+
+def load_tracked_cities():
+    """{city: interval_seconds} for every city requested within TRACK_TTL_S."""
+    tracked = get_default_store().items(TRACKED_NAMESPACE, max_age=TRACK_TTL_S)
+    return {city: entry["interval"] for city, entry in tracked.items()}
+
+
+def load_tracked_locations():
+    """
+    Tracked cities whose coordinates are known, as the location dicts the
+    quake feed fans events out to (name, lat, lon, radius_km).
+    """
+    locations = []
+    for city in load_tracked_cities():
+        coords, _ = get_city_coords_cached(city)
+        if coords is not None:
+            locations.append({"name": city, "lat": coords["latitude"], "lon": coords["longitude"],
+                              "radius_km": TSUNAMI_RADIUS_KM})
+    return locations
+
+
+def get_or_refresh_live_alerts(city):
+    """
+    Returns (result, cached): the stored result if it is fresh, otherwise one
+    collected now and stored. Either way the city is (re)registered with the
+    refresh scheduler. result is None if the city cannot be located.
+    """
+    result = load_live_alerts(city)
+    cached = result is not None
+    if not cached:
+        result = save_live_alerts(city, get_live_alerts_for_city(city))
+        if result is None:
+            return None, False
+    track_city(city)
+    return result, cached
+
+
+def alert_state(result):
+    """
+    The parts of a result that count as the city's alert state: statuses,
+    the nearby earthquake and its risk, the advice list and failing sources.
+    Readings that change on every refresh (temperatures, timestamps) are left
+    out so subscribers are only notified of real changes.
+    """
+    data = result["data"]
+    major = data.get("major_alerts") or {}
+    tsunami = data.get("tsunami") or {}
+    general = data.get("general_alerts") or {}
+    return {
+        "major_status": major.get("status"),
+        "tsunami_status": tsunami.get("status"),
+        "tsunami_event": (tsunami.get("event") or {}).get("id"),
+        "tsunami_risk": (tsunami.get("assessment") or {}).get("risk_level"),
+        "advice": (general.get("assistant_report") or {}).get("advice"),
+        "failing_sources": sorted(result["errors"])
+    }
+
+
+def alert_fingerprint(result):
+    state = json.dumps(alert_state(result), sort_keys=True, default=str)
+    return hashlib.sha1(state.encode("utf-8")).hexdigest()
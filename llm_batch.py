@@ -0,0 +1,97 @@
+# llm_batch.py -> many lookups per chat completion, with validation and per-item fallback
+import json
+
+# Items per request. Large enough to turn hundreds of cities into a handful of
+# calls, small enough that the JSON answer stays well inside the token limit.
+BATCH_SIZE = 40
+TOKENS_PER_ITEM = 40
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def strip_code_fence(reply):
+    """Removes a ```json ... ``` fence around a reply, if there is one."""
+    text = reply.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def parse_batch_reply(reply, key="city"):
+    """
+    Parses a {"results": [{<key>: ..., ...}, ...]} reply into {name: item}.
+    Names are compared case-insensitively, and a Markdown code fence around
+    the JSON is ignored. Returns {} if the reply is not valid JSON of that
+    shape.
+    """
+    try:
+        results = json.loads(strip_code_fence(reply))["results"]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return {}
+    if not isinstance(results, list):
+        return {}
+    parsed = {}
+    for item in results:
+        if isinstance(item, dict) and isinstance(item.get(key), str):
+            parsed[item[key].strip().casefold()] = item
+    return parsed
+
+
+def batch_lookup(client, model, system_prompt, task, item_fields, names, validate,
+                 fallback=None, batch_size=BATCH_SIZE):
+    """
+    Looks up many names with one chat completion per `batch_size` names.
+
+    The model is asked for a JSON object {"results": [...]}, one entry per
+    name carrying "city" plus `item_fields`. Every entry goes through
+    `validate(item)`, which returns the cleaned value or None. Names that are
+    missing, invalid, or in a batch whose request failed are retried one at
+    a time with `fallback(name)` if given.
+
+    Returns {name: value or None} for every name.
+    """
+    names = list(dict.fromkeys(names))
+    results = {}
+
+    for batch in chunked(names, batch_size):
+        fields = ", ".join(f'"{field}"' for field in item_fields)
+        prompt = (
+            f"{task}\n"
+            f'Answer with a JSON object {{"results": [...]}} holding one entry per city, '
+            f'each with the keys "city" (exactly as given below), {fields}.\n'
+            f"Cities:\n" + "\n".join(f"- {name}" for name in batch)
+        )
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0,
+                max_tokens=TOKENS_PER_ITEM * len(batch) + 50
+            )
+            parsed = parse_batch_reply(response.choices[0].message.content)
+        except Exception as e:
+            print(f"Error in batched AI request ({len(batch)} cities): {e}")
+            parsed = {}
+
+        for name in batch:
+            item = parsed.get(name.strip().casefold())
+            value = validate(item) if item is not None else None
+            results[name] = value
+
+    if fallback is not None:
+        for name in [n for n, value in results.items() if value is None]:
+            try:
+                results[name] = fallback(name)
+            except Exception as e:
+                print(f"Error in AI fallback for {name}: {e}")
+
+    return results
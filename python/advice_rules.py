@@ -0,0 +1,199 @@
+# advice_rules.py -> weather advice as a rule table, evaluated for many locations at once with NumPy
+import operator
+from itertools import repeat
+from string import Formatter
+
+import numpy as np
+
+# Each group is checked in order and contributes at most one message: the
+# first rule in the group whose test passes. Templates are str.format()ed
+# with the location's metrics ({uvi}, {pop}, {day_temp}, {condition}) and
+# {temp_unit}.
+ADVICE_RULES = (
+    ("uvi", (
+        (">", 7, "The UV index is high ({uvi}). Wear sunscreen and sunglasses if you'll be outside for a while."),
+        (">", 2, "The UV index is moderate ({uvi}). It's still a good idea to protect your skin."),
+    )),
+    ("pop", (
+        (">", 60, "There's a high chance of rain today ({pop:.0f}%). Don't forget your umbrella!"),
+        (">", 30, "There's a slight chance of rain ({pop:.0f}%). It might be a good idea to take an umbrella just in case."),
+    )),
+    ("day_temp", (
+        (">", 32, "It's going to be very hot, around {day_temp}{temp_unit}. Stay hydrated and avoid strenuous activity during peak hours."),
+    )),
+    ("condition", (
+        ("==", "Thunderstorm", "Thunderstorms are expected. It's best to stay indoors and avoid open areas."),
+        ("==", "Clear", "Expect clear skies today, a perfect day for outdoor activities!"),
+        ("in", ("Rain", "Drizzle"), "Rain is expected. Wear waterproof clothing if you plan to be outside."),
+    )),
+)
+
+# Used when no group produced a message.
+DEFAULT_ADVICE = "Weather conditions seem stable today. Enjoy your day!"
+
+NUMERIC_METRICS = ("uvi", "pop", "day_temp")
+CONDITION_METRIC = "condition"
+
+# Rule operator -> (batch test on a NumPy column, test on a single value)
+_OPERATORS = {
+    ">": (np.greater, operator.gt),
+    ">=": (np.greater_equal, operator.ge),
+    "<": (np.less, operator.lt),
+    "<=": (np.less_equal, operator.le),
+    "==": (np.equal, operator.eq),
+    "in": (np.isin, lambda value, options: value in options)
+}
+
+
+def extract_metrics(current_weather, daily_forecast):
+    """The values the rules look at, taken from One Call 'current' and one 'daily' entry."""
+    return {
+        "uvi": current_weather.get('uvi', 0),
+        "pop": daily_forecast.get('pop', 0) * 100,  # Probability of precipitation
+        "day_temp": daily_forecast.get('temp', {}).get('day', 0),
+        "condition": daily_forecast.get('weather', [{}])[0].get('main', '')
+    }
+
+
+def extract_columns(locations):
+    """
+    extract_metrics for a list of (current_weather, daily_forecast) pairs,
+    as one list of raw values per metric.
+    """
+    return {
+        "uvi": [current.get('uvi', 0) for current, _ in locations],
+        "pop": [daily.get('pop', 0) * 100 for _, daily in locations],
+        "day_temp": [daily.get('temp', {}).get('day', 0) for _, daily in locations],
+        "condition": [daily.get('weather', [{}])[0].get('main', '') for _, daily in locations]
+    }
+
+
+def _positional(template):
+    """
+    Rewrites "{uvi} ... {temp_unit}" as "{0} ... {1}" and returns it with the
+    field names in argument order, so render() can call format() positionally.
+    """
+    parts = []
+    fields = []
+    for literal, name, spec, conversion in Formatter().parse(template):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        parts.append("{" + str(len(fields)) + (f"!{conversion}" if conversion else "") +
+                     (f":{spec}" if spec else "") + "}")
+        fields.append(name)
+    return "".join(parts), tuple(fields)
+
+
+class AdviceEngine:
+    """
+    ADVICE_RULES compiled once. For a batch, columns() builds one NumPy
+    column per metric, choose() picks one rule index per (location, group)
+    with a single vectorized test per rule, and render() formats the chosen
+    templates. advise() is the single-location path.
+    """
+
+    def __init__(self, rules=ADVICE_RULES, default=DEFAULT_ADVICE):
+        self.default = default
+        # Integer code per condition named in the rules; 0 means "other".
+        self.condition_codes = {}
+        for metric, group_rules in rules:
+            if metric == CONDITION_METRIC:
+                for _, threshold, _ in group_rules:
+                    for condition in (threshold if isinstance(threshold, (tuple, list)) else (threshold,)):
+                        self.condition_codes.setdefault(condition, len(self.condition_codes) + 1)
+
+        # Per group: (metric, batch tests, single-value tests, positional templates)
+        self.groups = []
+        for metric, group_rules in rules:
+            batch_tests = []
+            scalar_tests = []
+            templates = []
+            for op, threshold, template in group_rules:
+                if op not in _OPERATORS:
+                    raise ValueError(f"Unknown advice rule operator: {op}")
+                batch_op, scalar_op = _OPERATORS[op]
+                batch_threshold = threshold
+                if metric == CONDITION_METRIC:
+                    if isinstance(threshold, (tuple, list)):
+                        batch_threshold = [self.condition_codes[c] for c in threshold]
+                    else:
+                        batch_threshold = self.condition_codes[threshold]
+                batch_tests.append((batch_op, batch_threshold))
+                scalar_tests.append((scalar_op, threshold))
+                templates.append(_positional(template))
+            self.groups.append((metric, batch_tests, scalar_tests, templates))
+
+    def columns(self, raw):
+        """
+        NumPy columns for extract_columns() output. Conditions become integer
+        codes (0 for anything no rule mentions), so every test is numeric.
+        """
+        columns = {name: np.array(raw[name], dtype=np.float64) for name in NUMERIC_METRICS}
+        codes = self.condition_codes
+        columns[CONDITION_METRIC] = np.fromiter((codes.get(c, 0) for c in raw[CONDITION_METRIC]),
+                                                dtype=np.int16, count=len(raw[CONDITION_METRIC]))
+        return columns
+
+    def choose(self, columns):
+        """
+        Returns an int array of shape (locations, groups): the index of the
+        first matching rule in each group, or -1 where none matched.
+        """
+        n = len(columns[NUMERIC_METRICS[0]])
+        chosen = np.full((n, len(self.groups)), -1, dtype=np.int16)
+        for g, (metric, tests, _, _) in enumerate(self.groups):
+            column = columns[metric]
+            masks = [op(column, threshold) for op, threshold in tests]
+            chosen[:, g] = np.select(masks, range(len(masks)), default=-1)
+        return chosen
+
+    def render(self, chosen, raw, temp_unit="°C"):
+        """Advice lists (one per location) from choose() output and the raw metric values."""
+        results = [[] for _ in range(len(chosen))]
+        # Rule by rule rather than location by location: each template's
+        # arguments are gathered for all its rows and formatted in one map().
+        for g, (_, _, _, templates) in enumerate(self.groups):
+            column = chosen[:, g]
+            for rule, (template, fields) in enumerate(templates):
+                rows = np.flatnonzero(column == rule).tolist()
+                if not rows:
+                    continue
+                if not fields:
+                    for i in rows:
+                        results[i].append(template)
+                    continue
+                args = [repeat(temp_unit, len(rows)) if name == "temp_unit" else [raw[name][i] for i in rows]
+                        for name in fields]
+                for i, message in zip(rows, map(template.format, *args)):
+                    results[i].append(message)
+        return [advice or [self.default] for advice in results]
+
+    def advise_many(self, locations, temp_unit="°C"):
+        """
+        Advice for many locations in one pass. `locations` is a list of
+        (current_weather, daily_forecast) pairs; returns a list of advice lists.
+        """
+        if not locations:
+            return []
+        raw = extract_columns(locations)
+        return self.render(self.choose(self.columns(raw)), raw, temp_unit)
+
+    def advise(self, current_weather, daily_forecast, temp_unit="°C"):
+        """
+        Advice for a single location. Same table, checked with plain Python
+        comparisons: for one location NumPy's per-call overhead would dominate.
+        """
+        values = extract_metrics(current_weather, daily_forecast)
+        values["temp_unit"] = temp_unit
+        advice = []
+        for metric, _, tests, templates in self.groups:
+            value = values[metric]
+            for (op, threshold), (template, fields) in zip(tests, templates):
+                if op(value, threshold):
+                    advice.append(template.format(*[values[name] for name in fields]))
+                    break
+        return advice or [self.default]
+
+
+default_engine = AdviceEngine()
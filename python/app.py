@@ -1,108 +1,90 @@
 # app.py
 from flask import Flask, request, jsonify
-from openai import OpenAI
 from dotenv import load_dotenv
 import os
 import re, json, time
-import math
-from geo_module import get_city_coords
+from geo_module import get_city_coords_cached
+from gazetteer import suggest_cities
+from emergency_contacts import get_emergency_contact_cached
+from geo_math import describe_bounding_boxes
+from json_provider import FastJSONProvider
 
 # Load .env file
 load_dotenv()
 
-# Initialize Flask & OpenAI
+# Initialize Flask (the OpenAI client lives in geo_module / emergency_contacts)
 app = Flask(__name__)
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+app.json = FastJSONProvider(app)
 
-cache = {}
-CACHE_TTL = 300 
+# Bounding box half-size for /getmaxmin-coordinates, in degrees
+DEFAULT_BBOX_DELTA = 0.1
+MAX_BBOX_DELTA = 5.0
 
 @app.route("/get-coordinates", methods=["POST"])
 def get_coordinates():
     data = request.get_json()
-    p_id = data.get("_id")
     city = data.get("city")
-    
+
     if not city:
         return jsonify({"error": "City is required"}), 400
 
     city = city.lower().strip()
 
-    if (p_id, city) in cache:
-        cached_data = cache[(p_id, city)]
-        if time.time() - cached_data["timestamp"] < CACHE_TTL:
-            return jsonify({
-                "coordinates": cached_data["coords"],
-                "cached": True
-            })
-
-    coords_dict = get_city_coords(city)
+    # Served from the shared coordinate cache (see geo_module.coords_cache),
+    # the same one the main app uses, keyed on the city alone.
+    coords_dict, cached = get_city_coords_cached(city)
 
     if coords_dict is None:
-        return jsonify({"error": "Failed to retrieve coordinates."}), 500
-    
+        # Close gazetteer names are offered as hints only, never as coordinates.
+        return jsonify({"error": "Failed to retrieve coordinates.", "suggestions": suggest_cities(city)}), 500
+
     coords_list = [coords_dict["latitude"], coords_dict["longitude"]]
-    cache[(p_id, city)] = {
-        "coords": coords_list,
-        "timestamp": time.time()
-    }
 
     return jsonify({
         "coordinates": coords_list,
-        "cached": False
+        "cached": cached
     })
 
 @app.route("/getmaxmin-coordinates", methods=["GET"])
 def getmaxmin_coordinates():
-<<<<<<< HEAD:python/app.py
-    response = client.chat.completions.create(
-    model="gpt-4o-mini",
-    messages=[
-        {"role": "system", "content": "You are a geolocation assistant. Return only JSON with latitude and longitude of the city, rounded to 2 decimal places."},
-        {"role": "user", "content": f"Give me latitude and longitude of  in JSON format with keys latitude and longitude."}
-        ]
-    )
-    ai_reply = response.choices[0].message.content
-    ai_reply = re.sub(r"json|", "", ai_reply).strip()
-=======
-    # Use request.args.get() to get data from a query parameter
-    city = request.args.get("city")
-    if not city:
+    """
+    Bounding box (+/- delta degrees) and radius for one city, or for a batch:
+    ?city=a&city=b or ?cities=a,b. ?delta= overrides the default 0.1 degrees.
+    """
+    cities = request.args.getlist("city")
+    cities += [c for c in request.args.get("cities", "").split(",") if c.strip()]
+    if not cities:
         return jsonify({"error": "City is required"}), 400
 
-    coords_dict = get_city_coords(city)
-
-    if coords_dict is None:
-        return jsonify({"error": "Failed to retrieve coordinates."}), 500
-
-    lat = coords_dict["latitude"]
-    lon = coords_dict["longitude"]
-    
-    delta = 0.1
-    lat_min = lat - delta
-    lat_max = lat + delta
-    lon_min = lon - delta
-    lon_max = lon + delta
-
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 6371
-        phi1, phi2 = math.radians(lat1), math.radians(lat2)
-        dphi = math.radians(lat2 - lat1)
-        dlambda = math.radians(lon2 - lon1)
-        a = math.sin(dphi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda/2)**2
-        return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    diagonal = haversine(lat_min, lon_min, lat_max, lon_max)
-    radius = round(diagonal / 2, 2)
+    try:
+        delta = float(request.args.get("delta", DEFAULT_BBOX_DELTA))
+    except ValueError:
+        return jsonify({"error": "delta must be a number"}), 400
+    if not 0 < delta <= MAX_BBOX_DELTA:
+        return jsonify({"error": f"delta must be between 0 and {MAX_BBOX_DELTA}"}), 400
+
+    found, lats, lons, missing = [], [], [], []
+    for city in cities:
+        coords_dict, _ = get_city_coords_cached(city)
+        if coords_dict is None:
+            missing.append(city)
+            continue
+        found.append(city)
+        lats.append(coords_dict["latitude"])
+        lons.append(coords_dict["longitude"])
+
+    # All boxes and radii are computed in one vectorized pass.
+    boxes = describe_bounding_boxes(lats, lons, delta) if found else []
+
+    if len(cities) == 1:
+        if missing:
+            return jsonify({"error": "Failed to retrieve coordinates."}), 500
+        return jsonify(boxes[0])
 
     return jsonify({
-        "coordinates": {
-            "lat_min": round(lat_min, 2),
-            "lat_max": round(lat_max, 2),
-            "lon_min": round(lon_min, 2),
-            "lon_max": round(lon_max, 2),
-        },
-        "Radius_km": radius
+        "delta": delta,
+        "results": dict(zip(found, boxes)),
+        "missing": missing
     })
 
 @app.route("/get-emergency-contact", methods=["POST"])
@@ -115,29 +97,14 @@ def get_emergency_contact():
 
     city = city.lower().strip()
 
->>>>>>> 96faf540eb9658a9f7b3f64a891931483e12b574:app.py
     try:
-        prompt = (
-            f"What is the general emergency contact number (police/fire/ambulance) for {city}? "
-            f"Reply with only the number and the service, e.g., '112 – General emergency'."
-        )
-
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that provides emergency contact numbers only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=50
-        )
-
-        emergency_info = response.choices[0].message.content.strip()
-
-        return jsonify({
-            "city": city,
-            "emergency_contact": emergency_info
-        })
+        # Bundled country table first, then earlier AI answers; the AI
+        # assistant is only asked about cities neither of them covers.
+        contact, cached = get_emergency_contact_cached(city)
+        if contact is None:
+            return jsonify({"error": "Failed to fetch emergency contact"}), 500
+
+        return jsonify(dict(contact, city=city, cached=cached))
 
     except Exception as e:
         return jsonify({"error": "Failed to fetch emergency contact", "details": str(e)}), 500
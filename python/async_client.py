@@ -0,0 +1,225 @@
+# async_client.py -> asyncio versions of the weather and seismic fetchers for high fan-out refreshes
+#
+# Not used on the live path: refresh_scheduler.py refreshes cities on a
+# thread pool. This is for one-off bulk refreshes (e.g. warming thousands of
+# locations) that would need too many threads.
+import os
+import asyncio
+import aiohttp
+from urllib.parse import urlsplit
+
+try:
+    from weather_snapshot import ONECALL_URL, SNAPSHOT_EXCLUDE, peek_snapshot, store_snapshot, current_view, snapshot_key
+    from wsummary import build_weather_summary, build_advice_reports, new_severe_weather_report, analyze_severe_weather
+    from quake_poller import USGS_API_URL_BASE, location_query_params, get_default_feed
+except ImportError:
+    from python.weather_snapshot import ONECALL_URL, SNAPSHOT_EXCLUDE, peek_snapshot, store_snapshot, current_view, snapshot_key
+    from python.wsummary import build_weather_summary, build_advice_reports, new_severe_weather_report, analyze_severe_weather
+    from python.quake_poller import USGS_API_URL_BASE, location_query_params, get_default_feed
+
+# Requests in flight per upstream host, and in total across hosts.
+PER_HOST_CONCURRENCY = 20
+TOTAL_CONNECTIONS = 100
+
+CONNECT_TIMEOUT_S = 3.05
+READ_TIMEOUT_S = 10
+TOTAL_TIMEOUT_S = 20   # Whole request, so a slow-drip response cannot hang a gather
+
+
+class AsyncUpstreamClient:
+    """
+    One aiohttp session (one connection pool) for every upstream call made
+    from an event loop, plus a semaphore per host so a refresh of 1,000 cities
+    never has more than PER_HOST_CONCURRENCY requests open against one API.
+
+    Use it as `async with AsyncUpstreamClient() as client: ...`.
+    """
+
+    def __init__(self, per_host=PER_HOST_CONCURRENCY, total=TOTAL_CONNECTIONS):
+        self.per_host = per_host
+        self.total = total
+        self._session = None
+        self._semaphores = {}
+        self._inflight = {}  # snapshot key -> asyncio.Task, so one fetch per location
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.total, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=TOTAL_TIMEOUT_S, sock_connect=CONNECT_TIMEOUT_S,
+                                        sock_read=READ_TIMEOUT_S)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    def _semaphore(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._semaphores[host]
+
+    async def get_json(self, url, params=None):
+        """GETs a URL and returns the decoded JSON. Raises aiohttp.ClientError on failure."""
+        async with self._semaphore(url):
+            async with self._session.get(url, params=params) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    async def _fetch_snapshot(self, lat, lon, params):
+        data = await self.get_json(ONECALL_URL, params)
+        # store_snapshot also appends to the weather history on disk; keep
+        # that blocking I/O off the event loop.
+        await asyncio.get_running_loop().run_in_executor(None, store_snapshot, lat, lon, data)
+        return data
+
+    async def get_weather_snapshot(self, lat, lon, api_key=None):
+        """
+        Async counterpart of weather_snapshot.get_weather_snapshot: shares the
+        same per-bucket cache, and concurrent calls for one location share
+        one request.
+        """
+        data = peek_snapshot(lat, lon)
+        if data is not None:
+            return data
+
+        key = snapshot_key(lat, lon)
+        task = self._inflight.get(key)
+        if task is None:
+            params = {
+                'lat': lat,
+                'lon': lon,
+                'exclude': SNAPSHOT_EXCLUDE,
+                'appid': api_key or os.getenv("OPEN_WEATHER_API_KEY"),
+                'units': 'metric'
+            }
+            task = asyncio.ensure_future(self._fetch_snapshot(lat, lon, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await task
+
+
+async def fetch_current_ep_async(client, lat, lon):
+    """Async fetch_current_ep: the 'current' view, or None on error."""
+    api_key = os.getenv("OPEN_WEATHER_API_KEY")
+    if not api_key:
+        print("Error: OPEN_WEATHER_API_KEY not found in environment variables.")
+        return None
+    try:
+        return current_view(await client.get_weather_snapshot(lat, lon, api_key))
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"A request error occurred: {e}")
+        return None
+
+
+async def fetch_weather_summary_async(client, lat, lon, api_key):
+    """Async fetch_weather_summary: today/tomorrow summary, or None on error."""
+    try:
+        data = await client.get_weather_snapshot(lat, lon, api_key)
+        return build_weather_summary(data, lat, lon)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"A network error occurred: {e}")
+    except (KeyError, IndexError):
+        print("Error: Could not parse the weather data from the API response.")
+    return None
+
+
+async def monitor_and_analyze_severe_weather_async(client, lat, lon, api_key):
+    """Async monitor_and_analyze_severe_weather: always returns a report."""
+    analysis_report = new_severe_weather_report(lat, lon)
+    try:
+        data = await client.get_weather_snapshot(lat, lon, api_key)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        analysis_report["status"] = "API_ERROR"
+        analysis_report["details"]["message"] = f"API request failed: {e}"
+        return analysis_report
+    return analyze_severe_weather(data, analysis_report)
+
+
+async def fetch_earthquake_for_location_async(client, coords):
+    """
+    Async fetch_earthquake_for_location: latest nearby M4.5+ event, or None.
+    Read from the shared quake feed when the refresh scheduler keeps it
+    current (python/quake_poller.py), so a bulk refresh adds no USGS calls.
+    """
+    loop = asyncio.get_running_loop()
+    feed = get_default_feed()
+    if await loop.run_in_executor(None, feed.is_live):
+        return await loop.run_in_executor(None, feed.latest_near, coords['lat'], coords['lon'], coords['radius_km'])
+    try:
+        data = await client.get_json(USGS_API_URL_BASE, location_query_params(coords))
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Error fetching USGS data: {e}")
+        return None
+    features = data.get('features', [])
+    return features[0] if features else None
+
+
+async def get_weather_snapshot_or_none(client, lat, lon, api_key):
+    try:
+        return await client.get_weather_snapshot(lat, lon, api_key)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"A network error occurred: {e}")
+        return None
+
+
+def _value_or_none(what, result):
+    # gather(return_exceptions=True) result -> value, or None (logged) for a failure.
+    if isinstance(result, BaseException):
+        print(f"Error refreshing {what}: {result!r}")
+        return None
+    return result
+
+
+async def refresh_locations(locations, api_key=None):
+    """
+    Refreshes many locations concurrently on one event loop and one pool.
+    `locations` are dicts with 'name', 'lat', 'lon' and 'radius_km'.
+    Returns {name: {"weather_summary", "major_alerts", "general_alerts", "earthquake"}}.
+    The advice for every location is computed together once all fetches are
+    done (wsummary.build_advice_reports). Like the sync fetchers, a part
+    that fails (e.g. a malformed response body) is None; it never aborts
+    the other parts or locations.
+    """
+    api_key = api_key or os.getenv("OPEN_WEATHER_API_KEY")
+    parts = ("weather_summary", "major_alerts", "earthquake")
+
+    async with AsyncUpstreamClient() as client:
+        async def refresh(location):
+            lat, lon = location['lat'], location['lon']
+            *values, snapshot = await asyncio.gather(
+                fetch_weather_summary_async(client, lat, lon, api_key),
+                monitor_and_analyze_severe_weather_async(client, lat, lon, api_key),
+                fetch_earthquake_for_location_async(client, location),
+                get_weather_snapshot_or_none(client, lat, lon, api_key),
+                return_exceptions=True
+            )
+            result = {part: _value_or_none(f"{location['name']} {part}", value) for part, value in zip(parts, values)}
+            return result, _value_or_none(f"{location['name']} snapshot", snapshot)
+
+        refreshed = await asyncio.gather(*(refresh(location) for location in locations), return_exceptions=True)
+
+    refreshed = [
+        _value_or_none(location['name'], item) or (dict.fromkeys(parts), None)
+        for location, item in zip(locations, refreshed)
+    ]
+    advice_reports = build_advice_reports(
+        [(snapshot, location['lat'], location['lon']) for location, (_, snapshot) in zip(locations, refreshed)]
+    )
+    results = {}
+    for location, (result, _), advice_report in zip(locations, refreshed, advice_reports):
+        result["general_alerts"] = advice_report
+        results[location['name']] = result
+    return results
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    demo = [
+        {"name": "Mumbai", "lat": 19.08, "lon": 72.88, "radius_km": 500},
+        {"name": "Chennai", "lat": 13.08, "lon": 80.27, "radius_km": 500},
+        {"name": "Kochi", "lat": 9.93, "lon": 76.27, "radius_km": 500}
+    ]
+    for name, result in asyncio.run(refresh_locations(demo)).items():
+        print(name, (result["major_alerts"] or {}).get("status"))
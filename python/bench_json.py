@@ -0,0 +1,90 @@
+# bench_json.py -> compares Flask's default JSON encoding with FastJSONProvider on our payloads
+#
+# Run from the repository root:  python python/bench_json.py
+import os
+import json
+import random
+import timeit
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    from json_provider import FastJSONProvider, orjson
+except ImportError:
+    from python.json_provider import FastJSONProvider, orjson
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def usgs_feed(n_features):
+    """A synthetic USGS GeoJSON feed shaped like the FDSN 'query' response."""
+    rng = random.Random(42)
+    features = []
+    for i in range(n_features):
+        features.append({
+            "type": "Feature",
+            "id": f"us7000{i:05d}",
+            "properties": {
+                "mag": round(rng.uniform(4.5, 8.0), 1),
+                "place": f"{rng.randint(5, 300)} km SSW of Somewhere, Region {i}",
+                "time": 1693400000000 + i * 60000,
+                "updated": 1693400500000 + i * 60000,
+                "tz": None,
+                "url": f"https://earthquake.usgs.gov/earthquakes/eventpage/us7000{i:05d}",
+                "felt": rng.randint(0, 500),
+                "alert": rng.choice([None, "green", "yellow"]),
+                "status": "reviewed",
+                "tsunami": rng.randint(0, 1),
+                "sig": rng.randint(300, 1000),
+                "net": "us",
+                "magType": "mww",
+                "type": "earthquake",
+                "title": f"M {rng.uniform(4.5, 8.0):.1f} - Region {i}"
+            },
+            "geometry": {
+                "type": "Point",
+                "coordinates": [rng.uniform(-180, 180), rng.uniform(-60, 60), rng.uniform(5, 600)]
+            }
+        })
+    return {"type": "FeatureCollection", "metadata": {"count": n_features}, "features": features}
+
+
+def load_payloads():
+    payloads = {}
+    combined = {}
+    for key, name in (("current_ep", "currentep.json"), ("general_alert", "generalalert.json"),
+                      ("majoralert", "majoralert_20250830_153041.json"), ("wsummary", "wsummary.json")):
+        with open(os.path.join(HERE, name)) as f:
+            combined[key] = json.load(f)
+    payloads["/jsonfile (4 reports)"] = combined
+    payloads["USGS feed, 20 events"] = usgs_feed(20)
+    payloads["USGS feed, 500 events"] = usgs_feed(500)
+    return payloads
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    return f"{label:<16}{seconds * 1e6:>10.1f} us"
+
+
+def main():
+    default_app = Flask("default")
+    default_app.json = DefaultJSONProvider(default_app)
+    fast_app = Flask("fast")
+    fast_app.json = FastJSONProvider(fast_app)
+
+    print(f"orjson: {'installed' if orjson is not None else 'not installed (stdlib fallback)'}")
+    for name, payload in load_payloads().items():
+        size_kb = len(json.dumps(payload)) / 1024
+        number = 200 if size_kb < 64 else 20
+        print(f"\n{name} ({size_kb:.1f} KB)")
+        with default_app.app_context():
+            print(bench("flask default", lambda: default_app.json.response(payload), number))
+        with fast_app.app_context():
+            print(bench("fast provider", lambda: fast_app.json.response(payload), number))
+            print(bench("cached bytes", lambda: fast_app.json.cached_response(("bench", name), payload), number))
+
+
+if __name__ == "__main__":
+    main()
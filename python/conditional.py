@@ -0,0 +1,106 @@
+# conditional.py -> content-hash ETags, 304s and per-section deltas for polled JSON endpoints
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request, jsonify, current_app
+
+HISTORY_SIZE = 1024  # Versions remembered for ?since= deltas, across all keys
+
+
+def section_hash(value):
+    """Short, stable hash of a JSON-serializable value."""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class SectionVersions:
+    """
+    Turns a payload made of named sections into a version string derived
+    from the sections' content hashes, and remembers the hashes of recent
+    versions so a client can ask what changed since the version it holds.
+
+    Versions are content hashes, so every worker process computes the same
+    version for the same data; a version this process has not seen (or has
+    forgotten) simply gets the full payload.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.history_size = history_size
+        self._history = OrderedDict()  # version -> {section: hash}
+        self._latest = {}              # key -> (stamp, version, hashes)
+        self._lock = threading.Lock()
+
+    def version_of(self, key, sections, stamp=None):
+        """
+        Returns (version, {section: hash}). If `stamp` (e.g. the time the
+        data was collected) matches the last call for `key`, the hashes are
+        reused instead of re-serializing every section.
+        """
+        with self._lock:
+            latest = self._latest.get(key)
+        if stamp is not None and latest is not None and latest[0] == stamp:
+            return latest[1], latest[2]
+
+        hashes = {name: section_hash(value) for name, value in sections.items()}
+        version = section_hash(sorted(hashes.items()))
+        with self._lock:
+            self._latest[key] = (stamp, version, hashes)
+            self._history[version] = hashes
+            self._history.move_to_end(version)
+            while len(self._history) > self.history_size:
+                self._history.popitem(last=False)
+        return version, hashes
+
+    def changed_since(self, since, hashes):
+        """Names of sections that differ from version `since`, or None if it is unknown."""
+        with self._lock:
+            old = self._history.get(since)
+        if old is None:
+            return None
+        return [name for name, h in hashes.items() if old.get(name) != h]
+
+
+def conditional_response(versions, key, sections, full_body, meta=None, stamp=None):
+    """
+    Builds the response for a polled endpoint:
+      - If-None-Match with the current version -> 304 Not Modified, no body;
+      - ?since=<version> -> only the sections that changed since then, plus
+        `meta` (falls back to the full body if that version is unknown);
+      - otherwise the full body.
+    Every response carries the version as its ETag, and bodies as "version".
+    `full_body` may also be already-encoded JSON bytes (which must then
+    include "version"), sent as they are.
+    """
+    version, hashes = versions.version_of(key, sections, stamp)
+
+    if request.if_none_match.contains_weak(version):
+        response = current_app.response_class(status=304)
+        response.set_etag(version)
+        return response
+
+    since = request.args.get("since")
+    changed = versions.changed_since(since, hashes) if since else None
+    if changed is None and isinstance(full_body, bytes):
+        body = None
+        response = current_app.response_class(full_body, mimetype="application/json")
+    elif changed is None and hasattr(current_app.json, "cached_response"):
+        # The same version (and metadata) is served to every poller until it
+        # changes, so its encoded bytes are reused (see json_provider).
+        body = None
+        response = current_app.json.cached_response(
+            (key, version, section_hash(meta)), dict(full_body, version=version))
+    elif changed is None:
+        body = dict(full_body, version=version)
+    else:
+        body = dict(meta or {}, version=version, since=since, full=False)
+        body["changed"] = {name: sections[name] for name in changed}
+        body["unchanged"] = [name for name in sections if name not in changed]
+
+    if body is not None:
+        response = jsonify(body)
+    response.set_etag(version)
+    # Revalidate every time; the ETag makes that a cheap 304.
+    response.headers["Cache-Control"] = "no-cache"
+    return response
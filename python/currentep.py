@@ -4,6 +4,12 @@ from dotenv import load_dotenv
 import os
 from datetime import datetime
 
+# Shared One Call snapshot: one upstream fetch per location per time bucket.
+try:
+    from weather_snapshot import get_weather_snapshot, current_view
+except ImportError:
+    from python.weather_snapshot import get_weather_snapshot, current_view
+
 # Assuming get_coordinates is in a file named app.py in the same directory.
 # If it's not, you might need to adjust the import.
 try:
@@ -31,15 +37,9 @@ def fetch_current_ep(lat, lon):
         print("Error: OPEN_WEATHER_API_KEY not found in environment variables.")
         return None
 
-    exclude_parts = "minutely,hourly,daily,alerts"
-    url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude={exclude_parts}&appid={api_key}&units=metric"
-    
     try:
-        response = requests.get(url)
-        # Raises an HTTPError for bad responses (4xx or 5xx)
-        response.raise_for_status()  
-        data = response.json()
-        return data
+        data = get_weather_snapshot(lat, lon, api_key)
+        return current_view(data)
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
     except requests.exceptions.RequestException as req_err:
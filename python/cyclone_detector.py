@@ -0,0 +1,201 @@
+# cyclone_detector.py -> pressure-tendency and wind-trend cyclone indicators over streaming snapshots
+import threading
+import numpy as np
+
+WINDOW_S = 3 * 3600        # Trends are measured over the last 3 hours
+ANCHOR_SLACK_S = 45 * 60   # The 3-hour reference reading may be up to 45 minutes older
+RING_SIZE = 64             # Samples kept per location (5-minute snapshots fill 37)
+
+# Trend thresholds. A 3-hour fall of 3 hPa is "falling rapidly" in marine
+# forecasts and 6 hPa "very rapidly"; trends escalate the status before the
+# absolute wind/pressure thresholds are crossed.
+PRESSURE_FALL_HPA_3H = -3.0
+PRESSURE_FALL_FAST_HPA_3H = -6.0
+WIND_ACCEL_MS_PER_H = 3.0
+GUST_RATIO_ALERT = 1.6
+NEAR_THRESHOLD_FRACTION = 0.75   # Wind within 75% of the storm threshold
+LOW_PRESSURE_MARGIN_HPA = 20     # Pressure within 20 hPa of the low threshold
+
+TIME, PRESSURE, WIND, GUST = range(4)
+
+
+class CycloneDetector:
+    """
+    Keeps a ring buffer of (time, pressure, wind, gust) per location in one
+    preallocated NumPy block and maintains, for each location, the index of
+    the 3-hour reference reading: the newest sample at least 3 hours old.
+    An update writes one slot and advances that index past older samples,
+    so it is O(1) amortized no matter how many locations are tracked.
+
+    Trends are the plain difference between the newest reading and the
+    reference reading, never extrapolated from a shorter span: One Call
+    reports pressure in whole hPa, and scaling a single 1 hPa step over
+    30 minutes up to 3 hours would read as a rapid fall.
+    """
+
+    def __init__(self, ring_size=RING_SIZE, window_s=WINDOW_S, capacity=1024):
+        self.ring_size = ring_size
+        self.window_s = window_s
+        self._rows = {}  # location key -> row
+        self._samples = np.full((capacity, ring_size, 4), np.nan)
+        self._head = np.zeros(capacity, dtype=np.int64)   # Next slot to write
+        self._tail = np.zeros(capacity, dtype=np.int64)   # Oldest slot in window
+        self._count = np.zeros(capacity, dtype=np.int64)  # Samples in the ring
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _row(self, key):
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._samples):
+                self._grow()
+            self._rows[key] = row
+        return row
+
+    def _grow(self):
+        extra = len(self._samples)
+        self._samples = np.concatenate([self._samples, np.full((extra, self.ring_size, 4), np.nan)])
+        self._head = np.concatenate([self._head, np.zeros(extra, dtype=np.int64)])
+        self._tail = np.concatenate([self._tail, np.zeros(extra, dtype=np.int64)])
+        self._count = np.concatenate([self._count, np.zeros(extra, dtype=np.int64)])
+
+    def update(self, key, ts, pressure, wind, gust=None):
+        """
+        Adds a reading for a location and returns its trends (see trends()).
+        A reading that is not newer than the last one is ignored, so the same
+        snapshot can be offered by several analyzers.
+        """
+        with self._lock:
+            row = self._row(key)
+            ring = self._samples[row]
+            size = self.ring_size
+            head, count = self._head[row], self._count[row]
+
+            if count and ts <= ring[(head - 1) % size, TIME]:
+                return self._trends(row)
+
+            ring[head] = (ts, pressure, wind, np.nan if gust is None else gust)
+            if count == size:
+                # The ring was full; the slot we overwrote was the oldest.
+                if self._tail[row] == head:
+                    self._tail[row] = (head + 1) % size
+            else:
+                self._count[row] = count + 1
+            self._head[row] = head = (head + 1) % size
+
+            # Move the reference to the newest sample that is still at least
+            # window_s old (amortized O(1)).
+            tail = self._tail[row]
+            newest = (head - 1) % size
+            while tail != newest and ring[(tail + 1) % size, TIME] <= ts - self.window_s:
+                tail = (tail + 1) % size
+            self._tail[row] = tail
+
+            return self._trends(row)
+
+    def trends(self, key):
+        """Current trends for a location, or None if it was never updated."""
+        with self._lock:
+            row = self._rows.get(key)
+            return None if row is None else self._trends(row)
+
+    def _trends(self, row):
+        ring = self._samples[row]
+        newest = ring[(self._head[row] - 1) % self.ring_size]
+        oldest = ring[self._tail[row]]
+        span_s = newest[TIME] - oldest[TIME]
+
+        gust_ratio = None
+        if not np.isnan(newest[GUST]) and newest[WIND] > 0:
+            gust_ratio = round(float(newest[GUST] / newest[WIND]), 2)
+
+        trends = {
+            "samples": int(self._count[row]),
+            "span_minutes": round(float(span_s) / 60, 1),
+            "pressure_tendency_hpa_3h": None,
+            "wind_acceleration_ms_per_h": None,
+            "gust_ratio": gust_ratio
+        }
+        # Only with a reference reading about 3 hours old: less history is
+        # not scaled up, and a reference from before a long gap is not used.
+        if self.window_s <= span_s <= self.window_s + ANCHOR_SLACK_S:
+            trends["pressure_tendency_hpa_3h"] = round(float(newest[PRESSURE] - oldest[PRESSURE]), 2)
+            trends["wind_acceleration_ms_per_h"] = round(
+                float((newest[WIND] - oldest[WIND]) / span_s * 3600), 2)
+        return trends
+
+
+def classify_trends(trends, wind, pressure, wind_threshold, pressure_threshold):
+    """
+    Returns (status, reasons) from the trend indicators alone, using the same
+    status codes as analyze_severe_weather, or (None, []) if nothing stands out.
+    """
+    reasons = []
+    tendency = trends["pressure_tendency_hpa_3h"]
+    accel = trends["wind_acceleration_ms_per_h"]
+    gust_ratio = trends["gust_ratio"]
+
+    pressure_falling = tendency is not None and tendency <= PRESSURE_FALL_HPA_3H
+    pressure_falling_fast = tendency is not None and tendency <= PRESSURE_FALL_FAST_HPA_3H
+    pressure_near_low = pressure < pressure_threshold + LOW_PRESSURE_MARGIN_HPA
+    wind_near_high = wind > NEAR_THRESHOLD_FRACTION * wind_threshold
+    wind_rising = accel is not None and accel >= WIND_ACCEL_MS_PER_H
+    gusty = gust_ratio is not None and gust_ratio >= GUST_RATIO_ALERT
+
+    if pressure_falling:
+        reasons.append(f"Pressure falling {abs(tendency)} hPa per 3h.")
+    if wind_rising:
+        reasons.append(f"Wind rising {accel} m/s per hour.")
+    if gusty:
+        reasons.append(f"Gusts {gust_ratio}x the sustained wind.")
+
+    if pressure_falling_fast and pressure_near_low and (wind_near_high or wind_rising):
+        return "DANGER_CONDITIONS_MET", reasons
+    if wind_near_high and (wind_rising or gusty):
+        return "CAUTION_HIGH_WINDS", reasons
+    if pressure_falling and pressure_near_low:
+        return "CAUTION_LOW_PRESSURE", reasons
+    return None, []
+
+
+# Severity order of the status codes the trend check may raise a report to.
+STATUS_RANK = {"CLEAR": 0, "CAUTION_LOW_PRESSURE": 1, "CAUTION_HIGH_WINDS": 2, "DANGER_CONDITIONS_MET": 3}
+
+TREND_MESSAGES = {
+    "DANGER_CONDITIONS_MET": "High-danger: Rapid pressure fall with strengthening winds (cyclone developing).",
+    "CAUTION_HIGH_WINDS": "Caution: Winds strengthening towards storm force.",
+    "CAUTION_LOW_PRESSURE": "Caution: Pressure falling rapidly."
+}
+
+default_detector = CycloneDetector()
+
+
+def apply_trend_analysis(analysis_report, current_weather, wind_threshold, pressure_threshold,
+                         detector=None):
+    """
+    Feeds a 'current' block into the detector, stores the trends under
+    details["trends"] and raises the report's status (never lowers it) when
+    the trends point to a developing storm.
+    """
+    # Not `detector or ...`: an empty detector has len() 0 and is falsy.
+    if detector is None:
+        detector = default_detector
+    if "dt" not in current_weather:
+        return analysis_report
+
+    location = analysis_report["monitoring_location"]
+    key = (round(float(location["latitude"]), 4), round(float(location["longitude"]), 4))
+    wind = current_weather.get('wind_speed', 0)
+    pressure = current_weather.get('pressure', 1013)
+    trends = detector.update(key, current_weather["dt"], pressure, wind, current_weather.get('wind_gust'))
+    analysis_report["details"]["trends"] = trends
+
+    status, reasons = classify_trends(trends, wind, pressure, wind_threshold, pressure_threshold)
+    if status and STATUS_RANK[status] > STATUS_RANK.get(analysis_report["status"], 0):
+        analysis_report["status"] = status
+        analysis_report["details"]["message"] = TREND_MESSAGES[status]
+        analysis_report["details"]["trend_reasons"] = reasons
+    return analysis_report
@@ -0,0 +1,125 @@
+# event_log.py -> append-only history on SQLite (WAL mode) with time-range queries
+import os
+import json
+import time
+import sqlite3
+import threading
+
+DEFAULT_DB_PATH = os.getenv(
+    "HISTORY_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "history.sqlite3")
+)
+
+RETENTION_S = 90 * 24 * 3600     # Entries older than this are dropped on compaction
+COMPACT_INTERVAL_S = 24 * 3600   # How often append() triggers a compaction
+
+
+class EventLog:
+    """
+    Time-stamped JSON entries grouped by stream (e.g. a city name). Each
+    append is one INSERT in its own transaction, so it costs the same no
+    matter how long the history is, and a crash mid-write leaves the previous
+    entries intact. Reads use the (stream, ts) index for range queries.
+
+    compact() drops entries past the retention window and truncates the WAL;
+    append() runs it at most once per COMPACT_INTERVAL_S.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, retention=RETENTION_S, compact_interval=COMPACT_INTERVAL_S):
+        self.path = path
+        self.retention = retention
+        self.compact_interval = compact_interval
+        self._local = threading.local()
+        self._last_compact = time.time()
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY,
+                    stream TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    value TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS events_stream_ts ON events (stream, ts)")
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def append(self, stream, value, ts=None):
+        """Appends one JSON-serializable entry. `ts` defaults to now (epoch seconds)."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO events (stream, ts, value) VALUES (?, ?, ?)",
+                (stream, time.time() if ts is None else ts, json.dumps(value))
+            )
+        if time.time() - self._last_compact > self.compact_interval:
+            self.compact()
+
+    def append_many(self, stream, entries):
+        """Appends [(ts, value), ...] in a single transaction."""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO events (stream, ts, value) VALUES (?, ?, ?)",
+                [(stream, ts, json.dumps(value)) for ts, value in entries]
+            )
+
+    def query(self, stream, start=None, end=None, limit=None):
+        """
+        Returns [(ts, value)] for a stream with start <= ts < end, oldest
+        first. With `limit`, only the newest `limit` entries in the window.
+        """
+        sql = "SELECT ts, value FROM events WHERE stream = ? AND ts >= ? AND ts < ?"
+        args = [stream, float("-inf") if start is None else start, float("inf") if end is None else end]
+        if limit is not None:
+            sql += " ORDER BY ts DESC LIMIT ?"
+            args.append(limit)
+            rows = self._connect().execute(sql, args).fetchall()[::-1]
+        else:
+            rows = self._connect().execute(sql + " ORDER BY ts", args).fetchall()
+        return [(ts, json.loads(value)) for ts, value in rows]
+
+    def streams(self):
+        rows = self._connect().execute("SELECT DISTINCT stream FROM events").fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, stream=None):
+        if stream is None:
+            row = self._connect().execute("SELECT COUNT(*) FROM events").fetchone()
+        else:
+            row = self._connect().execute("SELECT COUNT(*) FROM events WHERE stream = ?", (stream,)).fetchone()
+        return row[0]
+
+    def compact(self):
+        """
+        Deletes entries older than the retention window and checkpoints the
+        WAL back into the main file. Returns how many entries were removed.
+        """
+        self._last_compact = time.time()
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM events WHERE ts < ?", (time.time() - self.retention,))
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return cursor.rowcount
+
+
+_default_log = None
+_default_lock = threading.Lock()
+
+
+def get_default_log():
+    """Returns the process-wide log at HISTORY_DB_PATH, opening it on first use."""
+    global _default_log
+    if _default_log is None:
+        with _default_lock:
+            if _default_log is None:
+                _default_log = EventLog()
+    return _default_log
@@ -3,52 +3,25 @@ import json
 from dotenv import load_dotenv
 import os
 from datetime import datetime
+
+# Shared One Call snapshot: one upstream fetch per location per time bucket.
+try:
+    from weather_snapshot import get_weather_snapshot
+    from advice_rules import default_engine as advice_engine
+except ImportError:
+    from python.weather_snapshot import get_weather_snapshot
+    from python.advice_rules import default_engine as advice_engine
+
 from app import get_coordinates
 def hello(assistant_output):
     return assistant_output
 def generate_weather_advice(current_weather, daily_forecast):
     """
     Generates human-readable advice based on weather data.
-    This acts as our 'AI' logic.
+    The rules live in python/advice_rules.py; use advice_engine.advise_many
+    to advise a whole batch of locations in one pass.
     """
-    advice = []
-    
-    # Extract key metrics for decision making
-    uvi = current_weather.get('uvi', 0)
-    pop = daily_forecast.get('pop', 0) * 100  # Probability of precipitation
-    day_temp = daily_forecast.get('temp', {}).get('day', 0)
-    weather_condition = daily_forecast.get('weather', [{}])[0].get('main', '')
-
-    # Advice based on UV Index
-    if uvi > 7:
-        advice.append(f"The UV index is high ({uvi}). Wear sunscreen and sunglasses if you'll be outside for a while.")
-    elif uvi > 2:
-        advice.append(f"The UV index is moderate ({uvi}). It's still a good idea to protect your skin.")
-
-    # Advice based on precipitation
-    if pop > 60:
-        advice.append(f"There's a high chance of rain today ({pop:.0f}%). Don't forget your umbrella!")
-    elif pop > 30:
-        advice.append(f"There's a slight chance of rain ({pop:.0f}%). It might be a good idea to take an umbrella just in case.")
-
-    # Advice based on temperature
-    if day_temp > 32:
-        advice.append(f"It's going to be very hot, around {day_temp}*C. Stay hydrated and avoid strenuous activity during peak hours.")
-    
-    # Advice based on general weather conditions
-    if weather_condition == "Thunderstorm":
-        advice.append("Thunderstorms are expected. It's best to stay indoors and avoid open areas.")
-    elif weather_condition == "Clear":
-        advice.append("Expect clear skies today, a perfect day for outdoor activities!")
-    elif weather_condition in ["Rain", "Drizzle"]:
-        advice.append("Rain is expected. Wear waterproof clothing if you plan to be outside.")
-
-        
-    # Default message if no other advice fits
-    if not advice:
-        advice.append("Weather conditions seem stable today. Enjoy your day!")
-
-    return advice
+    return advice_engine.advise(current_weather, daily_forecast, temp_unit="*C")
 
 
 def create_ai_assistant_json(lat, lon, api_key, filename="generalalert.json"):
@@ -56,13 +29,8 @@ def create_ai_assistant_json(lat, lon, api_key, filename="generalalert.json"):
     Fetches weather data, generates advice, and saves it all to a JSON file.
     """
     # We need current and daily for our advice logic
-    exclude_parts = "minutely,hourly,alerts"
-    url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude={exclude_parts}&appid={api_key}&units=metric"
-
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = get_weather_snapshot(lat, lon, api_key)
 
         current_data = data.get('current', {})
         today_daily_data = data['daily'][0]
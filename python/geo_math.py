@@ -0,0 +1,103 @@
+# geo_math.py -> vectorized great-circle helpers shared by the geo code
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in kilometres. Accepts scalars or NumPy arrays
+    (broadcast against each other) in degrees.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    dphi = lat2 - lat1
+    dlambda = lon2 - lon1
+    a = np.sin(dphi / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def destination_point(lat, lon, bearing_deg, distance_km):
+    """
+    Point reached by travelling distance_km from (lat, lon) along the initial
+    bearing (degrees clockwise from north). Vectorized like haversine_km.
+    Returns (lat, lon) in degrees, longitude normalized to [-180, 180).
+    """
+    lat1 = np.radians(np.asarray(lat, dtype=float))
+    lon1 = np.radians(np.asarray(lon, dtype=float))
+    bearing = np.radians(np.asarray(bearing_deg, dtype=float))
+    delta = np.asarray(distance_km, dtype=float) / EARTH_RADIUS_KM
+
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(delta) + np.cos(lat1) * np.sin(delta) * np.cos(bearing))
+    lon2 = lon1 + np.arctan2(
+        np.sin(bearing) * np.sin(delta) * np.cos(lat1),
+        np.cos(delta) - np.sin(lat1) * np.sin(lat2)
+    )
+    lon2 = (np.degrees(lon2) + 180) % 360 - 180
+    return np.degrees(lat2), lon2
+
+
+def bounding_box(lat, lon, delta_deg=0.1):
+    """
+    Box of +/- delta_deg around each point.
+    Returns (lat_min, lat_max, lon_min, lon_max), each shaped like the input.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    return lat - delta_deg, lat + delta_deg, lon - delta_deg, lon + delta_deg
+
+
+def radius_bounding_box(lat, lon, radius_km):
+    """
+    Smallest lat/lon box containing the circle of radius_km around each point.
+    Returns (lat_min, lat_max, lon_min, lon_max), longitudes in [-180, 180).
+
+    The widest point of the circle is not due east/west of the centre but
+    closer to the pole, so the longitude half-width is asin(sin(r) / cos(lat))
+    rather than the longitude of the destination point at bearing 90. When
+    the circle contains a pole, latitude is clamped at that pole and the box
+    spans every longitude (-180 to 180). A box crossing the antimeridian has
+    lon_min > lon_max.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    r = np.asarray(radius_km, dtype=float) / EARTH_RADIUS_KM
+    r_deg = np.degrees(r)
+
+    lat_min = lat - r_deg
+    lat_max = lat + r_deg
+    pole_inside = (lat_max >= 90) | (lat_min <= -90)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.sin(r) / np.cos(np.radians(lat))
+    dlon = np.degrees(np.arcsin(np.clip(ratio, -1.0, 1.0)))
+    wraps_all = pole_inside | (dlon >= 180)
+
+    lon_min = np.where(wraps_all, -180.0, (lon - dlon + 180) % 360 - 180)
+    lon_max = np.where(wraps_all, 180.0, (lon + dlon + 180) % 360 - 180)
+    return np.clip(lat_min, -90, 90), np.clip(lat_max, -90, 90), lon_min, lon_max
+
+
+def describe_bounding_boxes(lats, lons, delta_deg=0.1):
+    """
+    Builds the /getmaxmin-coordinates payload for many points in one pass:
+    the +/- delta_deg box around each point and half its diagonal in km.
+    Returns a list of dicts, one per point.
+    """
+    lat_min, lat_max, lon_min, lon_max = bounding_box(lats, lons, delta_deg)
+    radius = haversine_km(lat_min, lon_min, lat_max, lon_max) / 2
+
+    lat_min, lat_max = np.round(lat_min, 2), np.round(lat_max, 2)
+    lon_min, lon_max = np.round(lon_min, 2), np.round(lon_max, 2)
+    radius = np.round(radius, 2)
+    return [
+        {
+            "coordinates": {
+                "lat_min": float(lat_min[i]),
+                "lat_max": float(lat_max[i]),
+                "lon_min": float(lon_min[i]),
+                "lon_max": float(lon_max[i]),
+            },
+            "Radius_km": float(radius[i])
+        }
+        for i in range(len(radius))
+    ]
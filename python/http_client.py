@@ -0,0 +1,201 @@
+# http_client.py -> shared keep-alive HTTP sessions with timeouts, retries and latency stats
+import time
+import random
+import threading
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeout in seconds used when a caller does not pass one.
+DEFAULT_TIMEOUT = (3.05, 10)
+DEFAULT_POOL_SIZE = 32
+
+MAX_RETRIES = 2
+BACKOFF_BASE_S = 0.25
+BACKOFF_MAX_S = 4.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+LATENCY_SAMPLES = 512  # Recent samples kept per host for percentiles
+
+# Per-thread request deadline (a time.monotonic() value) set by deadline().
+_context = threading.local()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a request cannot start or finish before the caller's deadline."""
+
+
+@contextmanager
+def deadline(at):
+    """
+    Bounds every request made on this thread inside the block by the
+    time.monotonic() instant `at`: the connect and read timeouts are cut to
+    the time left, and no retry is attempted once its backoff alone would
+    run past the deadline. Nested deadlines keep
+    the earlier one.
+    """
+    previous = getattr(_context, "deadline", None)
+    _context.deadline = at if previous is None else min(at, previous)
+    try:
+        yield
+    finally:
+        _context.deadline = previous
+
+
+def remaining_time():
+    """Seconds left before this thread's deadline, or None if it has none."""
+    at = getattr(_context, "deadline", None)
+    return None if at is None else at - time.monotonic()
+
+
+def _bounded_timeout(timeout):
+    # Cuts a (connect, read) or single timeout down to the time left.
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    return min(timeout, remaining)
+
+
+def _has_time_for(delay):
+    remaining = remaining_time()
+    return remaining is None or remaining > delay
+
+
+class UpstreamClient:
+    """
+    One requests.Session per upstream host, so repeated calls reuse pooled
+    keep-alive connections instead of paying a TCP + TLS handshake each time.
+
+    Every request gets a default timeout. Connection errors, timeouts and
+    429/5xx answers are retried up to `max_retries` times with full-jitter
+    exponential backoff (GET only, unless the caller asks for retries).
+    Inside a deadline() block, timeouts and retries are cut to fit it.
+    Latency is recorded per host; see stats().
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+                self._stats[host] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "latencies_ms": deque(maxlen=LATENCY_SAMPLES)
+                }
+            return session
+
+    def _record(self, host, elapsed_s, error=False, retry=False):
+        with self._lock:
+            stats = self._stats[host]
+            stats["requests"] += 1
+            stats["latencies_ms"].append(elapsed_s * 1000)
+            if error:
+                stats["errors"] += 1
+            if retry:
+                stats["retries"] += 1
+
+    @staticmethod
+    def _backoff(attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), BACKOFF_MAX_S)
+        return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** attempt)))
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        """
+        Sends a request through the host's pooled session and returns the
+        response. Raises the usual requests exceptions once retries run out.
+        """
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        if retries is None:
+            retries = self.max_retries if method.upper() == "GET" else 0
+        timeout = self.timeout if timeout is None else timeout
+
+        for attempt in range(retries + 1):
+            attempt_timeout = _bounded_timeout(timeout)
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=attempt_timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                delay = self._backoff(attempt)
+                will_retry = attempt < retries and _has_time_for(delay)
+                self._record(host, time.perf_counter() - started, error=True, retry=will_retry)
+                if not will_retry:
+                    raise
+                time.sleep(delay)
+                continue
+
+            will_retry = response.status_code in RETRY_STATUSES and attempt < retries
+            if will_retry:
+                delay = self._backoff(attempt, response)
+                will_retry = _has_time_for(delay)
+            self._record(host, time.perf_counter() - started,
+                         error=response.status_code >= 400, retry=will_retry)
+            if not will_retry:
+                return response
+            time.sleep(delay)
+            response.close()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """Per-host request/error/retry counts and latency percentiles (ms)."""
+        with self._lock:
+            snapshot = {host: dict(s, latencies_ms=sorted(s["latencies_ms"])) for host, s in self._stats.items()}
+
+        report = {}
+        for host, s in snapshot.items():
+            samples = s.pop("latencies_ms")
+            if samples:
+                s["p50_ms"] = round(samples[len(samples) // 2], 1)
+                s["p95_ms"] = round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1)
+                s["max_ms"] = round(samples[-1], 1)
+            report[host] = s
+        return report
+
+
+# Process-wide client shared by every fetcher.
+default_client = UpstreamClient()
+
+
+def get(url, **kwargs):
+    """requests.get replacement that goes through the shared pooled client."""
+    return default_client.get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """requests.post replacement that goes through the shared pooled client."""
+    return default_client.post(url, **kwargs)
+
+
+def host_stats():
+    return default_client.stats()
@@ -1,11 +1,50 @@
+import os
 import json
-from flask import Flask, jsonify
+import glob
+import threading
+from flask import Flask
 from flask_cors import CORS
 
+try:
+    from conditional import SectionVersions, conditional_response
+    from json_provider import FastJSONProvider
+except ImportError:
+    from python.conditional import SectionVersions, conditional_response
+    from python.json_provider import FastJSONProvider
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 CORS(app)
 
+jsonfile_versions = SectionVersions()
+
+# Directory the JSON files are read from (defaults to this file's directory).
+JSON_DIR = os.getenv("JSONFILE_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+# Response key -> file name or glob pattern. For a pattern, the newest match
+# is used: files like majoralert_20250830_153041.json sort by their timestamp.
+# Override with JSONFILE_SOURCES="key=pattern;key=pattern".
+DEFAULT_SOURCES = {
+    "current_ep": "currentep.json",
+    "general_alert": "generalalert.json",
+    "majoralert": "majoralert_*.json",
+    "wsummary": "wsummary.json"
+}
+
+
+def configured_sources():
+    """Returns the {key: pattern} map from JSONFILE_SOURCES, or the defaults."""
+    raw = os.getenv("JSONFILE_SOURCES")
+    if not raw:
+        return dict(DEFAULT_SOURCES)
+    sources = {}
+    for item in raw.split(";"):
+        key, _, pattern = item.partition("=")
+        if key.strip() and pattern.strip():
+            sources[key.strip()] = pattern.strip()
+    return sources
+
 # This function safely loads JSON data from a file
 def load_json_file(filename):
     """
@@ -21,29 +60,80 @@ def load_json_file(filename):
         print(f"Error: Invalid JSON format in '{filename}'.")
         return {"error": f"Invalid JSON format in '{filename}'."}
 
+
+def latest_match(pattern):
+    """The newest file matching a glob pattern (by name, then mtime), or the pattern itself."""
+    if not glob.has_magic(pattern):
+        return pattern
+    matches = glob.glob(pattern)
+    if not matches:
+        return pattern
+    return max(matches, key=lambda path: (os.path.basename(path), os.path.getmtime(path)))
+
+
+class CombinedJSONCache:
+    """
+    Keeps the combined /jsonfile payload as decoded sections and as encoded
+    bytes. Each request only stats the source files (and the directory, to
+    notice new pattern matches); the files are re-read and the bytes
+    re-encoded only when a file's path, mtime, inode or size changes.
+    """
+
+    def __init__(self, sources, directory, versions):
+        self.sources = sources
+        self.directory = directory
+        self.versions = versions
+        self._entry = None  # (signature, sections, encoded bytes)
+        self._resolved = None  # (directory mtime, {key: path})
+        self._lock = threading.Lock()
+
+    def _paths(self):
+        # Glob patterns are re-resolved only when the directory changes.
+        dir_mtime = os.stat(self.directory).st_mtime_ns
+        if self._resolved is None or self._resolved[0] != dir_mtime:
+            paths = {key: latest_match(os.path.join(self.directory, pattern))
+                     for key, pattern in self.sources.items()}
+            self._resolved = (dir_mtime, paths)
+        return self._resolved[1]
+
+    def _signature(self, paths):
+        signature = []
+        for key, path in paths.items():
+            try:
+                st = os.stat(path)
+                signature.append((key, path, st.st_mtime_ns, st.st_ino, st.st_size))
+            except FileNotFoundError:
+                signature.append((key, path, None, None, None))
+        return tuple(signature)
+
+    def get(self):
+        """Returns (sections, encoded_body, signature), rebuilding if any file changed."""
+        with self._lock:
+            signature = self._signature(self._paths())
+            if self._entry is not None and self._entry[0] == signature:
+                return self._entry[1], self._entry[2], signature
+
+            sections = {key: load_json_file(path) for key, path, *_ in signature}
+            version, _ = self.versions.version_of("jsonfile", sections, stamp=signature)
+            encoded = app.json.encode(dict(sections, version=version))
+            self._entry = (signature, sections, encoded)
+            return sections, encoded, signature
+
+
+jsonfile_cache = CombinedJSONCache(configured_sources(), JSON_DIR, jsonfile_versions)
+
 @app.route("/jsonfile")
 def get_json_data():
     """
-    API endpoint that loads and combines data from multiple JSON files.
+    API endpoint that combines data from multiple JSON files (see
+    DEFAULT_SOURCES), served from CombinedJSONCache.
     """
-    # Load data from all of your JSON files
-    currentep_data = load_json_file('currentep.json')
-    general_alert_data = load_json_file('generalalert.json')
-    majoralert_data = load_json_file('majoralert_20250830_153041.json')
-    wsummary_data = load_json_file('wsummary.json')
-
-    # Combine the data into a single dictionary
-    all_data = {
-        "current_ep": currentep_data,
-        "general_alert": general_alert_data,
-        "majoralert": majoralert_data,
-        "wsummary": wsummary_data
-    }
-    
-    # Return the combined data as a JSON response
-    return jsonify(all_data)
+    all_data, encoded, signature = jsonfile_cache.get()
+
+    # Return the combined data as a JSON response, or a 304 / only the
+    # changed files (?since=<version>) when the client is up to date
+    return conditional_response(jsonfile_versions, "jsonfile", all_data, encoded, stamp=signature)
 
 if __name__ == '__main__':
-    # Make sure to run this file from the 'python' directory
-    # so it can find the JSON files.
+    # The JSON files are read from JSONFILE_DIR (this directory by default).
     app.run(debug=True)
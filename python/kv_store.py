@@ -0,0 +1,125 @@
+# kv_store.py -> small persistent key/value store on SQLite (WAL mode)
+import os
+import json
+import time
+import sqlite3
+import threading
+
+DEFAULT_DB_PATH = os.getenv(
+    "CACHE_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache.sqlite3")
+)
+
+
+class KVStore:
+    """
+    JSON values stored in SQLite, grouped by namespace. WAL mode lets every
+    gunicorn worker on the host read while one of them writes, and a primary
+    key lookup takes tens of microseconds with no network involved.
+
+    Each thread gets its own connection, since sqlite3 connections must not
+    be shared between threads.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS kv (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key, max_age=None):
+        """
+        Returns the stored value, or None if it is missing or older than
+        max_age seconds.
+        """
+        row = self._connect().execute(
+            "SELECT value, updated_at FROM kv WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        value, updated_at = row
+        if max_age is not None and time.time() - updated_at > max_age:
+            return None
+        return json.loads(value)
+
+    def set(self, namespace, key, value):
+        """Stores (or replaces) a JSON-serializable value."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), time.time())
+            )
+
+    def set_many(self, namespace, values):
+        """Stores (or replaces) every {key: value} pair in one transaction."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                [(namespace, key, json.dumps(value), now) for key, value in values.items()]
+            )
+
+    def delete(self, namespace, key):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def purge(self, namespace, max_age):
+        """Deletes entries older than max_age seconds. Returns how many were removed."""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND updated_at < ?",
+                (namespace, time.time() - max_age)
+            )
+        return cursor.rowcount
+
+    def items(self, namespace, max_age=None):
+        """Returns {key: value} for a namespace, skipping entries older than max_age seconds."""
+        oldest = 0 if max_age is None else time.time() - max_age
+        rows = self._connect().execute(
+            "SELECT key, value FROM kv WHERE namespace = ? AND updated_at >= ?",
+            (namespace, oldest)
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def count(self, namespace):
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM kv WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0]
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_default_store():
+    """Returns the process-wide store at CACHE_DB_PATH, opening it on first use."""
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = KVStore()
+    return _default_store
@@ -4,6 +4,16 @@ from dotenv import load_dotenv
 import os
 from datetime import datetime
 
+# Shared One Call snapshot: one upstream fetch per location per time bucket.
+try:
+    from weather_snapshot import get_weather_snapshot, current_view
+    from cyclone_detector import apply_trend_analysis
+    from advice_rules import default_engine as advice_engine
+except ImportError:
+    from python.weather_snapshot import get_weather_snapshot, current_view
+    from python.cyclone_detector import apply_trend_analysis
+    from python.advice_rules import default_engine as advice_engine
+
 # Assuming get_coordinates is in a file named app.py in the same directory.
 # If it's not, you might need to adjust the import.
 try:
@@ -36,14 +46,9 @@ def fetch_current_ep(lat, lon):
         print("Error: OPEN_WEATHER_API_KEY not found in environment variables.")
         return None
 
-    exclude_parts = "minutely,hourly,daily,alerts"
-    url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude={exclude_parts}&appid={api_key}&units=metric"
-    
     try:
-        response = requests.get(url)
-        response.raise_for_status()  
-        data = response.json()
-        return data
+        data = get_weather_snapshot(lat, lon, api_key)
+        return current_view(data)
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
     except requests.exceptions.RequestException as req_err:
@@ -104,58 +109,18 @@ def display_weather(data):
 def generate_weather_advice(current_weather, daily_forecast):
     """
     Generates human-readable advice based on weather data.
-    This acts as our 'AI' logic.
+    The rules live in python/advice_rules.py; use advice_engine.advise_many
+    to advise a whole batch of locations in one pass.
     """
-    advice = []
-    
-    # Extract key metrics for decision making
-    uvi = current_weather.get('uvi', 0)
-    pop = daily_forecast.get('pop', 0) * 100  # Probability of precipitation
-    day_temp = daily_forecast.get('temp', {}).get('day', 0)
-    weather_condition = daily_forecast.get('weather', [{}])[0].get('main', '')
-
-    # Advice based on UV Index
-    if uvi > 7:
-        advice.append(f"The UV index is high ({uvi}). Wear sunscreen and sunglasses if you'll be outside for a while.")
-    elif uvi > 2:
-        advice.append(f"The UV index is moderate ({uvi}). It's still a good idea to protect your skin.")
-
-    # Advice based on precipitation
-    if pop > 60:
-        advice.append(f"There's a high chance of rain today ({pop:.0f}%). Don't forget your umbrella!")
-    elif pop > 30:
-        advice.append(f"There's a slight chance of rain ({pop:.0f}%). It might be a good idea to take an umbrella just in case.")
-
-    # Advice based on temperature
-    if day_temp > 32:
-        advice.append(f"It's going to be very hot, around {day_temp}°C. Stay hydrated and avoid strenuous activity during peak hours.")
-    
-    # Advice based on general weather conditions
-    if weather_condition == "Thunderstorm":
-        advice.append("Thunderstorms are expected. It's best to stay indoors and avoid open areas.")
-    elif weather_condition == "Clear":
-        advice.append("Expect clear skies today, a perfect day for outdoor activities!")
-    elif weather_condition in ["Rain", "Drizzle"]:
-        advice.append("Rain is expected. Wear waterproof clothing if you plan to be outside.")
-
-    # Default message if no other advice fits
-    if not advice:
-        advice.append("Weather conditions seem stable today. Enjoy your day!")
-
-    return advice
+    return advice_engine.advise(current_weather, daily_forecast)
 
 
 def fetch_and_generate_advice(lat, lon, api_key):
     """
     Fetches weather data, generates advice, and returns it as a JSON object.
     """
-    exclude_parts = "minutely,hourly,alerts"
-    url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude={exclude_parts}&appid={api_key}&units=metric"
-
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = get_weather_snapshot(lat, lon, api_key)
 
         current_data = data.get('current', {})
         today_daily_data = data['daily'][0]
@@ -206,14 +171,9 @@ def monitor_and_analyze_severe_weather(lat, lon, api_key):
         "details": {}
     }
 
-    base_url = "https://api.openweathermap.org/data/3.0/onecall"
-    params = {'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric'}
-    
     # 2. Fetch data from the API. If it fails, update the report and return immediately.
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = get_weather_snapshot(lat, lon, api_key)
     except requests.exceptions.RequestException as e:
         analysis_report["status"] = "API_ERROR"
         analysis_report["details"]["message"] = f"API request failed: {e}"
@@ -254,8 +214,12 @@ def monitor_and_analyze_severe_weather(lat, lon, api_key):
     else:
         analysis_report["status"] = "CLEAR"
         analysis_report["details"]["message"] = "No immediate cyclone indicators found in current conditions."
-        
-    # 5. This is the final report based on the analysis of current conditions.
+
+    # 5. Trends over the last few hours (pressure tendency, wind acceleration,
+    #    gusts) can raise the status before the fixed thresholds are crossed.
+    apply_trend_analysis(analysis_report, current_weather, WIND_SPEED_THRESHOLD_MS, PRESSURE_THRESHOLD_HPA)
+
+    # 6. This is the final report based on the analysis of current conditions.
     return analysis_report
 
 
@@ -0,0 +1,303 @@
+# quake_poller.py -> one USGS query per interval, fanned out to every monitored location
+import time
+import threading
+import requests
+import numpy as np
+from datetime import datetime, timezone
+
+try:
+    import http_client
+except ImportError:
+    from python import http_client
+
+try:
+    from spatial_index import GridIndex, RegionIndex
+    from geo_math import haversine_km
+    from kv_store import get_default_store
+except ImportError:
+    from python.spatial_index import GridIndex, RegionIndex
+    from python.geo_math import haversine_km
+    from python.kv_store import get_default_store
+
+USGS_API_URL_BASE = "https://earthquake.usgs.gov/fdsnws/event/1/query"
+
+DEFAULT_MIN_MAGNITUDE = 4.5
+FIRST_POLL_LOOKBACK_S = 3600  # How far back the very first poll looks
+POLL_INTERVAL_S = 60
+
+# Shared feed: the refresh scheduler runs one poller and writes every event
+# it sees to the KV store; Flask workers answer "latest quake near here" from
+# it instead of sending USGS one limit=1 query per city.
+QUAKE_NAMESPACE = "quake_events"
+FEED_STATUS_NAMESPACE = "quake_feed"
+FEED_LOOKBACK_S = 30 * 86400             # FDSN's default window, which limit=1 location queries searched
+FEED_STALE_AFTER_S = 5 * POLL_INTERVAL_S  # Older than this, readers fall back to querying USGS
+FEED_RELOAD_S = 30                        # Readers re-read the store at most this often
+
+
+def location_query_params(coords, min_magnitude=DEFAULT_MIN_MAGNITUDE):
+    """
+    FDSN parameters for the latest event within coords['radius_km'] of
+    (coords['lat'], coords['lon']), as used by fetch_earthquake_for_location.
+    """
+    return {
+        'format': 'geojson',
+        'latitude': coords['lat'],
+        'longitude': coords['lon'],
+        'maxradiuskm': coords['radius_km'],
+        'minmagnitude': min_magnitude,
+        'orderby': 'time',
+        'limit': 1
+    }
+
+
+def _iso_utc(epoch_ms):
+    return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+
+
+class QuakePoller:
+    """
+    Polls the USGS FDSN feed once per interval for all monitored locations.
+
+    The first poll asks for the last hour of events; later polls pass
+    `updatedafter` with the newest `updated` timestamp seen so far, so only new
+    or revised events cross the wire. Events are then matched to locations
+    locally through a GridIndex, where each location has its own radius, and
+    to risk regions (e.g. tsunami.REGIONS) through a RegionIndex.
+    """
+
+    def __init__(self, min_magnitude=DEFAULT_MIN_MAGNITUDE, timeout=(3.05, 15), regions=None,
+                 first_lookback_s=FIRST_POLL_LOOKBACK_S):
+        self.min_magnitude = min_magnitude
+        self.timeout = timeout
+        self.first_lookback_s = first_lookback_s
+        self.last_success = None  # time.time() of the last poll USGS answered
+        self.index = GridIndex(cell_deg=2.0)
+        self.region_index = RegionIndex()
+        self.locations = {}
+        self.watermark_ms = None
+
+        for name, bounds in (regions or {}).items():
+            self.region_index.add(name, *bounds)
+
+    def subscribe(self, location):
+        """
+        Starts monitoring a location dict with 'name', 'lat', 'lon' and
+        'radius_km' (the same shape fetch_earthquake_for_location takes).
+        """
+        self.locations[location['name']] = location
+        self.index.add(location['name'], location['lat'], location['lon'], location['radius_km'])
+
+    def unsubscribe(self, name):
+        self.locations.pop(name, None)
+        self.index.remove(name)
+
+    def build_params(self):
+        """Query parameters for the next poll."""
+        params = {
+            'format': 'geojson',
+            'minmagnitude': self.min_magnitude,
+            'orderby': 'time'
+        }
+        if self.watermark_ms is None:
+            params['starttime'] = _iso_utc((time.time() - self.first_lookback_s) * 1000)
+        else:
+            params['updatedafter'] = _iso_utc(self.watermark_ms)
+        return params
+
+    def fetch_updates(self):
+        """Returns the new or updated GeoJSON features since the last poll."""
+        try:
+            response = http_client.get(USGS_API_URL_BASE, params=self.build_params(), timeout=self.timeout)
+            response.raise_for_status()
+            features = response.json().get('features', [])
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching USGS data: {e}")
+            return []
+
+        self.last_success = time.time()
+        for feature in features:
+            updated = feature['properties'].get('updated') or feature['properties'].get('time')
+            if updated and (self.watermark_ms is None or updated > self.watermark_ms):
+                self.watermark_ms = updated
+        if self.watermark_ms is None:
+            # Nothing happened yet; start the incremental window from now.
+            self.watermark_ms = int(time.time() * 1000)
+        return features
+
+    def assign(self, features):
+        """
+        Maps each monitored location name to the events within its radius,
+        newest first (the feed is ordered by time).
+        """
+        assignments = {}
+        for feature in features:
+            lon, lat = feature['geometry']['coordinates'][:2]
+            for name, _ in self.index.query_containing(lat, lon):
+                assignments.setdefault(name, []).append(feature)
+        return assignments
+
+    def fan_out(self, feature):
+        """
+        Returns everything one earthquake affects: the monitored locations
+        within their radius (nearest first, with distances) and the risk
+        regions containing the epicentre.
+        """
+        lon, lat = feature['geometry']['coordinates'][:2]
+        return {
+            "locations": [
+                {"name": name, "distance_km": round(distance_km, 1)}
+                for name, distance_km in self.index.query_containing(lat, lon)
+            ],
+            "regions": self.region_index.query_point(lat, lon)
+        }
+
+    def poll(self):
+        """One poll cycle: fetch once, then fan the events out to locations."""
+        return self.assign(self.fetch_updates())
+
+
+
+class QuakeFeedPublisher:
+    """
+    Writer side of the shared feed: each poll() fetches new or revised
+    events once (the first poll covers FEED_LOOKBACK_S) and upserts them into
+    the KV store by event id, along with the time of the last good poll.
+    Run one per host, from the refresh scheduler.
+
+    With `locations_loader` (returning location dicts, see
+    QuakePoller.subscribe) the poller's subscriptions follow it, and every
+    later poll fans its events out to them: `on_affected(names)` gets the
+    locations within radius of a new or revised event, e.g. to refresh them
+    now instead of at their next turn.
+    """
+
+    def __init__(self, store=None, poller=None, locations_loader=None, on_affected=None):
+        self.store = store or get_default_store()
+        self.poller = poller or QuakePoller(first_lookback_s=FEED_LOOKBACK_S)
+        self.locations_loader = locations_loader
+        self.on_affected = on_affected
+
+    def sync_locations(self, locations):
+        """Subscribes the poller to exactly these locations."""
+        names = set()
+        for location in locations:
+            names.add(location['name'])
+            if self.poller.locations.get(location['name']) != location:
+                self.poller.subscribe(location)
+        for name in set(self.poller.locations) - names:
+            self.poller.unsubscribe(name)
+
+    def affected(self, features):
+        """Names of the subscribed locations any of the events reaches."""
+        return sorted({
+            location["name"] for feature in features for location in self.poller.fan_out(feature)["locations"]
+        })
+
+    def poll(self):
+        if self.locations_loader is not None:
+            try:
+                self.sync_locations(self.locations_loader())
+            except Exception as e:
+                print(f"Error loading quake feed locations: {e}")
+
+        # The first poll is the 30-day backfill, not news for anyone.
+        backfill = self.poller.watermark_ms is None
+        features = self.poller.fetch_updates()
+        if self.poller.last_success is None:
+            return 0
+        self.store.set_many(QUAKE_NAMESPACE, {f['id']: f for f in features if f.get('id')})
+        self.store.purge(QUAKE_NAMESPACE, FEED_LOOKBACK_S)
+        self.store.set(FEED_STATUS_NAMESPACE, "status", {
+            "polled_at": self.poller.last_success,
+            "watermark_ms": self.poller.watermark_ms
+        })
+
+        if features and not backfill and self.on_affected is not None:
+            affected = self.affected(features)
+            if affected:
+                self.on_affected(affected)
+        return len(features)
+
+
+class QuakeFeedReader:
+    """
+    Reader side of the shared feed. Keeps the stored events as NumPy columns,
+    re-read from the store at most every FEED_RELOAD_S, and finds the latest
+    event near a point with one vectorized distance computation.
+    """
+
+    def __init__(self, store=None, reload_s=FEED_RELOAD_S):
+        self.store = store or get_default_store()
+        self.reload_s = reload_s
+        self._loaded_at = None
+        self._status = None
+        self._features = []
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        with self._lock:
+            if self._loaded_at is not None and time.time() - self._loaded_at < self.reload_s:
+                return
+            self._status = self.store.get(FEED_STATUS_NAMESPACE, "status")
+            features = sorted(self.store.items(QUAKE_NAMESPACE, max_age=FEED_LOOKBACK_S).values(),
+                              key=lambda f: f['properties'].get('time') or 0, reverse=True)
+            self._features = features
+            self._lats = np.array([f['geometry']['coordinates'][1] for f in features], dtype=float)
+            self._lons = np.array([f['geometry']['coordinates'][0] for f in features], dtype=float)
+            self._mags = np.array([f['properties'].get('mag') or 0 for f in features], dtype=float)
+            self._times = np.array([f['properties'].get('time') or 0 for f in features], dtype=float)
+            self._loaded_at = time.time()
+
+    def invalidate(self):
+        """Makes the next read go to the store, e.g. right after a publisher wrote to it."""
+        with self._lock:
+            self._loaded_at = None
+
+    def is_live(self):
+        """True if a publisher has polled USGS recently enough to trust the feed."""
+        self._refresh()
+        return self._status is not None and time.time() - self._status["polled_at"] <= FEED_STALE_AFTER_S
+
+    def latest_near(self, lat, lon, radius_km, min_magnitude=DEFAULT_MIN_MAGNITUDE):
+        """
+        The newest event within radius_km of (lat, lon), like
+        fetch_earthquake_for_location's limit=1 query, or None.
+        """
+        self._refresh()
+        with self._lock:
+            if not self._features:
+                return None
+            near = ((self._mags >= min_magnitude)
+                    & (self._times >= (time.time() - FEED_LOOKBACK_S) * 1000)
+                    & (haversine_km(lat, lon, self._lats, self._lons) <= radius_km))
+            hits = np.flatnonzero(near)
+            # Features are sorted newest first.
+            return self._features[hits[0]] if len(hits) else None
+
+
+_default_feed = None
+_default_feed_lock = threading.Lock()
+
+
+def get_default_feed():
+    """Returns the process-wide QuakeFeedReader over the default KV store."""
+    global _default_feed
+    if _default_feed is None:
+        with _default_feed_lock:
+            if _default_feed is None:
+                _default_feed = QuakeFeedReader()
+    return _default_feed
+
+
+if __name__ == "__main__":
+    poller = QuakePoller()
+    poller.subscribe({"name": "Offshore Honshu, Japan", "lat": 38.322, "lon": 142.369, "radius_km": 500})
+    poller.subscribe({"name": "Sunda Arc, Indonesia", "lat": -2.0, "lon": 100.0, "radius_km": 800})
+    poller.subscribe({"name": "Chennai, India", "lat": 13.08, "lon": 80.27, "radius_km": 1500})
+
+    while True:
+        for name, events in poller.poll().items():
+            for event in events:
+                print(f"{name}: M{event['properties']['mag']} at {event['properties']['place']}")
+        time.sleep(POLL_INTERVAL_S)
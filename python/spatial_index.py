@@ -0,0 +1,217 @@
+# spatial_index.py -> lat/lon grid indexes for points (user locations) and boxes (risk regions)
+import math
+import threading
+import numpy as np
+
+try:
+    from geo_math import haversine_km, EARTH_RADIUS_KM
+except ImportError:
+    from python.geo_math import haversine_km, EARTH_RADIUS_KM
+
+# On the sphere haversine_km uses; rounding it up would shrink the cell
+# search and miss points right at the edge of a radius.
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+class GridIndex:
+    """
+    Buckets points into cells of `cell_deg` degrees. A radius query only
+    looks at the cells the circle can touch and then filters the candidates
+    with one vectorized haversine call, instead of scanning every point.
+
+    Each point may carry its own radius (e.g. how far away an earthquake has
+    to be to matter to that location); see query_containing().
+    """
+
+    def __init__(self, cell_deg=1.0):
+        self.cell_deg = cell_deg
+        self.lon_cells = int(math.ceil(360 / cell_deg))
+        self._cells = {}    # (lat_cell, lon_cell) -> set of item ids
+        self._points = {}   # item id -> (lat, lon, radius_km, cell)
+        self._max_radius_km = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, item_id):
+        return item_id in self._points
+
+    def _cell(self, lat, lon):
+        lat_cell = int(math.floor((lat + 90) / self.cell_deg))
+        lon_cell = int(math.floor(((lon + 180) % 360) / self.cell_deg)) % self.lon_cells
+        return lat_cell, lon_cell
+
+    def add(self, item_id, lat, lon, radius_km=0.0):
+        """Adds or moves a point."""
+        with self._lock:
+            self._remove_locked(item_id)
+            cell = self._cell(lat, lon)
+            self._cells.setdefault(cell, set()).add(item_id)
+            self._points[item_id] = (float(lat), float(lon), float(radius_km), cell)
+            self._max_radius_km = max(self._max_radius_km, float(radius_km))
+
+    def _remove_locked(self, item_id):
+        point = self._points.pop(item_id, None)
+        if point is None:
+            return
+        cell_items = self._cells.get(point[3])
+        cell_items.discard(item_id)
+        if not cell_items:
+            del self._cells[point[3]]
+
+    def remove(self, item_id):
+        with self._lock:
+            self._remove_locked(item_id)
+
+    def _cells_around(self, lat, lon, radius_km):
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        min_lat_cell = int(math.floor((max(lat - lat_span, -90) + 90) / self.cell_deg))
+        max_lat_cell = int(math.floor((min(lat + lat_span, 90) + 90) / self.cell_deg))
+
+        # Longitude degrees shrink towards the poles; near them every cell counts.
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_span, 90)))
+        if cos_lat < 1e-6:
+            lon_offsets = range(self.lon_cells)
+            centre = 0
+        else:
+            lon_span = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+            steps = int(math.ceil(lon_span / self.cell_deg))
+            if 2 * steps + 1 >= self.lon_cells:
+                lon_offsets = range(self.lon_cells)
+                centre = 0
+            else:
+                lon_offsets = range(-steps, steps + 1)
+                centre = self._cell(lat, lon)[1]
+
+        for lat_cell in range(min_lat_cell, max_lat_cell + 1):
+            for offset in lon_offsets:
+                cell = (lat_cell, (centre + offset) % self.lon_cells)
+                if cell in self._cells:
+                    yield cell
+
+    def _candidates(self, lat, lon, radius_km):
+        ids = []
+        for cell in self._cells_around(lat, lon, radius_km):
+            ids.extend(self._cells[cell])
+        return ids
+
+    def query_radius(self, lat, lon, radius_km):
+        """Returns [(item_id, distance_km)] for points within radius_km, nearest first."""
+        with self._lock:
+            ids = self._candidates(lat, lon, radius_km)
+            if not ids:
+                return []
+            coords = np.array([self._points[i][:2] for i in ids])
+
+        distances = haversine_km(lat, lon, coords[:, 0], coords[:, 1])
+        order = np.argsort(distances)
+        return [(ids[i], float(distances[i])) for i in order if distances[i] <= radius_km]
+
+    def query_containing(self, lat, lon):
+        """
+        Returns [(item_id, distance_km)] for points whose own radius reaches
+        (lat, lon), nearest first.
+        """
+        with self._lock:
+            ids = self._candidates(lat, lon, self._max_radius_km)
+            if not ids:
+                return []
+            rows = np.array([self._points[i][:3] for i in ids])
+
+        distances = haversine_km(lat, lon, rows[:, 0], rows[:, 1])
+        order = np.argsort(distances)
+        return [(ids[i], float(distances[i])) for i in order if distances[i] <= rows[i, 2]]
+
+    def query_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Returns the ids of points inside the box. A box with min_lon > max_lon
+        wraps across the antimeridian.
+        """
+        with self._lock:
+            ids = []
+            for cell in _cells_in_box(min_lat, min_lon, max_lat, max_lon, self.cell_deg, self.lon_cells):
+                ids.extend(self._cells.get(cell, ()))
+            points = [self._points[i] for i in ids]
+
+        return [i for i, (lat, lon, _, _) in zip(ids, points)
+                if min_lat <= lat <= max_lat and _lon_in_range(lon, min_lon, max_lon)]
+
+
+def _lon_in_range(lon, min_lon, max_lon):
+    if min_lon <= max_lon:
+        return min_lon <= lon <= max_lon
+    return lon >= min_lon or lon <= max_lon
+
+
+def _cells_in_box(min_lat, min_lon, max_lat, max_lon, cell_deg, lon_cells):
+    """Yields every grid cell a lat/lon box overlaps (wrapping in longitude)."""
+    first_lat = int(math.floor((max(min_lat, -90) + 90) / cell_deg))
+    last_lat = int(math.floor((min(max_lat, 90) + 90) / cell_deg))
+    first_lon = int(math.floor(((min_lon + 180) % 360) / cell_deg)) % lon_cells
+    last_lon = int(math.floor(((max_lon + 180) % 360) / cell_deg)) % lon_cells
+
+    if min_lon <= max_lon and max_lon - min_lon >= 360 - cell_deg:
+        lon_range = range(lon_cells)
+    elif first_lon <= last_lon and min_lon <= max_lon:
+        lon_range = range(first_lon, last_lon + 1)
+    else:
+        lon_range = list(range(first_lon, lon_cells)) + list(range(0, last_lon + 1))
+
+    for lat_cell in range(first_lat, last_lat + 1):
+        for lon_cell in lon_range:
+            yield lat_cell, lon_cell
+
+
+class RegionIndex:
+    """
+    Grid index over rectangular regions (e.g. tsunami risk zones). Each region
+    is registered in every cell it overlaps, so "which regions contain this
+    point" only checks the few regions sharing the point's cell.
+    """
+
+    def __init__(self, cell_deg=5.0):
+        self.cell_deg = cell_deg
+        self.lon_cells = int(math.ceil(360 / cell_deg))
+        self._cells = {}    # cell -> list of region ids
+        self._regions = {}  # region id -> (min_lat, min_lon, max_lat, max_lon)
+
+    def __len__(self):
+        return len(self._regions)
+
+    def add(self, region_id, min_lon, min_lat, max_lon, max_lat):
+        """Adds a region, using the [min_lon, min_lat, max_lon, max_lat] order of tsunami.REGIONS."""
+        self._regions[region_id] = (min_lat, min_lon, max_lat, max_lon)
+        for cell in _cells_in_box(min_lat, min_lon, max_lat, max_lon, self.cell_deg, self.lon_cells):
+            self._cells.setdefault(cell, []).append(region_id)
+
+    def query_point(self, lat, lon):
+        """Returns the ids of regions containing the point, in insertion order."""
+        lat_cell = int(math.floor((lat + 90) / self.cell_deg))
+        lon_cell = int(math.floor(((lon + 180) % 360) / self.cell_deg)) % self.lon_cells
+        hits = []
+        for region_id in self._cells.get((lat_cell, lon_cell), ()):
+            min_lat, min_lon, max_lat, max_lon = self._regions[region_id]
+            if min_lat <= lat <= max_lat and _lon_in_range(lon, min_lon, max_lon):
+                hits.append(region_id)
+        return hits
+
+    def query_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Returns the ids of regions overlapping the box."""
+        seen = set()
+        hits = []
+        for cell in _cells_in_box(min_lat, min_lon, max_lat, max_lon, self.cell_deg, self.lon_cells):
+            for region_id in self._cells.get(cell, ()):
+                if region_id in seen:
+                    continue
+                seen.add(region_id)
+                r_min_lat, r_min_lon, r_max_lat, r_max_lon = self._regions[region_id]
+                if r_min_lat <= max_lat and r_max_lat >= min_lat and _lon_ranges_overlap(
+                        r_min_lon, r_max_lon, min_lon, max_lon):
+                    hits.append(region_id)
+        return hits
+
+
+def _lon_ranges_overlap(a_min, a_max, b_min, b_max):
+    return (_lon_in_range(a_min, b_min, b_max) or _lon_in_range(a_max, b_min, b_max) or
+            _lon_in_range(b_min, a_min, a_max) or _lon_in_range(b_max, a_min, a_max))
@@ -1,24 +1,54 @@
 import os
+import re
 import json
+import hashlib
+import threading
 import requests
-import pandas as pd
 from datetime import datetime
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+try:
+    import http_client
+    from quake_poller import location_query_params, QuakePoller, FEED_LOOKBACK_S, get_default_feed
+    from tsunami_rules import RuleTable, build_rule_table, assess_events
+    from tsunami_dataset import load_historical_events
+    from kv_store import get_default_store
+    from tsunami_report import template_analysis, ReportPublisher
+except ImportError:
+    from python import http_client
+    from python.quake_poller import location_query_params, QuakePoller, FEED_LOOKBACK_S, get_default_feed
+    from python.tsunami_rules import RuleTable, build_rule_table, assess_events
+    from python.tsunami_dataset import load_historical_events
+    from python.kv_store import get_default_store
+    from python.tsunami_report import template_analysis, ReportPublisher
+
 # Load environment variables
 load_dotenv(dotenv_path='.env')
 
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("CRITICAL ERROR: GEMINI_API_KEY was not found. Check your .env file.")
-genai.configure(api_key=GEMINI_API_KEY)
+if GEMINI_API_KEY:
+    genai.configure(api_key=GEMINI_API_KEY)
 
 # File paths
 INPUT_CSV_PATH = 'historical_tsunamis.csv'
 OUTPUT_JSON_REPORT_PATH = 'comprehensive_tsunami_report.json'
 
+# Locations main() reports on. All of them are answered from one USGS query
+# (or from the shared feed the refresh scheduler keeps), not one per location.
+TARGET_LOCATIONS = [
+    {"name": "Offshore Honshu, Japan", "lat": 38.322, "lon": 142.369, "radius_km": 500}
+]
+
+# Gemini answers are stored per (event id, event update time, rules hash,
+# prompt version), so re-runs and every location watching the same quake
+# reuse one analysis. Bump GEMINI_PROMPT_VERSION whenever the prompt changes.
+GEMINI_NAMESPACE = "gemini_analysis"
+GEMINI_PROMPT_VERSION = 1
+_gemini_locks = {}
+_gemini_locks_lock = threading.Lock()
+
 # USGS API for real-time earthquakes
 USGS_API_URL_BASE = "https://earthquake.usgs.gov/fdsnws/event/1/query"
 
@@ -30,61 +60,40 @@ REGIONS = {
     "Cascadia Subduction Zone": [-130, 40, -122, 50]
 }
 
-def analyze_historical_data(file_path):
-    """Analyze historical tsunami events to create region-specific risk rules."""
-    try:
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
-        print(f"Error: '{file_path}' not found.")
+def analyze_historical_data(file_path, regions=REGIONS):
+    """
+    Analyze historical tsunami events to create region-specific risk rules.
+    Returns the rules as a list of dicts (see build_risk_table for the
+    vectorized form).
+    """
+    table = build_risk_table(file_path, regions)
+    return None if table is None else table.to_rules()
+
+def build_risk_table(file_path, regions=REGIONS):
+    """
+    Builds the region risk rules as a RuleTable. `regions` maps a name to
+    [min_lon, min_lat, max_lon, max_lat] and may hold thousands of entries.
+    """
+    # Cleaned events come from a binary cache keyed on the CSV's hash,
+    # so pandas only runs when the CSV changes (see tsunami_dataset.py).
+    events = load_historical_events(file_path)
+    if events is None:
         return None
 
-    df.columns = [col.strip().lower() for col in df.columns]
-    column_mapping = {
-        'latitude': 'latitude',
-        'longitude': 'longitude',
-        'earthquake magnitude': 'magnitude',
-        'maximum water height (m)': 'depth',
-        'tsunami event validity': 'tsunami'
-    }
-    df = df.rename(columns=column_mapping)
-
-    required_columns = {'tsunami', 'latitude', 'longitude', 'magnitude', 'depth'}
-    if not required_columns.issubset(df.columns):
-        raise ValueError(f"❌ CSV is missing required columns. Required: {required_columns}")
-
-    df['tsunami'] = pd.to_numeric(df['tsunami'], errors='coerce').fillna(0).astype(int)
-    tsunami_events = df[df['tsunami'] == 1].copy()
-
-    risk_rules = []
-    for region_name, (min_lon, min_lat, max_lon, max_lat) in REGIONS.items():
-        region_df = tsunami_events[
-            (tsunami_events['longitude'] >= min_lon) & (tsunami_events['longitude'] <= max_lon) &
-            (tsunami_events['latitude'] >= min_lat) & (tsunami_events['latitude'] <= max_lat)
-        ]
-        if not region_df.empty:
-            rule = {
-                "region_name": region_name,
-                "bounds": {"min_lon": min_lon, "min_lat": min_lat, "max_lon": max_lon, "max_lat": max_lat},
-                "min_magnitude": round(region_df['magnitude'].min(), 1),
-                "max_depth": round(region_df['depth'].max(), 1)
-            }
-            risk_rules.append(rule)
-    return risk_rules
+    return build_rule_table(
+        events['latitude'],
+        events['longitude'],
+        events['magnitude'],
+        events['depth'],
+        regions
+    )
 
 def fetch_earthquake_for_location(coords):
     """Fetch recent earthquake data near given coordinates."""
-    params = {
-        'format': 'geojson',
-        'latitude': coords['lat'],
-        'longitude': coords['lon'],
-        'maxradiuskm': coords['radius_km'],
-        'minmagnitude': 4.5,
-        'orderby': 'time',
-        'limit': 1
-}
+    params = location_query_params(coords)
 
     try:
-        response = requests.get(USGS_API_URL_BASE, params=params, timeout=15)
+        response = http_client.get(USGS_API_URL_BASE, params=params, timeout=(3.05, 15))
         response.raise_for_status()
         features = response.json().get('features', [])
         return features[0] if features else None
@@ -93,25 +102,58 @@ def fetch_earthquake_for_location(coords):
         return None
 
 def perform_initial_assessment(event, rules):
-    """Assess tsunami risk using historical rules."""
-    lon, lat, depth = event['geometry']['coordinates']
-    mag = event['properties']['mag']
-
-    for rule in rules:
-        b = rule['bounds']
-        if b['min_lon'] <= lon <= b['max_lon'] and b['min_lat'] <= lat <= b['max_lat']:
-            if mag >= rule['min_magnitude'] and depth <= rule['max_depth']:
-                return {
-                    "risk_level": "HIGH",
-                    "reason": f"Matches high-risk profile for {rule['region_name']}."
-                }
-    return {
-        "risk_level": "LOW",
-        "reason": "No match with high-risk regions."
-    }
+    """
+    Assess tsunami risk using historical rules. `rules` may be the list of
+    rule dicts or a RuleTable; use assess_events() to classify many events.
+    """
+    table = rules if isinstance(rules, RuleTable) else RuleTable.from_rules(rules)
+    return assess_events([event], table)[0]
 
-def get_gemini_analysis(earthquake, assessment, rules):
-    """Get expert-like JSON analysis from Gemini."""
+def rules_hash(rules):
+    """Short hash of the rule list, part of the Gemini cache key."""
+    encoded = json.dumps(rules, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def gemini_cache_key(earthquake, rules):
+    """
+    Cache key for an analysis. The assessment is derived from the event and
+    the rules, so it needs no part of its own.
+    """
+    properties = earthquake['properties']
+    updated = properties.get('updated') or properties.get('time')
+    return f"{earthquake.get('id')}:{updated}:{rules_hash(rules)}:v{GEMINI_PROMPT_VERSION}"
+
+def get_gemini_analysis(earthquake, assessment, rules, use_cache=True):
+    """
+    Get expert-like JSON analysis from Gemini, reusing a stored answer for
+    the same event revision, rules and prompt version. Concurrent calls for
+    the same key in this process wait for one request; errors aren't stored.
+    """
+    if not use_cache or not earthquake.get('id'):
+        return request_gemini_analysis(earthquake, assessment, rules)
+
+    key = gemini_cache_key(earthquake, rules)
+    store = get_default_store()
+    with _gemini_locks_lock:
+        lock = _gemini_locks.setdefault(key, threading.Lock())
+
+    try:
+        with lock:
+            cached = store.get(GEMINI_NAMESPACE, key)
+            if cached is not None:
+                return cached
+
+            analysis = request_gemini_analysis(earthquake, assessment, rules)
+            if "error" not in analysis:
+                store.set(GEMINI_NAMESPACE, key, analysis)
+            return analysis
+    finally:
+        # Even when the store fails, so the lock doesn't outlive the call.
+        with _gemini_locks_lock:
+            _gemini_locks.pop(key, None)
+
+def request_gemini_analysis(earthquake, assessment, rules):
+    """Asks Gemini for the analysis (one request, no caching)."""
     prompt = f"""
     You are a senior seismologist and disaster management expert.
 
@@ -145,7 +187,7 @@ def get_gemini_analysis(earthquake, assessment, rules):
     payload = {"contents": [{"parts": [{"text": prompt}]}]}
 
     try:
-        response = requests.post(api_url, headers=headers, data=json.dumps(payload), timeout=30)
+        response = http_client.post(api_url, headers=headers, data=json.dumps(payload), timeout=(3.05, 30), retries=1)
         response.raise_for_status()
         full_text = response.json()['candidates'][0]['content']['parts'][0]['text']
         json_text = full_text.strip().replace("```json", "").replace("```", "").strip()
@@ -153,51 +195,107 @@ def get_gemini_analysis(earthquake, assessment, rules):
     except Exception as e:
         return {"error": f"Gemini response error: {e}"}
 
-def main():
-    print("--- Starting Tsunami Report Generation ---")
+def fetch_earthquakes_for_locations(locations):
+    """
+    Latest significant event near each location, as {name: feature}, like
+    calling fetch_earthquake_for_location for each of them. Uses the shared
+    quake feed when the refresh scheduler keeps it current; otherwise one
+    USGS query covering the same 30-day window is matched to every location
+    locally (see quake_poller.QuakePoller).
+    """
+    feed = get_default_feed()
+    if feed.is_live():
+        events = {loc['name']: feed.latest_near(loc['lat'], loc['lon'], loc['radius_km']) for loc in locations}
+        return {name: event for name, event in events.items() if event}
 
-    target_location = {
-        "name": "Offshore Honshu, Japan",
-        "lat": 38.322,
-        "lon": 142.369,
-        "radius_km": 500
-    }
-    print(f"Monitoring: {target_location['name']}")
+    poller = QuakePoller(first_lookback_s=FEED_LOOKBACK_S)
+    for location in locations:
+        poller.subscribe(location)
+    # The feed is ordered newest first, so each location's first event is its latest.
+    return {name: events[0] for name, events in poller.poll().items()}
 
-    risk_rules = analyze_historical_data(INPUT_CSV_PATH)
-    if not risk_rules:
-        print("No historical rules generated. Exiting.")
-        return
 
-    earthquake = fetch_earthquake_for_location(target_location)
+def location_report_path(location, locations):
+    """OUTPUT_JSON_REPORT_PATH for a single location, one file per location otherwise."""
+    if len(locations) == 1:
+        return OUTPUT_JSON_REPORT_PATH
+    slug = re.sub(r"[^a-z0-9]+", "_", location['name'].lower()).strip("_")
+    return f"tsunami_report_{slug}.json"
+
 
+def publish_location_report(location, earthquake, risk_rules, path):
+    """
+    Publishes one location's report with the template analysis and starts
+    the Gemini enrichment. Returns (publisher, enrichment thread or None).
+    """
     report = {
         "report_generated_utc": datetime.utcnow().isoformat(),
-        "monitoring_location": target_location,
+        "monitoring_location": location,
         "historical_context": {"source_file": INPUT_CSV_PATH, "derived_rules": risk_rules},
         "real_time_event": {},
         "initial_assessment": {},
         "gemini_analysis": {}
     }
+    publisher = ReportPublisher(path)
 
-    if earthquake:
-        print(f"Recent Earthquake: M{earthquake['properties']['mag']} at {earthquake['properties']['place']}")
-        report["real_time_event"] = {
-            "status": "Alert!!! Earthquake Detected",
-            "data": earthquake
-        }
-
-        assessment = perform_initial_assessment(earthquake, risk_rules)
-        report["initial_assessment"] = assessment
-        print(f"Assessment: {assessment['risk_level']} - {assessment['reason']}")
-
-        gemini_result = get_gemini_analysis(earthquake, assessment, risk_rules)
-        report["gemini_analysis"] = gemini_result
-    else:
-        print("No recent significant earthquake detected.")
+    if not earthquake:
+        print(f"{location['name']}: No recent significant earthquake detected.")
         report["real_time_event"] = {"status": "No significant event nearby."}
+        publisher.publish(report)
+        return publisher, None
+
+    print(f"{location['name']}: Recent Earthquake M{earthquake['properties']['mag']} at {earthquake['properties']['place']}")
+    report["real_time_event"] = {
+        "status": "Alert!!! Earthquake Detected",
+        "data": earthquake
+    }
+
+    assessment = perform_initial_assessment(earthquake, risk_rules)
+    report["initial_assessment"] = assessment
+    print(f"Assessment: {assessment['risk_level']} - {assessment['reason']}")
+
+    # Publish the template analysis right away; Gemini's answer replaces
+    # it in a second version of the report when (and if) it arrives.
+    report["gemini_analysis"] = template_analysis(earthquake, assessment)
+    report["analysis_source"] = "template"
+    report["analysis_status"] = "pending" if GEMINI_API_KEY else "template_only"
+    publisher.publish(report)
+    print(f"Report v1 (template analysis) written to {path}")
+
+    if not GEMINI_API_KEY:
+        return publisher, None
+    return publisher, publisher.enrich_async(get_gemini_analysis, earthquake, assessment, risk_rules)
+
+
+def main(locations=None):
+    # Without a key the report still goes out with the template analysis
+    # (python/tsunami_report.py); the key only enables the Gemini enrichment.
+    if not GEMINI_API_KEY:
+        print("Warning: GEMINI_API_KEY was not found; publishing the template analysis only.")
+
+    print("--- Starting Tsunami Report Generation ---")
+
+    locations = locations or TARGET_LOCATIONS
+    print(f"Monitoring: {', '.join(location['name'] for location in locations)}")
+
+    risk_rules = analyze_historical_data(INPUT_CSV_PATH)
+    if not risk_rules:
+        print("No historical rules generated. Exiting.")
+        return
+
+    earthquakes = fetch_earthquakes_for_locations(locations)
+
+    enrichments = []
+    for location in locations:
+        path = location_report_path(location, locations)
+        publisher, enrichment = publish_location_report(location, earthquakes.get(location['name']), risk_rules, path)
+        if enrichment is not None:
+            enrichments.append((path, publisher, enrichment))
+
+    for path, publisher, enrichment in enrichments:
+        enrichment.join()
+        report = publisher.report
+        print(f"Report v{report['report_version']} ({report['analysis_status']}) written to {path}")
 
-    with open(OUTPUT_JSON_REPORT_PATH, 'w') as f:
-        json.dump(report, f, indent=4, sort_keys=True)
 if __name__ == "__main__":
     main()
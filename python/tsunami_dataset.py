@@ -0,0 +1,111 @@
+# tsunami_dataset.py -> cleaned historical tsunami events, cached as a binary .npy file
+import os
+import glob
+import hashlib
+import numpy as np
+
+# Cleaned columns kept from historical_tsunamis.csv.
+EVENT_DTYPE = np.dtype([
+    ('latitude', '<f8'),
+    ('longitude', '<f8'),
+    ('magnitude', '<f8'),
+    ('depth', '<f8')
+])
+
+CACHE_DIR_NAME = ".dataset_cache"
+
+
+def file_sha256(path):
+    """Returns the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path_for(csv_path, csv_hash):
+    """Cache file for one version of the CSV: <dir>/.dataset_cache/<name>.<hash>.npy"""
+    directory = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR_NAME)
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(directory, f"{name}.{csv_hash[:16]}.npy")
+
+
+def parse_historical_csv(csv_path):
+    """
+    Parses the NOAA CSV with pandas and returns the valid tsunami events
+    (Tsunami Event Validity == 1) as a structured array of EVENT_DTYPE.
+    """
+    # pandas is only needed when the CSV changed, so import it here.
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df.columns = [col.strip().lower() for col in df.columns]
+    column_mapping = {
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+        'earthquake magnitude': 'magnitude',
+        'maximum water height (m)': 'depth',
+        'tsunami event validity': 'tsunami'
+    }
+    df = df.rename(columns=column_mapping)
+
+    required_columns = {'tsunami', 'latitude', 'longitude', 'magnitude', 'depth'}
+    if not required_columns.issubset(df.columns):
+        raise ValueError(f"❌ CSV is missing required columns. Required: {required_columns}")
+
+    df['tsunami'] = pd.to_numeric(df['tsunami'], errors='coerce').fillna(0).astype(int)
+    tsunami_events = df[df['tsunami'] == 1]
+
+    events = np.empty(len(tsunami_events), dtype=EVENT_DTYPE)
+    for column in EVENT_DTYPE.names:
+        events[column] = pd.to_numeric(tsunami_events[column], errors='coerce').to_numpy(dtype=float)
+    return events
+
+
+def build_cache(csv_path, csv_hash=None):
+    """
+    Parses the CSV and writes the cleaned events next to it. Older cache
+    files for the same CSV are removed. Returns the cache file path.
+    """
+    csv_hash = csv_hash or file_sha256(csv_path)
+    target = cache_path_for(csv_path, csv_hash)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    events = parse_historical_csv(csv_path)
+
+    # Write to a temp file and rename so readers never see a partial file.
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, events)
+    os.replace(tmp_path, target)
+
+    stale_pattern = target.rsplit('.', 2)[0] + ".*.npy"
+    for old in glob.glob(stale_pattern):
+        if old != target:
+            os.remove(old)
+    return target
+
+
+def load_historical_events(csv_path):
+    """
+    Returns the cleaned events as a read-only, memory-mapped structured array.
+    The CSV is only re-parsed when its SHA-256 no longer matches the cache.
+    Returns None if the CSV does not exist.
+    """
+    if not os.path.exists(csv_path):
+        print(f"Error: '{csv_path}' not found.")
+        return None
+
+    csv_hash = file_sha256(csv_path)
+    target = cache_path_for(csv_path, csv_hash)
+    if not os.path.exists(target):
+        build_cache(csv_path, csv_hash)
+    return np.load(target, mmap_mode='r')
+
+
+if __name__ == "__main__":
+    # Build step: python tsunami_dataset.py [path/to/historical_tsunamis.csv]
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else 'historical_tsunamis.csv'
+    print(f"Wrote {build_cache(path)}")
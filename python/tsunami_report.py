@@ -0,0 +1,119 @@
+# tsunami_report.py -> instant template analysis, published first and enriched by Gemini later
+import os
+import json
+import threading
+from datetime import datetime
+
+STRONG_MAGNITUDE = 7.5   # Shaking strong enough to warn about damage on its own
+SHALLOW_DEPTH_KM = 70    # Shallow events are the ones that displace the sea floor
+
+
+def template_analysis(earthquake, assessment):
+    """
+    Builds the same {"summary", "alerts", "suggestions"} shape Gemini is asked
+    for, from the event and the initial assessment alone. Pure string
+    formatting, so it is ready in microseconds.
+    """
+    properties = earthquake['properties']
+    mag = properties.get('mag')
+    place = properties.get('place') or "an unknown location"
+    depth = earthquake['geometry']['coordinates'][2]
+    when = datetime.utcfromtimestamp(properties['time'] / 1000).strftime('%Y-%m-%d %H:%M UTC')
+    shallow = depth is not None and depth <= SHALLOW_DEPTH_KM
+    strong = mag is not None and mag >= STRONG_MAGNITUDE
+
+    if assessment['risk_level'] == "HIGH":
+        summary = (f"M{mag} earthquake {place} at {depth:.0f} km depth ({when}): "
+                   f"{assessment['reason']} A tsunami is possible.")
+        alerts = [
+            "Possible tsunami: move away from beaches, harbours and low-lying coastal areas now.",
+            "Deep-ocean (DART) buoys near the epicentre should be checked to confirm whether a wave was generated."
+        ]
+        suggestions = [
+            "Follow the bulletins of the regional tsunami warning centre and local authorities.",
+            "Stay on high ground until officials give the all-clear; the first wave is often not the largest.",
+            "Keep monitoring tide gauges and DART stations for the next few hours."
+        ]
+    else:
+        summary = (f"M{mag} earthquake {place} at {depth:.0f} km depth ({when}): "
+                   f"{assessment['reason']} A damaging tsunami is unlikely.")
+        alerts = [
+            "No tsunami threat expected from historical patterns for this area.",
+            "DART buoy readings should still be reviewed to rule out an unexpected wave."
+        ]
+        suggestions = [
+            "Watch official sources for any change in the assessment.",
+            "Check for aftershocks and local damage reports."
+        ]
+
+    if strong:
+        alerts.append(f"M{mag} is strong enough to cause damage near the epicentre; expect aftershocks.")
+    if shallow and assessment['risk_level'] == "HIGH":
+        suggestions.append("Shallow rupture: coastal areas closest to the epicentre have the least warning time.")
+
+    return {"summary": summary, "alerts": alerts, "suggestions": suggestions}
+
+
+def write_report(report, path):
+    """Writes the report atomically, so readers never see a half-written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class ReportPublisher:
+    """
+    Publishes a report straight away with the template analysis and merges
+    the slower LLM analysis in when it arrives, bumping "report_version" and
+    re-publishing. If the LLM fails, the template analysis stays and the
+    error is recorded under "gemini_error".
+    """
+
+    def __init__(self, path, writer=write_report):
+        self.path = path
+        self.writer = writer
+        self._lock = threading.Lock()
+        self.report = None
+
+    def publish(self, report):
+        with self._lock:
+            return self._publish_locked(report)
+
+    def _publish_locked(self, report):
+        report["report_version"] = report.get("report_version", 0) + 1
+        report["report_published_utc"] = datetime.utcnow().isoformat()
+        self.report = report
+        self.writer(report, self.path)
+        return report["report_version"]
+
+    def merge_analysis(self, analysis):
+        """Merges an LLM result into the published report and re-publishes it."""
+        with self._lock:
+            # A copy, so the dict handed out as the previous version never
+            # changes after it was written.
+            report = dict(self.report)
+            if "error" in analysis:
+                report["gemini_error"] = analysis["error"]
+                report["analysis_status"] = "template_only"
+            else:
+                report["gemini_analysis"] = analysis
+                report["analysis_source"] = "gemini"
+                report["analysis_status"] = "complete"
+            return self._publish_locked(report)
+
+    def enrich_async(self, fn, *args):
+        """
+        Runs fn(*args) (e.g. get_gemini_analysis) on a background thread and
+        merges its result. Returns the thread so a script can join() it.
+        """
+        def run():
+            try:
+                analysis = fn(*args)
+            except Exception as e:
+                analysis = {"error": f"Gemini response error: {e}"}
+            self.merge_analysis(analysis)
+
+        thread = threading.Thread(target=run, name="report-enrichment")
+        thread.start()
+        return thread
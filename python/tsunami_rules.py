@@ -0,0 +1,153 @@
+# tsunami_rules.py -> vectorized region risk rules for tsunami assessment
+import numpy as np
+
+# Regions are matched against events in blocks of this many so the
+# (regions x events) masks stay small even with thousands of regions.
+REGION_BLOCK_SIZE = 512
+
+
+class RuleTable:
+    """
+    Region risk rules stored column-wise as NumPy arrays, so a whole batch of
+    earthquakes can be classified with one vectorized call.
+
+    Row i describes one region: its bounding box, the smallest magnitude that
+    produced a tsunami there, and the largest 'depth' seen there.
+    """
+
+    def __init__(self, names, min_lon, min_lat, max_lon, max_lat, min_magnitude, max_depth):
+        self.names = list(names)
+        self.min_lon = np.asarray(min_lon, dtype=float)
+        self.min_lat = np.asarray(min_lat, dtype=float)
+        self.max_lon = np.asarray(max_lon, dtype=float)
+        self.max_lat = np.asarray(max_lat, dtype=float)
+        self.min_magnitude = np.asarray(min_magnitude, dtype=float)
+        self.max_depth = np.asarray(max_depth, dtype=float)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_rules(cls, rules):
+        """Builds a table from the list-of-dicts format used in the reports."""
+        return cls(
+            [r["region_name"] for r in rules],
+            [r["bounds"]["min_lon"] for r in rules],
+            [r["bounds"]["min_lat"] for r in rules],
+            [r["bounds"]["max_lon"] for r in rules],
+            [r["bounds"]["max_lat"] for r in rules],
+            [r["min_magnitude"] for r in rules],
+            [r["max_depth"] for r in rules]
+        )
+
+    def to_rules(self):
+        """Returns the rules in the list-of-dicts format used in the reports."""
+        rules = []
+        for i, name in enumerate(self.names):
+            rules.append({
+                "region_name": name,
+                "bounds": {
+                    "min_lon": float(self.min_lon[i]),
+                    "min_lat": float(self.min_lat[i]),
+                    "max_lon": float(self.max_lon[i]),
+                    "max_lat": float(self.max_lat[i])
+                },
+                "min_magnitude": float(self.min_magnitude[i]),
+                "max_depth": float(self.max_depth[i])
+            })
+        return rules
+
+    def match(self, lons, lats, mags, depths):
+        """
+        Returns, for each event, the index of the first rule it matches
+        (inside the box, magnitude >= min_magnitude, depth <= max_depth),
+        or -1 if it matches none.
+        """
+        lons = np.asarray(lons, dtype=float)[:, None]
+        lats = np.asarray(lats, dtype=float)[:, None]
+        mags = np.asarray(mags, dtype=float)[:, None]
+        depths = np.asarray(depths, dtype=float)[:, None]
+
+        result = np.full(lons.shape[0], -1, dtype=np.int64)
+        for start in range(0, len(self), REGION_BLOCK_SIZE):
+            block = slice(start, start + REGION_BLOCK_SIZE)
+            hits = (
+                (lons >= self.min_lon[block]) & (lons <= self.max_lon[block]) &
+                (lats >= self.min_lat[block]) & (lats <= self.max_lat[block]) &
+                (mags >= self.min_magnitude[block]) & (depths <= self.max_depth[block])
+            )
+            found = hits.any(axis=1) & (result < 0)
+            result[found] = hits[found].argmax(axis=1) + start
+        return result
+
+
+def build_rule_table(latitude, longitude, magnitude, depth, regions):
+    """
+    Derives one rule per region from historical tsunami events.
+
+    `regions` maps a region name to [min_lon, min_lat, max_lon, max_lat].
+    Regions without any historical event are left out, and NaN magnitudes or
+    depths are ignored (like pandas' min/max).
+    """
+    latitude = np.asarray(latitude, dtype=float)
+    longitude = np.asarray(longitude, dtype=float)
+    magnitude = np.asarray(magnitude, dtype=float)
+    depth = np.asarray(depth, dtype=float)
+
+    names = list(regions)
+    if not names:
+        return RuleTable([], [], [], [], [], [], [])
+    bounds = np.asarray([regions[name] for name in names], dtype=float).reshape(-1, 4)
+
+    keep, min_mags, max_depths = [], [], []
+    for start in range(0, len(names), REGION_BLOCK_SIZE):
+        b = bounds[start:start + REGION_BLOCK_SIZE]
+        inside = (
+            (longitude >= b[:, 0:1]) & (longitude <= b[:, 2:3]) &
+            (latitude >= b[:, 1:2]) & (latitude <= b[:, 3:4])
+        )
+        mag_ok = inside & ~np.isnan(magnitude)
+        depth_ok = inside & ~np.isnan(depth)
+
+        block_min = np.where(mag_ok, magnitude, np.inf).min(axis=1, initial=np.inf)
+        block_max = np.where(depth_ok, depth, -np.inf).max(axis=1, initial=-np.inf)
+
+        keep.append(inside.any(axis=1))
+        min_mags.append(np.where(mag_ok.any(axis=1), block_min, np.nan))
+        max_depths.append(np.where(depth_ok.any(axis=1), block_max, np.nan))
+
+    keep = np.concatenate(keep)
+    bounds = bounds[keep]
+    return RuleTable(
+        [name for name, k in zip(names, keep) if k],
+        bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3],
+        np.round(np.concatenate(min_mags)[keep], 1),
+        np.round(np.concatenate(max_depths)[keep], 1)
+    )
+
+
+def assess_events(events, table):
+    """
+    Classifies a batch of USGS GeoJSON features in one call.
+    Returns one {"risk_level", "reason"} dict per event, in order.
+    """
+    if not events:
+        return []
+
+    coords = np.asarray([e['geometry']['coordinates'][:3] for e in events], dtype=float)
+    mags = np.asarray([e['properties']['mag'] for e in events], dtype=float)
+    matches = table.match(coords[:, 0], coords[:, 1], mags, coords[:, 2])
+
+    assessments = []
+    for rule_index in matches:
+        if rule_index >= 0:
+            assessments.append({
+                "risk_level": "HIGH",
+                "reason": f"Matches high-risk profile for {table.names[rule_index]}."
+            })
+        else:
+            assessments.append({
+                "risk_level": "LOW",
+                "reason": "No match with high-risk regions."
+            })
+    return assessments
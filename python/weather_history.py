@@ -0,0 +1,253 @@
+# weather_history.py -> per-location weather time series with 1m/1h/1d rollups on SQLite (WAL mode)
+import os
+import time
+import sqlite3
+import threading
+import numpy as np
+
+DEFAULT_DB_PATH = os.getenv(
+    "WEATHER_HISTORY_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "weather_history.sqlite3")
+)
+
+METRICS = ("temp", "pressure", "wind_speed", "wind_gust", "humidity", "pop")
+STATS = ("mean", "min", "max")
+
+RAW_DTYPE = np.dtype([("time", "f8")] + [(m, "f4") for m in METRICS])
+ROLLUP_DTYPE = np.dtype(
+    [("time", "f8"), ("count", "u4")] + [(f"{m}_{s}", "f4") for m in METRICS for s in STATS]
+)
+
+# level -> (bucket seconds, retention seconds or None to keep forever)
+LEVELS = {
+    "raw": (0, 2 * 86400),
+    "1m": (60, 14 * 86400),
+    "1h": (3600, 400 * 86400),
+    "1d": (86400, None)
+}
+MAX_QUERY_POINTS = 2000   # query() picks the finest level that stays under this
+PRUNE_INTERVAL_S = 3600   # How often append() drops rows past their level's retention
+
+_RAW_COLUMNS = ", ".join(METRICS)
+_ROLLUP_COLUMNS = ", ".join(f"n_{m}, sum_{m}, min_{m}, max_{m}" for m in METRICS)
+
+# Folds one sample into its bucket. A missing metric adds n=0, sum=0 and
+# NULL min/max; min()/max() return NULL when either side is NULL, hence the
+# coalesce() back to whichever side is set.
+_ROLLUP_UPSERT = f"""
+    INSERT INTO rollups (location, level, time, count, {_ROLLUP_COLUMNS})
+    VALUES (?, ?, ?, 1, {", ".join("?" for _ in range(4 * len(METRICS)))})
+    ON CONFLICT (location, level, time) DO UPDATE SET
+        count = count + 1,
+        {", ".join(
+            f"n_{m} = n_{m} + excluded.n_{m}, "
+            f"sum_{m} = sum_{m} + excluded.sum_{m}, "
+            f"min_{m} = coalesce(min(min_{m}, excluded.min_{m}), min_{m}, excluded.min_{m}), "
+            f"max_{m} = coalesce(max(max_{m}, excluded.max_{m}), max_{m}, excluded.max_{m})"
+            for m in METRICS
+        )}
+"""
+
+_ROLLUP_SELECT = "SELECT time, count, " + ", ".join(
+    f"sum_{m} / nullif(n_{m}, 0), min_{m}, max_{m}" for m in METRICS
+) + " FROM rollups WHERE location = ? AND level = ? AND time >= ? AND time < ? ORDER BY time"
+
+
+def _to_rows(records, dtype):
+    # SQLite NULL -> NaN in the float32 metric columns.
+    nan = float("nan")
+    return np.array([tuple(nan if v is None else v for v in record) for record in records], dtype=dtype)
+
+
+class TimeSeriesStore:
+    """
+    Per-location weather metrics (METRICS). Every raw sample is also folded
+    into 1-minute, 1-hour and 1-day mean/min/max rollups, and each level only
+    keeps its own retention window, so months of history stay small.
+
+    Each append is one SQLite transaction (the raw row plus an upsert per
+    rollup bucket), so it is durable as soon as append() returns and is
+    visible to every other process on the host: the refresh scheduler writes
+    while the Flask workers serve /api/weather-history. Queries return NumPy
+    structured arrays read through the (location, time) primary keys.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, prune_interval=PRUNE_INTERVAL_S):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._last_prune = time.time()
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: append() opens its own BEGIN IMMEDIATE transaction.
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS raw (
+                    location TEXT NOT NULL,
+                    time REAL NOT NULL,
+                    {", ".join(f"{m} REAL" for m in METRICS)},
+                    PRIMARY KEY (location, time)
+                ) WITHOUT ROWID
+            """)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS rollups (
+                    location TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    time REAL NOT NULL,
+                    count INTEGER NOT NULL,
+                    {", ".join(f"n_{m} INTEGER NOT NULL, sum_{m} REAL NOT NULL, min_{m} REAL, max_{m} REAL"
+                               for m in METRICS)},
+                    PRIMARY KEY (location, level, time)
+                ) WITHOUT ROWID
+            """)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def location_key(lat, lon):
+        return f"{round(float(lat), 4):.4f}_{round(float(lon), 4):.4f}"
+
+    def append(self, lat, lon, ts, values):
+        """
+        Records one sample: `values` maps metric name to a number (missing
+        metrics are stored as NULL). Samples not newer than the last one for
+        the location are ignored, so the same snapshot can be offered twice,
+        even by two processes. Returns True if the sample was stored.
+        """
+        key = self.location_key(lat, lon)
+        row = [values.get(m) for m in METRICS]
+        rollup_values = []
+        for value in row:
+            present = value is not None
+            rollup_values.extend((int(present), value if present else 0.0, value, value))
+
+        conn = self._connect()
+        # IMMEDIATE takes the write lock up front, so the "newer than the
+        # last sample" check and the inserts cannot interleave with another
+        # writer's.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            last = conn.execute("SELECT MAX(time) FROM raw WHERE location = ?", (key,)).fetchone()[0]
+            if last is not None and ts <= last:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                f"INSERT INTO raw (location, time, {_RAW_COLUMNS}) VALUES (?, ?, {', '.join('?' for _ in METRICS)})",
+                (key, ts, *row)
+            )
+            for level, (bucket, _) in LEVELS.items():
+                if bucket:
+                    conn.execute(_ROLLUP_UPSERT, (key, level, ts - ts % bucket, *rollup_values))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        if time.time() - self._last_prune > self.prune_interval:
+            self.prune()
+        return True
+
+    def prune(self, now=None):
+        """Drops rows older than their level's retention window."""
+        now = time.time() if now is None else now
+        self._last_prune = now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for level, (_, retention) in LEVELS.items():
+                if retention is None:
+                    continue
+                if level == "raw":
+                    conn.execute("DELETE FROM raw WHERE time < ?", (now - retention,))
+                else:
+                    conn.execute("DELETE FROM rollups WHERE level = ? AND time < ?", (level, now - retention))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def query(self, lat, lon, start, end, level=None):
+        """
+        Returns (level, rows) for start <= time < end, where rows is a NumPy
+        structured array (RAW_DTYPE for "raw", ROLLUP_DTYPE otherwise). With
+        no level given, picks the finest one that still covers `start` and
+        returns at most about MAX_QUERY_POINTS rows. Rollup rows include the
+        bucket still in progress.
+        """
+        if level is None:
+            level = self.pick_level(start, end)
+        key = self.location_key(lat, lon)
+        conn = self._connect()
+        if level == "raw":
+            records = conn.execute(
+                f"SELECT time, {_RAW_COLUMNS} FROM raw WHERE location = ? AND time >= ? AND time < ? ORDER BY time",
+                (key, start, end)
+            ).fetchall()
+            return level, _to_rows(records, RAW_DTYPE)
+        records = conn.execute(_ROLLUP_SELECT, (key, level, start, end)).fetchall()
+        return level, _to_rows(records, ROLLUP_DTYPE)
+
+    @staticmethod
+    def pick_level(start, end, now=None):
+        now = time.time() if now is None else now
+        for level, (bucket, retention) in LEVELS.items():
+            covers = retention is None or now - start <= retention
+            # Raw samples arrive every few minutes; count them as 5-minute points.
+            points = (end - start) / (bucket or 300)
+            if covers and points <= MAX_QUERY_POINTS:
+                return level
+        return "1d"
+
+
+def rows_to_columns(rows):
+    """Structured rows -> {field: list}, with NaN as None, for JSON responses."""
+    columns = {}
+    for name in rows.dtype.names:
+        # float32 metrics are rounded so 0.2 doesn't come back as 0.2000000029.
+        values = rows[name].astype(float) if name == "time" else np.round(rows[name].astype(float), 4)
+        columns[name] = [None if np.isnan(v) else v for v in values.tolist()]
+    return columns
+
+
+def onecall_metrics(data):
+    """
+    Extracts (time, {metric: value}) from a One Call payload. `pop` (chance
+    of precipitation) comes from today's daily forecast.
+    """
+    current = data["current"]
+    daily = data.get("daily") or [{}]
+    return current["dt"], {
+        "temp": current.get("temp"),
+        "pressure": current.get("pressure"),
+        "wind_speed": current.get("wind_speed"),
+        "wind_gust": current.get("wind_gust"),
+        "humidity": current.get("humidity"),
+        "pop": daily[0].get("pop")
+    }
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_default_store():
+    """Returns the process-wide store at WEATHER_HISTORY_DB_PATH, opening it on first use."""
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = TimeSeriesStore()
+    return _default_store
+
+
+def record_onecall(lat, lon, data):
+    """Appends the 'current' block of a One Call payload to the default store."""
+    if not data or "current" not in data:
+        return False
+    ts, values = onecall_metrics(data)
+    return get_default_store().append(lat, lon, ts, values)
@@ -0,0 +1,134 @@
+# weather_snapshot.py -> one shared One Call fetch per location per time bucket
+import os
+import time
+import threading
+
+try:
+    import http_client
+    import weather_history
+except ImportError:
+    from python import http_client
+    from python import weather_history
+
+ONECALL_URL = "https://api.openweathermap.org/data/3.0/onecall"
+
+# Superset of the blocks our analyzers read: current, daily and alerts.
+SNAPSHOT_EXCLUDE = "minutely,hourly"
+SNAPSHOT_BUCKET_SECONDS = 300  # One upstream call per location every 5 minutes
+REQUEST_TIMEOUT_S = (3.05, 10)  # (connect, read)
+
+# Blocks stripped out when a caller only wants the "current" view.
+FORECAST_BLOCKS = ("minutely", "hourly", "daily", "alerts")
+
+_snapshots = {}
+_fetch_locks = {}
+_lock = threading.Lock()
+
+
+def snapshot_key(lat, lon, now=None):
+    """
+    Returns the cache key for a location: rounded coordinates plus the
+    current time bucket.
+    """
+    now = time.time() if now is None else now
+    return (round(float(lat), 4), round(float(lon), 4), int(now // SNAPSHOT_BUCKET_SECONDS))
+
+
+def _fetch_onecall(lat, lon, api_key):
+    params = {
+        'lat': lat,
+        'lon': lon,
+        'exclude': SNAPSHOT_EXCLUDE,
+        'appid': api_key,
+        'units': 'metric'
+    }
+    response = http_client.get(ONECALL_URL, params=params, timeout=REQUEST_TIMEOUT_S)
+    response.raise_for_status()
+    return response.json()
+
+
+def _record_history(lat, lon, data):
+    # Every fresh payload also feeds the per-location time series. A failing
+    # history write must never fail the fetch itself.
+    try:
+        weather_history.record_onecall(lat, lon, data)
+    except Exception as e:
+        print(f"Error recording weather history: {e}")
+
+
+def _evict_old_buckets(current_bucket):
+    # Called with _lock held. Anything from an earlier bucket is stale.
+    for key in [k for k in _snapshots if k[2] < current_bucket]:
+        del _snapshots[key]
+        _fetch_locks.pop(key, None)
+
+
+def get_weather_snapshot(lat, lon, api_key=None):
+    """
+    Returns the full One Call payload for a location, fetching it at most once
+    per time bucket. Concurrent callers for the same key wait for the first
+    fetch instead of issuing their own.
+
+    Raises the underlying requests exceptions so callers keep their own
+    error handling. Inside an http_client.deadline() block, waiting for
+    another thread's fetch is bounded by the same deadline.
+    """
+    api_key = api_key or os.getenv("OPEN_WEATHER_API_KEY")
+    key = snapshot_key(lat, lon)
+
+    with _lock:
+        data = _snapshots.get(key)
+        if data is not None:
+            return data
+        fetch_lock = _fetch_locks.setdefault(key, threading.Lock())
+
+    remaining = http_client.remaining_time()
+    if not fetch_lock.acquire(timeout=-1 if remaining is None else max(remaining, 0)):
+        raise http_client.DeadlineExceeded("Timed out waiting for another fetch of this location")
+    try:
+        # Another thread may have filled the slot while we were waiting.
+        data = _snapshots.get(key)
+        if data is not None:
+            return data
+
+        data = _fetch_onecall(lat, lon, api_key)
+        _record_history(lat, lon, data)
+        with _lock:
+            _evict_old_buckets(key[2])
+            _snapshots[key] = data
+        return data
+    finally:
+        fetch_lock.release()
+
+
+def peek_snapshot(lat, lon):
+    """Returns the cached payload for the current bucket without fetching, or None."""
+    with _lock:
+        return _snapshots.get(snapshot_key(lat, lon))
+
+
+def store_snapshot(lat, lon, data):
+    """
+    Stores a payload fetched elsewhere (e.g. by the async client) so the
+    sync analyzers can reuse it for the rest of the bucket.
+    """
+    key = snapshot_key(lat, lon)
+    _record_history(lat, lon, data)
+    with _lock:
+        _evict_old_buckets(key[2])
+        _snapshots[key] = data
+
+
+def current_view(data):
+    """
+    Returns the payload as if it had been fetched with only the 'current'
+    block (the shape fetch_current_ep has always returned).
+    """
+    return {k: v for k, v in data.items() if k not in FORECAST_BLOCKS}
+
+
+def clear_snapshots():
+    """Drops every cached snapshot."""
+    with _lock:
+        _snapshots.clear()
+        _fetch_locks.clear()
@@ -4,16 +4,15 @@ from dotenv import load_dotenv
 import os
 from datetime import datetime
 
-# Assuming get_coordinates is in a file named app.py in the same directory.
-# If it's not, you might need to adjust the import.
+# Shared One Call snapshot: one upstream fetch per location per time bucket.
 try:
-    from app import get_coordinates
+    from weather_snapshot import get_weather_snapshot, current_view
+    from cyclone_detector import apply_trend_analysis
+    from advice_rules import default_engine as advice_engine
 except ImportError:
-    print("Warning: 'app.py' not found. You'll need to provide coordinates manually.")
-    # Define a dummy function if app.py is not available
-    def get_coordinates():
-        print("Please implement the get_coordinates function.")
-        return None, None
+    from python.weather_snapshot import get_weather_snapshot, current_view
+    from python.cyclone_detector import apply_trend_analysis
+    from python.advice_rules import default_engine as advice_engine
 
 # --- Constants for Severe Weather Analysis ---
 WIND_SPEED_THRESHOLD_MS = 33  # 33 m/s = ~119 km/h, Category 1 storm
@@ -36,14 +35,9 @@ def fetch_current_ep(lat, lon):
         print("Error: OPEN_WEATHER_API_KEY not found in environment variables.")
         return None
 
-    exclude_parts = "minutely,hourly,daily,alerts"
-    url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude={exclude_parts}&appid={api_key}&units=metric"
-    
     try:
-        response = requests.get(url)
-        response.raise_for_status()  
-        data = response.json()
-        return data
+        data = get_weather_snapshot(lat, lon, api_key)
+        return current_view(data)
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
     except requests.exceptions.RequestException as req_err:
@@ -104,85 +98,71 @@ def display_weather(data):
 def generate_weather_advice(current_weather, daily_forecast):
     """
     Generates human-readable advice based on weather data.
-    This acts as our 'AI' logic.
+    The rules live in python/advice_rules.py; build_advice_reports() runs
+    them for a whole batch of locations in one pass.
     """
-    advice = []
-    
-    # Extract key metrics for decision making
-    uvi = current_weather.get('uvi', 0)
-    pop = daily_forecast.get('pop', 0) * 100  # Probability of precipitation
-    day_temp = daily_forecast.get('temp', {}).get('day', 0)
-    weather_condition = daily_forecast.get('weather', [{}])[0].get('main', '')
-
-    # Advice based on UV Index
-    if uvi > 7:
-        advice.append(f"The UV index is high ({uvi}). Wear sunscreen and sunglasses if you'll be outside for a while.")
-    elif uvi > 2:
-        advice.append(f"The UV index is moderate ({uvi}). It's still a good idea to protect your skin.")
-
-    # Advice based on precipitation
-    if pop > 60:
-        advice.append(f"There's a high chance of rain today ({pop:.0f}%). Don't forget your umbrella!")
-    elif pop > 30:
-        advice.append(f"There's a slight chance of rain ({pop:.0f}%). It might be a good idea to take an umbrella just in case.")
-
-    # Advice based on temperature
-    if day_temp > 32:
-        advice.append(f"It's going to be very hot, around {day_temp}°C. Stay hydrated and avoid strenuous activity during peak hours.")
-    
-    # Advice based on general weather conditions
-    if weather_condition == "Thunderstorm":
-        advice.append("Thunderstorms are expected. It's best to stay indoors and avoid open areas.")
-    elif weather_condition == "Clear":
-        advice.append("Expect clear skies today, a perfect day for outdoor activities!")
-    elif weather_condition in ["Rain", "Drizzle"]:
-        advice.append("Rain is expected. Wear waterproof clothing if you plan to be outside.")
+    return advice_engine.advise(current_weather, daily_forecast)
 
-    # Default message if no other advice fits
-    if not advice:
-        advice.append("Weather conditions seem stable today. Enjoy your day!")
 
-    return advice
+def build_advice_report(data, lat, lon, advice=None):
+    """
+    Builds the assistant report (advice + key metrics) from a One Call payload.
+    `advice` is used as-is when the caller already computed it.
+    Raises KeyError/IndexError if the payload has no daily forecast.
+    """
+    current_data = data.get('current', {})
+    today_daily_data = data['daily'][0]
+
+    advice_list = generate_weather_advice(current_data, today_daily_data) if advice is None else advice
+    friendly_summary = today_daily_data.get('summary', "A general weather overview for the day.")
+
+    assistant_output = {
+        "location": {
+            "latitude": lat,
+            "longitude": lon,
+            "timezone": data.get('timezone', 'N/A')
+        },
+        "assistant_report": {
+            "generated_at_utc": datetime.utcfromtimestamp(current_data.get('dt')).isoformat() + 'Z',
+            "friendly_summary": friendly_summary,
+            "advice": advice_list,
+            "key_metrics": {
+                "current_temp_celsius": current_data.get('temp'),
+                "current_condition": current_data.get('weather', [{}])[0].get('description', 'N/A').title(),
+                "chance_of_rain_percent": today_daily_data.get('pop', 0) * 100,
+                "max_temp_celsius": today_daily_data.get('temp', {}).get('max'),
+                "min_temp_celsius": today_daily_data.get('temp', {}).get('min')
+            }
+        }
+    }
+    return assistant_output
 
+def build_advice_reports(snapshots):
+    """
+    build_advice_report for a list of (data, lat, lon), with the advice for
+    all of them from one advice_engine.advise_many pass. A payload that is
+    missing or cannot be parsed gets None.
+    """
+    usable = [i for i, (data, _, _) in enumerate(snapshots) if data and data.get('daily')]
+    advice = advice_engine.advise_many(
+        [(snapshots[i][0].get('current', {}), snapshots[i][0]['daily'][0]) for i in usable]
+    )
+    reports = [None] * len(snapshots)
+    for i, advice_list in zip(usable, advice):
+        data, lat, lon = snapshots[i]
+        try:
+            reports[i] = build_advice_report(data, lat, lon, advice=advice_list)
+        except (KeyError, IndexError, TypeError):
+            print("Error: Could not parse the weather data from the API response.")
+    return reports
 
 def fetch_and_generate_advice(lat, lon, api_key):
     """
     Fetches weather data, generates advice, and returns it as a JSON object.
     """
-    exclude_parts = "minutely,hourly,alerts"
-    url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude={exclude_parts}&appid={api_key}&units=metric"
-
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        current_data = data.get('current', {})
-        today_daily_data = data['daily'][0]
-
-        advice_list = generate_weather_advice(current_data, today_daily_data)
-        friendly_summary = today_daily_data.get('summary', "A general weather overview for the day.")
-
-        assistant_output = {
-            "location": {
-                "latitude": lat,
-                "longitude": lon,
-                "timezone": data.get('timezone', 'N/A')
-            },
-            "assistant_report": {
-                "generated_at_utc": datetime.utcfromtimestamp(current_data.get('dt')).isoformat() + 'Z',
-                "friendly_summary": friendly_summary,
-                "advice": advice_list,
-                "key_metrics": {
-                    "current_temp_celsius": current_data.get('temp'),
-                    "current_condition": current_data.get('weather', [{}])[0].get('description', 'N/A').title(),
-                    "chance_of_rain_percent": today_daily_data.get('pop', 0) * 100,
-                    "max_temp_celsius": today_daily_data.get('temp', {}).get('max'),
-                    "min_temp_celsius": today_daily_data.get('temp', {}).get('min')
-                }
-            }
-        }
-        return assistant_output
+        data = get_weather_snapshot(lat, lon, api_key)
+        return build_advice_report(data, lat, lon)
 
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
@@ -193,33 +173,20 @@ def fetch_and_generate_advice(lat, lon, api_key):
     
     return None
 
-def monitor_and_analyze_severe_weather(lat, lon, api_key):
-    """
-    Fetches weather data and analyzes it for severe conditions (cyclones)
-    in a clear, hierarchical order. Returns the final analysis as a JSON object.
-    """
-    # 1. Initialize the report structure. This will be updated as we go.
-    analysis_report = {
+def new_severe_weather_report(lat, lon):
+    """Returns an empty severe-weather report with status UNKNOWN."""
+    return {
         "timestamp_utc": datetime.utcnow().isoformat() + 'Z',
         "monitoring_location": {"latitude": lat, "longitude": lon},
         "status": "UNKNOWN", # Default status
         "details": {}
     }
 
-    base_url = "https://api.openweathermap.org/data/3.0/onecall"
-    params = {'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric'}
-    
-    # 2. Fetch data from the API. If it fails, update the report and return immediately.
-    try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-    except requests.exceptions.RequestException as e:
-        analysis_report["status"] = "API_ERROR"
-        analysis_report["details"]["message"] = f"API request failed: {e}"
-        # This is the final report in case of an API error.
-        return analysis_report
-        
+def analyze_severe_weather(data, analysis_report):
+    """
+    Fills in the severe-weather report (steps 3-5 below) from a One Call
+    payload and returns it.
+    """
     # 3. Check for official alerts first. This has the highest priority.
     if 'alerts' in data:
         for alert in data['alerts']:
@@ -254,54 +221,78 @@ def monitor_and_analyze_severe_weather(lat, lon, api_key):
     else:
         analysis_report["status"] = "CLEAR"
         analysis_report["details"]["message"] = "No immediate cyclone indicators found in current conditions."
-        
-    # 5. This is the final report based on the analysis of current conditions.
+
+    # 5. Trends over the last few hours (pressure tendency, wind acceleration,
+    #    gusts) can raise the status before the fixed thresholds are crossed.
+    apply_trend_analysis(analysis_report, current_weather, WIND_SPEED_THRESHOLD_MS, PRESSURE_THRESHOLD_HPA)
+
+    # 6. This is the final report based on the analysis of current conditions.
     return analysis_report
 
-def fetch_weather_summary(lat, lon, api_key):
+def monitor_and_analyze_severe_weather(lat, lon, api_key):
     """
-    Fetches and structures a weather summary for today and tomorrow.
+    Fetches weather data and analyzes it for severe conditions (cyclones)
+    in a clear, hierarchical order. Returns the final analysis as a JSON object.
     """
-    exclude_parts = "minutely,hourly,alerts"
-    url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude={exclude_parts}&appid={api_key}&units=metric"
+    # 1. Initialize the report structure. This will be updated as we go.
+    analysis_report = new_severe_weather_report(lat, lon)
 
+    # 2. Fetch data from the API. If it fails, update the report and return immediately.
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        # Today's data
-        current_weather = data.get('current', {})
-        today_data = data['daily'][0]
-        today_overview = {
-            "date": datetime.fromtimestamp(current_weather.get('dt')).strftime('%A, %d %B %Y'),
-            "summary": today_data.get('summary', "No summary available."),
-            "current_temp_celsius": current_weather.get('temp'),
-            "feels_like_celsius": current_weather.get('feels_like'),
-            "condition": current_weather.get('weather', [{}])[0].get('description', 'N/A').title()
-        }
+        data = get_weather_snapshot(lat, lon, api_key)
+    except requests.exceptions.RequestException as e:
+        analysis_report["status"] = "API_ERROR"
+        analysis_report["details"]["message"] = f"API request failed: {e}"
+        # This is the final report in case of an API error.
+        return analysis_report
 
-        # Tomorrow's data
-        tomorrow_data = data['daily'][1]
-        tomorrow_overview = {
-            "date": datetime.fromtimestamp(tomorrow_data.get('dt')).strftime('%A, %d %B %Y'),
-            "summary": tomorrow_data.get('summary', "No summary available."),
-            "day_temp_celsius": tomorrow_data.get('temp', {}).get('day'),
-            "night_temp_celsius": tomorrow_data.get('temp', {}).get('night'),
-            "condition": tomorrow_data.get('weather', [{}])[0].get('description', 'N/A').title(),
-            "chance_of_rain_percent": tomorrow_data.get('pop', 0) * 100
-        }
+    return analyze_severe_weather(data, analysis_report)
 
-        # Combine everything into a final dictionary
-        structured_output = {
-            "location": {
-                "latitude": lat,
-                "longitude": lon
-            },
-            "today": today_overview,
-            "tomorrow": tomorrow_overview
-        }
-        return structured_output
+def build_weather_summary(data, lat, lon):
+    """
+    Structures today's and tomorrow's weather from a One Call payload.
+    Raises KeyError/IndexError if the payload has no daily forecast.
+    """
+    # Today's data
+    current_weather = data.get('current', {})
+    today_data = data['daily'][0]
+    today_overview = {
+        "date": datetime.fromtimestamp(current_weather.get('dt')).strftime('%A, %d %B %Y'),
+        "summary": today_data.get('summary', "No summary available."),
+        "current_temp_celsius": current_weather.get('temp'),
+        "feels_like_celsius": current_weather.get('feels_like'),
+        "condition": current_weather.get('weather', [{}])[0].get('description', 'N/A').title()
+    }
+
+    # Tomorrow's data
+    tomorrow_data = data['daily'][1]
+    tomorrow_overview = {
+        "date": datetime.fromtimestamp(tomorrow_data.get('dt')).strftime('%A, %d %B %Y'),
+        "summary": tomorrow_data.get('summary', "No summary available."),
+        "day_temp_celsius": tomorrow_data.get('temp', {}).get('day'),
+        "night_temp_celsius": tomorrow_data.get('temp', {}).get('night'),
+        "condition": tomorrow_data.get('weather', [{}])[0].get('description', 'N/A').title(),
+        "chance_of_rain_percent": tomorrow_data.get('pop', 0) * 100
+    }
+
+    # Combine everything into a final dictionary
+    structured_output = {
+        "location": {
+            "latitude": lat,
+            "longitude": lon
+        },
+        "today": today_overview,
+        "tomorrow": tomorrow_overview
+    }
+    return structured_output
+
+def fetch_weather_summary(lat, lon, api_key):
+    """
+    Fetches and structures a weather summary for today and tomorrow.
+    """
+    try:
+        data = get_weather_snapshot(lat, lon, api_key)
+        return build_weather_summary(data, lat, lon)
 
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
@@ -317,6 +308,18 @@ def finalreturn():
     result
 
 if __name__ == "__main__":
+    # Assuming get_coordinates is in a file named app.py in the same directory.
+    # It is imported here rather than at module level so the Flask app can
+    # import this module without pulling app.py back in.
+    try:
+        from app import get_coordinates
+    except ImportError:
+        print("Warning: 'app.py' not found. You'll need to provide coordinates manually.")
+        # Define a dummy function if app.py is not available
+        def get_coordinates():
+            print("Please implement the get_coordinates function.")
+            return None, None
+
     load_dotenv()
     api_key = os.getenv("OPEN_WEATHER_API_KEY")
     
@@ -0,0 +1,248 @@
+# refresh_scheduler.py -> background refresh of many tracked cities on a worker pool
+import time
+import heapq
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_INTERVAL_S = 300
+REGISTRY_SYNC_S = 30  # How often an external registry is re-read
+
+
+def _phase(city, interval):
+    """
+    Stable offset in [0, interval) derived from the city name, so cities added
+    together are spread over the interval instead of all firing at once.
+    """
+    return (zlib.crc32(city.encode("utf-8")) % 10000) / 10000 * interval
+
+
+class RefreshScheduler:
+    """
+    Keeps a registry of tracked cities, each with its own refresh interval,
+    and runs `refresh_fn(city)` for every city when it falls due. Due times
+    live in a heap, so each tick only looks at the cities that are due.
+
+    Results are handed to `on_result(city, result)` (e.g. to write them to a
+    shared store). If `registry_loader` is given it is polled every
+    REGISTRY_SYNC_S seconds and must return {city: interval_seconds}; that
+    lets another process (the Flask app) add cities to track. Cities it adds
+    are first passed together to `prefetch_fn(cities)`, e.g. to geocode them
+    in one batched request instead of one request per city.
+
+    every(interval, fn) adds a job that is not per city (e.g. the shared
+    earthquake poll); it runs on the same pool and is never stacked on
+    top of itself either.
+    """
+
+    def __init__(self, refresh_fn, on_result=None, max_workers=8, registry_loader=None, prefetch_fn=None):
+        self.refresh_fn = refresh_fn
+        self.on_result = on_result
+        self.registry_loader = registry_loader
+        self.prefetch_fn = prefetch_fn
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh")
+        self._intervals = {}
+        self._heap = []        # (due_time, city)
+        self._next_due = {}    # city -> due time of its live heap entry
+        self._running = set()  # cities with a refresh in progress
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._last_sync = 0.0
+        self._from_registry = set()
+        self._jobs = []             # [due_time, interval, fn, name]
+        self._running_jobs = set()
+
+    def track(self, city, interval=DEFAULT_INTERVAL_S, immediate=False):
+        """
+        Starts (or re-times) refreshing a city every `interval` seconds. The
+        first refresh runs at the city's phase offset, or now if `immediate`.
+        """
+        with self._lock:
+            known = city in self._intervals
+            self._intervals[city] = interval
+            if not known:
+                first = time.time() if immediate else time.time() + _phase(city, interval)
+                self._next_due[city] = first
+                heapq.heappush(self._heap, (first, city))
+        self._wakeup.set()
+
+    def refresh_now(self, cities):
+        """Moves the next refresh of each of these tracked cities to now."""
+        now = time.time()
+        with self._lock:
+            for city in cities:
+                if city in self._intervals:
+                    # The city's older heap entry no longer matches _next_due and is skipped.
+                    self._next_due[city] = now
+                    heapq.heappush(self._heap, (now, city))
+        self._wakeup.set()
+
+    def every(self, interval, fn, name=None):
+        """Runs fn() every `interval` seconds, starting now."""
+        with self._lock:
+            self._jobs.append([time.time(), interval, fn, name or getattr(fn, "__qualname__", repr(fn))])
+        self._wakeup.set()
+        return self
+
+    def _run_job(self, name, fn):
+        try:
+            fn()
+        except Exception as e:
+            print(f"Error in scheduled job {name}: {e}")
+        finally:
+            with self._lock:
+                self._running_jobs.discard(name)
+
+    def untrack(self, city):
+        with self._lock:
+            self._intervals.pop(city, None)
+            self._next_due.pop(city, None)
+
+    def tracked(self):
+        with self._lock:
+            return dict(self._intervals)
+
+    def _sync_registry(self):
+        if self.registry_loader is None or time.time() - self._last_sync < REGISTRY_SYNC_S:
+            return
+        self._last_sync = time.time()
+        try:
+            registry = self.registry_loader()
+        except Exception as e:
+            print(f"Error loading tracked cities: {e}")
+            return
+
+        # One snapshot for both passes: tracked() copies the whole dict.
+        tracked = self.tracked()
+        new_cities = [city for city in registry if city not in tracked]
+        if new_cities and self.prefetch_fn is not None:
+            try:
+                self.prefetch_fn(new_cities)
+            except Exception as e:
+                print(f"Error prefetching {len(new_cities)} cities: {e}")
+
+        for city, interval in registry.items():
+            if tracked.get(city) != interval:
+                self.track(city, interval)
+        for city in self._from_registry - set(registry):
+            self.untrack(city)
+        self._from_registry = set(registry)
+
+    def _run_refresh(self, city):
+        try:
+            result = self.refresh_fn(city)
+            if self.on_result is not None:
+                self.on_result(city, result)
+        except Exception as e:
+            print(f"Error refreshing {city}: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(city)
+
+    def run_pending(self, now=None):
+        """
+        Submits every job and city that is due and schedules its next run.
+        Returns the number of seconds until the next one is due.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for job in self._jobs:
+                due, interval, fn, name = job
+                if due > now:
+                    continue
+                job[0] = due + interval if due + interval > now else now + interval
+                if name not in self._running_jobs:
+                    self._running_jobs.add(name)
+                    self._executor.submit(self._run_job, name, fn)
+
+            while self._heap and self._heap[0][0] <= now:
+                due, city = heapq.heappop(self._heap)
+                if self._next_due.get(city) != due:
+                    continue  # untracked (or re-tracked) since it was scheduled
+                interval = self._intervals[city]
+
+                # Fixed-rate scheduling keeps each city on its own phase.
+                next_due = due + interval
+                if next_due <= now:
+                    next_due = now + interval
+                self._next_due[city] = next_due
+                heapq.heappush(self._heap, (next_due, city))
+
+                # A slow refresh is not stacked on top of itself.
+                if city in self._running:
+                    continue
+                self._running.add(city)
+                self._executor.submit(self._run_refresh, city)
+
+            dues = [job[0] for job in self._jobs]
+            if self._heap:
+                dues.append(self._heap[0][0])
+            return min(dues) - now if dues else REGISTRY_SYNC_S
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self._sync_registry()
+            wait = self.run_pending()
+            self._wakeup.wait(timeout=max(0.05, min(wait, REGISTRY_SYNC_S)))
+            self._wakeup.clear()
+
+    def start(self):
+        """Runs the scheduler on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        self._executor.shutdown(wait=False)
+
+    def run_forever(self):
+        """Runs the scheduler on the current thread until interrupted."""
+        try:
+            self._loop()
+        except KeyboardInterrupt:
+            self.stop()
+
+
+def create_live_alerts_scheduler(max_workers=8):
+    """
+    Scheduler that keeps the live-alerts store fresh for every city the
+    Flask app has been asked about (see live_alerts.track_city), and runs
+    the one USGS poller whose events every city's tsunami check reads
+    (python/quake_poller.py). Cities within reach of a new earthquake are
+    refreshed as soon as the poll sees it.
+    """
+    from live_alerts import get_live_alerts_for_city, save_live_alerts, load_tracked_cities, load_tracked_locations
+    from geo_module import get_city_coords_many
+    from python.quake_poller import QuakeFeedPublisher, POLL_INTERVAL_S, get_default_feed
+
+    scheduler = RefreshScheduler(
+        refresh_fn=get_live_alerts_for_city,
+        on_result=save_live_alerts,
+        max_workers=max_workers,
+        registry_loader=load_tracked_cities,
+        prefetch_fn=get_city_coords_many
+    )
+
+    def refresh_affected(cities):
+        # The refreshes must see the events just written, not the feed as
+        # this process last read it.
+        get_default_feed().invalidate()
+        scheduler.refresh_now(cities)
+
+    publisher = QuakeFeedPublisher(locations_loader=load_tracked_locations, on_affected=refresh_affected)
+    return scheduler.every(POLL_INTERVAL_S, publisher.poll, "quake-feed")
+
+
+if __name__ == "__main__":
+    # Run as its own process next to the Flask workers:
+    #   python refresh_scheduler.py
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path='./python/.env')
+
+    print("Starting live-alerts refresh scheduler. Press Ctrl+C to stop.")
+    create_live_alerts_scheduler().run_forever()
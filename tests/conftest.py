@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules import each other both as top-level names and as python.<name>;
+# run the tests with the repository root on the path, like app.py does.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
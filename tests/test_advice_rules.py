@@ -0,0 +1,94 @@
+import itertools
+
+import pytest
+
+from python.advice_rules import default_engine
+from python.wsummary import build_advice_report, build_advice_reports
+
+_MISSING = object()
+
+
+def reference_advice(current_weather, daily_forecast, temp_unit="°C"):
+    """The if/elif chain the rule table replaced (wsummary/majoralert; generalalert used "*C")."""
+    advice = []
+
+    uvi = current_weather.get('uvi', 0)
+    pop = daily_forecast.get('pop', 0) * 100
+    day_temp = daily_forecast.get('temp', {}).get('day', 0)
+    weather_condition = daily_forecast.get('weather', [{}])[0].get('main', '')
+
+    if uvi > 7:
+        advice.append(f"The UV index is high ({uvi}). Wear sunscreen and sunglasses if you'll be outside for a while.")
+    elif uvi > 2:
+        advice.append(f"The UV index is moderate ({uvi}). It's still a good idea to protect your skin.")
+
+    if pop > 60:
+        advice.append(f"There's a high chance of rain today ({pop:.0f}%). Don't forget your umbrella!")
+    elif pop > 30:
+        advice.append(f"There's a slight chance of rain ({pop:.0f}%). It might be a good idea to take an umbrella just in case.")
+
+    if day_temp > 32:
+        advice.append(f"It's going to be very hot, around {day_temp}{temp_unit}. Stay hydrated and avoid strenuous activity during peak hours.")
+
+    if weather_condition == "Thunderstorm":
+        advice.append("Thunderstorms are expected. It's best to stay indoors and avoid open areas.")
+    elif weather_condition == "Clear":
+        advice.append("Expect clear skies today, a perfect day for outdoor activities!")
+    elif weather_condition in ["Rain", "Drizzle"]:
+        advice.append("Rain is expected. Wear waterproof clothing if you plan to be outside.")
+
+    if not advice:
+        advice.append("Weather conditions seem stable today. Enjoy your day!")
+    return advice
+
+
+# Missing keys, values on and either side of every threshold, and each condition.
+UVI = [_MISSING, 0, 2, 2.01, 5, 7, 7.5, 11]
+POP = [_MISSING, 0, 0.3, 0.31, 0.45, 0.6, 0.61, 1]
+DAY_TEMP = [_MISSING, -5.5, 20, 32, 32.01, 41]
+CONDITION = [_MISSING, "Thunderstorm", "Clear", "Rain", "Drizzle", "Clouds", "Snow", ""]
+
+
+def build_inputs():
+    inputs = []
+    for uvi, pop, day_temp, condition in itertools.product(UVI, POP, DAY_TEMP, CONDITION):
+        current = {} if uvi is _MISSING else {"uvi": uvi}
+        daily = {}
+        if pop is not _MISSING:
+            daily["pop"] = pop
+        if day_temp is not _MISSING:
+            daily["temp"] = {"day": day_temp}
+        if condition is not _MISSING:
+            daily["weather"] = [{"main": condition}]
+        inputs.append((current, daily))
+    return inputs
+
+
+INPUTS = build_inputs()
+
+
+@pytest.mark.parametrize("temp_unit", ["°C", "*C"])
+def test_single_location_matches_the_old_if_elif_chain(temp_unit):
+    for current, daily in INPUTS:
+        assert default_engine.advise(current, daily, temp_unit=temp_unit) == \
+            reference_advice(current, daily, temp_unit), (current, daily)
+
+
+@pytest.mark.parametrize("temp_unit", ["°C", "*C"])
+def test_batch_matches_the_old_if_elif_chain(temp_unit):
+    expected = [reference_advice(current, daily, temp_unit) for current, daily in INPUTS]
+    assert default_engine.advise_many(INPUTS, temp_unit=temp_unit) == expected
+
+
+def test_batch_reports_match_single_reports():
+    snapshots = []
+    for i, (current, daily) in enumerate(INPUTS[:200]):
+        data = {"current": dict(current, dt=1_700_000_000 + i, temp=20.0), "daily": [daily], "timezone": "UTC"}
+        snapshots.append((data, 10.0 + i, 20.0))
+    snapshots.append((None, 0.0, 0.0))              # fetch failed
+    snapshots.append(({"current": {}}, 0.0, 0.0))   # no daily forecast
+
+    reports = build_advice_reports(snapshots)
+
+    assert reports[:-2] == [build_advice_report(data, lat, lon) for data, lat, lon in snapshots[:-2]]
+    assert reports[-2:] == [None, None]
@@ -0,0 +1,66 @@
+import time
+
+from alert_stream import AlertBroadcaster, stream_events
+from live_alerts import alert_fingerprint
+
+
+def result(status, timestamp=None):
+    return {
+        "data": {"major_alerts": {"status": status}},
+        "errors": {},
+        "timestamp": time.time() if timestamp is None else timestamp
+    }
+
+
+def broadcaster():
+    # The watcher never wakes up during a test; results are published directly.
+    return AlertBroadcaster(watch_interval=3600, load_fn=lambda city, max_age=None: None)
+
+
+def first_event(events):
+    assert next(events).startswith("retry:")
+    return next(events)
+
+
+def test_event_id_is_the_state_fingerprint():
+    b = broadcaster()
+    clear = result("CLEAR")
+    b.publish("mumbai", clear)
+    event = first_event(stream_events(b, "mumbai", heartbeat=0.05))
+    assert event.startswith(f"id: {alert_fingerprint(clear)}\n")
+
+
+def test_same_state_has_the_same_id_in_another_worker():
+    clear = result("CLEAR")
+    ids = []
+    for b in (broadcaster(), broadcaster()):
+        b.publish("mumbai", clear)
+        ids.append(first_event(stream_events(b, "mumbai", heartbeat=0.05)).split("\n")[0])
+    assert ids[0] == ids[1]
+
+
+def test_reconnect_after_restart_gets_a_changed_state():
+    # Client saw CLEAR; the process restarts (counter-based ids would start
+    # over at 1) and the city turns dangerous before the client reconnects.
+    old = broadcaster()
+    old.publish("mumbai", result("CLEAR"))
+    last_id = first_event(stream_events(old, "mumbai", heartbeat=0.05)).split("\n")[0][len("id: "):]
+
+    new = broadcaster()
+    new.publish("mumbai", result("DANGER_CONDITIONS_MET"))
+    event = first_event(stream_events(new, "mumbai", last_event_id=last_id, heartbeat=0.05))
+    assert "DANGER_CONDITIONS_MET" in event
+
+
+def test_reconnect_with_the_current_id_gets_only_keep_alives():
+    b = broadcaster()
+    clear = result("CLEAR")
+    b.publish("mumbai", clear)
+    events = stream_events(b, "mumbai", last_event_id=alert_fingerprint(clear), heartbeat=0.05)
+    assert first_event(events) == ": keep-alive\n\n"
+
+
+def test_unchanged_state_is_not_rebroadcast():
+    b = broadcaster()
+    assert b.publish("mumbai", result("CLEAR", 1)) is not None
+    assert b.publish("mumbai", result("CLEAR", 2)) is None
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+
+from python import async_client
+
+SNAPSHOT = {
+    "current": {"dt": 1_700_000_000, "temp": 30, "uvi": 8, "pressure": 1010},
+    "daily": [{"pop": 0.7, "temp": {"day": 33}, "weather": [{"main": "Rain"}]}, {"dt": 1_700_086_400}]
+}
+
+LOCATIONS = [
+    {"name": "good", "lat": 1.0, "lon": 2.0, "radius_km": 500},
+    {"name": "bad-json", "lat": 3.0, "lon": 4.0, "radius_km": 500},
+    {"name": "bad-feed", "lat": 5.0, "lon": 6.0, "radius_km": 500},
+]
+
+
+class FakeClient:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def get_weather_snapshot(self, lat, lon, api_key=None):
+        if lat == 3.0:
+            raise json.JSONDecodeError("Expecting value", "<html>", 0)
+        return SNAPSHOT
+
+    async def get_json(self, url, params=None):
+        return {"features": [{"id": f"quake-{params['latitude']}"}]}
+
+
+class FakeFeed:
+    def is_live(self):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def fake_upstream(monkeypatch):
+    monkeypatch.setattr(async_client, "AsyncUpstreamClient", FakeClient)
+    monkeypatch.setattr(async_client, "get_default_feed", FakeFeed)
+
+
+def test_one_location_failing_keeps_every_other_result(monkeypatch):
+    real = async_client.fetch_earthquake_for_location_async
+
+    async def flaky_quake(client, location):
+        if location["name"] == "bad-feed":
+            raise RuntimeError("feed store is locked")
+        return await real(client, location)
+
+    monkeypatch.setattr(async_client, "fetch_earthquake_for_location_async", flaky_quake)
+    results = asyncio.run(async_client.refresh_locations(LOCATIONS, api_key="key"))
+
+    assert sorted(results) == ["bad-feed", "bad-json", "good"]
+    good = results["good"]
+    assert good["earthquake"] == {"id": "quake-1.0"}
+    assert good["weather_summary"]["location"] == {"latitude": 1.0, "longitude": 2.0}
+    assert good["major_alerts"]["monitoring_location"] == {"latitude": 1.0, "longitude": 2.0}
+    assert "Rain is expected" in good["general_alerts"]["assistant_report"]["advice"][-1]
+
+    assert results["bad-json"]["weather_summary"] is None
+    assert results["bad-json"]["general_alerts"] is None
+    assert results["bad-json"]["earthquake"] == {"id": "quake-3.0"}
+
+    assert results["bad-feed"]["earthquake"] is None
+    assert results["bad-feed"]["weather_summary"] is not None
+
+
+def test_unexpected_error_in_one_part_is_contained(monkeypatch):
+    monkeypatch.setattr(async_client, "build_weather_summary", lambda data, lat, lon: 1 / (lat - 1.0))
+    results = asyncio.run(async_client.refresh_locations(LOCATIONS[:1], api_key="key"))
+
+    assert results["good"]["weather_summary"] is None
+    assert results["good"]["earthquake"] == {"id": "quake-1.0"}
@@ -0,0 +1,94 @@
+import pytest
+
+import app as app_module
+from python.conditional import SectionVersions
+
+
+def live_result(timestamp, tsunami_status="No significant event nearby.", temp=30.0):
+    return {
+        "timestamp": timestamp,
+        "location": {"latitude": 19.08, "longitude": 72.88},
+        "data": {
+            "weather_summary": {"today": {"current_temp_celsius": temp}},
+            "major_alerts": {"status": "NORMAL"},
+            "general_alerts": {"assistant_report": {"advice": ["Enjoy your day!"]}},
+            "tsunami": {"status": tsunami_status}
+        },
+        "errors": {}
+    }
+
+
+@pytest.fixture
+def live(monkeypatch):
+    """Test client whose /api/live-alerts serves `state["result"]`."""
+    state = {"result": live_result(1000.0)}
+    monkeypatch.setattr(app_module, "get_or_refresh_live_alerts", lambda city: (state["result"], True))
+    monkeypatch.setattr(app_module, "live_alert_versions", SectionVersions())
+    return app_module.app.test_client(), state
+
+
+def test_full_body_carries_the_version_as_etag(live):
+    client, _ = live
+    response = client.get("/api/live-alerts?city=mumbai")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert response.headers["ETag"] == f'"{body["version"]}"'
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert body["data"]["tsunami"]["status"] == "No significant event nearby."
+    assert body["city"] == "mumbai"
+
+
+def test_if_none_match_with_the_current_version_is_a_304(live):
+    client, state = live
+    etag = client.get("/api/live-alerts?city=mumbai").headers["ETag"]
+
+    response = client.get("/api/live-alerts?city=mumbai", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+    # Same content collected again later: still the same version.
+    state["result"] = live_result(1300.0)
+    assert client.get("/api/live-alerts?city=mumbai", headers={"If-None-Match": etag}).status_code == 304
+
+    state["result"] = live_result(1600.0, tsunami_status="Alert!!! Earthquake Detected")
+    response = client.get("/api/live-alerts?city=mumbai", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_since_returns_only_the_changed_sections(live):
+    client, state = live
+    old_version = client.get("/api/live-alerts?city=mumbai").get_json()["version"]
+
+    state["result"] = live_result(1300.0, temp=31.5)
+    body = client.get(f"/api/live-alerts?city=mumbai&since={old_version}").get_json()
+
+    assert body["full"] is False
+    assert body["since"] == old_version
+    assert body["version"] != old_version
+    assert body["changed"] == {"weather_summary": {"today": {"current_temp_celsius": 31.5}}}
+    assert sorted(body["unchanged"]) == ["errors", "general_alerts", "major_alerts", "tsunami"]
+    assert body["timestamp"] == 1300.0
+    assert "data" not in body
+
+
+def test_since_the_current_version_reports_nothing_changed(live):
+    client, _ = live
+    version = client.get("/api/live-alerts?city=mumbai").get_json()["version"]
+
+    body = client.get(f"/api/live-alerts?city=mumbai&since={version}").get_json()
+    assert body["changed"] == {}
+    assert body["version"] == version
+
+
+def test_unknown_since_version_falls_back_to_the_full_body(live):
+    client, _ = live
+    response = client.get("/api/live-alerts?city=mumbai&since=0123456789abcdef")
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert "full" not in body
+    assert body["data"]["major_alerts"] == {"status": "NORMAL"}
+    assert response.headers["ETag"] == f'"{body["version"]}"'
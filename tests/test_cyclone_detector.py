@@ -0,0 +1,71 @@
+from python.cyclone_detector import CycloneDetector, apply_trend_analysis, classify_trends
+
+WIND_THR = 33
+PRESSURE_THR = 980
+
+
+def report(lat=35.0, lon=139.0, status="CLEAR"):
+    return {
+        "monitoring_location": {"latitude": lat, "longitude": lon},
+        "status": status,
+        "details": {"message": "ok"}
+    }
+
+
+def feed(detector, readings, start=1_700_000_000, step=300):
+    """Feeds (pressure, wind) pairs as 5-minute snapshots; returns the last report."""
+    result = None
+    for i, (pressure, wind) in enumerate(readings):
+        current = {"dt": start + i * step, "pressure": pressure, "wind_speed": wind}
+        result = apply_trend_analysis(report(), current, WIND_THR, PRESSURE_THR, detector=detector)
+    return result
+
+
+def test_single_hpa_step_at_normal_pressure_is_not_an_alert():
+    # 1014 -> 1013 after 30 minutes: the whole-hPa step that used to read as -6 hPa/3h.
+    result = feed(CycloneDetector(), [(1014, 5)] * 6 + [(1013, 5)])
+    assert result["status"] == "CLEAR"
+    assert result["details"]["trends"]["pressure_tendency_hpa_3h"] is None
+
+
+def test_integer_drift_over_an_hour_is_not_an_alert():
+    result = feed(CycloneDetector(), [(1012, 5)] * 7 + [(1011, 5)] * 6 + [(1010, 5)])
+    assert result["status"] == "CLEAR"
+
+
+def test_tendency_needs_three_hours_of_history():
+    detector = CycloneDetector()
+    trends = feed(detector, [(1000, 5)] * 36)["details"]["trends"]   # 175 minutes
+    assert trends["pressure_tendency_hpa_3h"] is None
+    trends = feed(detector, [(1000, 5)] * 37)["details"]["trends"]   # 180 minutes
+    assert trends["pressure_tendency_hpa_3h"] == 0
+
+
+def test_tendency_is_the_unscaled_three_hour_difference():
+    readings = [(1013 - i // 6, 5) for i in range(40)]   # 1 hPa per 30 minutes
+    trends = feed(CycloneDetector(), readings)["details"]["trends"]
+    assert trends["pressure_tendency_hpa_3h"] == -6
+
+
+def test_falling_pressure_at_normal_levels_stays_clear():
+    readings = [(1013 - i // 6, 5) for i in range(40)]
+    assert feed(CycloneDetector(), readings)["status"] == "CLEAR"
+
+
+def test_falling_pressure_near_the_low_threshold_is_a_caution():
+    readings = [(996 - i // 6, 5) for i in range(40)]
+    assert feed(CycloneDetector(), readings)["status"] == "CAUTION_LOW_PRESSURE"
+
+
+def test_reference_before_a_long_gap_is_not_used():
+    detector = CycloneDetector()
+    feed(detector, [(1013, 5)], start=1_700_000_000)
+    trends = feed(detector, [(990, 5)], start=1_700_000_000 + 6 * 3600)["details"]["trends"]
+    assert trends["pressure_tendency_hpa_3h"] is None
+
+
+def test_classify_requires_pressure_near_low_for_low_pressure_caution():
+    trends = {"pressure_tendency_hpa_3h": -7.0, "wind_acceleration_ms_per_h": 0.0, "gust_ratio": None}
+    assert classify_trends(trends, 5, 1013, WIND_THR, PRESSURE_THR) == (None, [])
+    status, _ = classify_trends(trends, 5, 995, WIND_THR, PRESSURE_THR)
+    assert status == "CAUTION_LOW_PRESSURE"
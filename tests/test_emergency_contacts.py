@@ -0,0 +1,48 @@
+import pytest
+
+import emergency_contacts
+from gazetteer import Gazetteer
+from emergency_contacts import lookup_table_contact
+
+
+def test_known_city_uses_the_country_table():
+    contact = lookup_table_contact("London")
+    assert contact["country"] == "GB"
+    assert contact["numbers"]["general"] == "999"
+    assert contact["source"] == "table"
+
+
+@pytest.mark.parametrize("city", ["East London", "London, Ontario", "Santiago de Cuba", "Georgetown"])
+def test_names_outside_the_gazetteer_do_not_borrow_a_neighbours_numbers(city):
+    assert lookup_table_contact(city) is None
+
+
+def test_east_london_falls_through_to_the_ai_answer(monkeypatch):
+    asked = []
+
+    class Store:
+        def get(self, namespace, key, max_age=None):
+            return None
+
+        def set(self, namespace, key, value):
+            pass
+
+    def ask(city):
+        asked.append(city)
+        return "10111 – Police, 10177 – Ambulance"
+
+    monkeypatch.setattr(emergency_contacts, "get_default_store", lambda: Store())
+    monkeypatch.setattr(emergency_contacts, "get_emergency_contact_llm", ask)
+    contact = emergency_contacts.get_emergency_contact("East London")
+    assert asked == ["East London"]
+    assert contact["source"] == "ai"
+    assert "999" not in contact["emergency_contact"]
+
+
+def test_name_shared_by_two_countries_is_not_answered_from_the_table(monkeypatch):
+    gazetteer = Gazetteer([
+        {"name": "Perth", "country": "AU", "latitude": -31.95, "longitude": 115.86, "aliases": []},
+        {"name": "Perth", "country": "GB", "latitude": 56.4, "longitude": -3.43, "aliases": []},
+    ])
+    monkeypatch.setattr(emergency_contacts, "get_gazetteer", lambda: gazetteer)
+    assert lookup_table_contact("Perth") is None
@@ -0,0 +1,43 @@
+import pytest
+
+from gazetteer import lookup_city, suggest_cities
+
+
+@pytest.mark.parametrize("name", [
+    "Santiago de Cuba",
+    "East London",
+    "London, Ontario",
+    "Georgetown",
+    "Londn",
+])
+def test_names_not_in_the_gazetteer_are_not_resolved(name):
+    assert lookup_city(name) is None
+
+
+@pytest.mark.parametrize("name, country", [
+    ("London", "GB"),
+    ("  LONDON ", "GB"),
+    ("Santiago", "CL"),
+    ("São Paulo", "BR"),
+    ("bombay", "IN"),
+])
+def test_exact_and_alias_lookups(name, country):
+    assert lookup_city(name)["country"] == country
+
+
+@pytest.mark.parametrize("name", [
+    "Santiago de Cuba",   # Longer name must not suggest the bare city
+    "East London",
+    "London, Ontario",    # Qualifier that is not a country code
+    "London, US",         # Country code that does not match
+    "Georgetown",         # Not George Town MY
+])
+def test_multi_word_and_qualified_names_get_no_suggestion(name):
+    assert suggest_cities(name) == []
+
+
+def test_near_misses_are_suggestions_only():
+    assert suggest_cities("Londn") == ["London, GB"]
+    assert suggest_cities("Sao Paolo") == ["Sao Paulo, BR"]
+    assert suggest_cities("Londn", country="GB") == ["London, GB"]
+    assert suggest_cities("Londn", country="CA") == []
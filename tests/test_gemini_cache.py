@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("google.generativeai")   # python/tsunami.py configures the Gemini SDK on import
+
+from python import tsunami
+from python.kv_store import KVStore
+
+RULES = [{"region": "Japan-Kuril Trench", "min_magnitude": 7.0, "max_depth_km": 70}]
+
+
+def quake(updated=1_700_000_100_000, event_id="us7000abcd"):
+    return {
+        "id": event_id,
+        "properties": {"mag": 7.4, "place": "off the east coast of Honshu", "time": 1_700_000_000_000,
+                       "updated": updated},
+        "geometry": {"coordinates": [142.4, 38.3, 25.0]}
+    }
+
+
+ASSESSMENT = {"risk_level": "HIGH", "reason": "Matches historical rule."}
+
+
+@pytest.fixture
+def gemini(monkeypatch, tmp_path):
+    store = KVStore(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(tsunami, "get_default_store", lambda: store)
+    replies = []
+    calls = []
+
+    def request(earthquake, assessment, rules):
+        calls.append(earthquake["properties"]["updated"])
+        return replies.pop(0)
+
+    monkeypatch.setattr(tsunami, "request_gemini_analysis", request)
+    return store, replies, calls
+
+
+def test_same_event_revision_and_rules_hit_the_cache(gemini):
+    _, replies, calls = gemini
+    replies.append({"summary": "first"})
+
+    assert tsunami.get_gemini_analysis(quake(), ASSESSMENT, RULES) == {"summary": "first"}
+    assert tsunami.get_gemini_analysis(quake(), ASSESSMENT, RULES) == {"summary": "first"}
+    assert len(calls) == 1
+
+
+def test_revised_event_or_changed_rules_miss_the_cache(gemini):
+    _, replies, calls = gemini
+    replies.extend([{"summary": "v1"}, {"summary": "revised"}, {"summary": "new rules"}])
+
+    tsunami.get_gemini_analysis(quake(), ASSESSMENT, RULES)
+    assert tsunami.get_gemini_analysis(quake(updated=1_700_000_200_000), ASSESSMENT, RULES) == {"summary": "revised"}
+    assert tsunami.get_gemini_analysis(quake(), ASSESSMENT, RULES + [{"region": "Chile"}]) == {"summary": "new rules"}
+    assert len(calls) == 3
+    assert tsunami.gemini_cache_key(quake(), RULES).endswith(f":v{tsunami.GEMINI_PROMPT_VERSION}")
+
+
+def test_errors_are_not_cached(gemini):
+    _, replies, calls = gemini
+    replies.extend([{"error": "Gemini response error: 503"}, {"summary": "recovered"}])
+
+    assert "error" in tsunami.get_gemini_analysis(quake(), ASSESSMENT, RULES)
+    assert tsunami.get_gemini_analysis(quake(), ASSESSMENT, RULES) == {"summary": "recovered"}
+    assert len(calls) == 2
+
+
+def test_store_failure_does_not_leak_the_key_lock(gemini, monkeypatch):
+    store, replies, _ = gemini
+    replies.append({"summary": "ok"})
+
+    def broken_set(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(store, "set", broken_set)
+    with pytest.raises(RuntimeError):
+        tsunami.get_gemini_analysis(quake(), ASSESSMENT, RULES)
+    assert tsunami._gemini_locks == {}
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from python.geo_math import destination_point, radius_bounding_box
+
+
+def brute_force_box(lat, lon, radius_km):
+    """Extent of densely sampled points on the circle (no antimeridian handling)."""
+    lats, lons = destination_point(lat, lon, np.linspace(0, 360, 36001), radius_km)
+    offsets = (lons - lon + 180) % 360 - 180
+    return lats.min(), lats.max(), lon + offsets.min(), lon + offsets.max()
+
+
+@pytest.mark.parametrize("lat, lon, radius_km", [
+    (0, 0, 1000),
+    (60, 10, 1000),
+    (-45, 170, 2000),
+    (75, -100, 500),
+    (19.08, 72.88, 500),
+])
+def test_matches_brute_force_sampling(lat, lon, radius_km):
+    lat_min, lat_max, lon_min, lon_max = radius_bounding_box(lat, lon, radius_km)
+    exp_lat_min, exp_lat_max, exp_lon_min, exp_lon_max = brute_force_box(lat, lon, radius_km)
+    assert lat_min == pytest.approx(exp_lat_min, abs=1e-3)
+    assert lat_max == pytest.approx(exp_lat_max, abs=1e-3)
+    # Compare half-widths, so boxes that wrap past +/-180 compare correctly too.
+    assert (lon_max - lon_min) % 360 == pytest.approx(exp_lon_max - exp_lon_min, abs=1e-3)
+    assert (lon_max - lon) % 360 == pytest.approx(exp_lon_max - lon, abs=1e-3)
+
+
+def test_lat_60_is_wider_than_the_east_west_points():
+    _, _, lon_min, lon_max = radius_bounding_box(60, 0, 1000)
+    assert lon_max == pytest.approx(18.22, abs=0.01)
+    assert lon_min == pytest.approx(-18.22, abs=0.01)
+
+
+@pytest.mark.parametrize("lat", [85, -88])
+def test_circle_containing_a_pole_spans_all_longitudes(lat):
+    lat_min, lat_max, lon_min, lon_max = radius_bounding_box(lat, 30, 1000)
+    assert (lon_min, lon_max) == (-180, 180)
+    assert (lat_max == 90) if lat > 0 else (lat_min == -90)
+
+
+def test_vectorized_over_points():
+    lat_min, lat_max, lon_min, lon_max = radius_bounding_box([0, 60, 89], [0, 0, 0], 1000)
+    assert lon_max[1] == pytest.approx(18.22, abs=0.01)
+    assert lon_min[2] == -180 and lon_max[2] == 180
@@ -0,0 +1,92 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from python import http_client, weather_snapshot
+from python.http_client import UpstreamClient, DeadlineExceeded
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    delay_s = 2.0
+
+    def do_GET(self):
+        self.server.hits += 1
+        time.sleep(self.delay_s)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    server.hits = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_deadline_cuts_timeout_and_skips_retries(slow_url):
+    server, url = slow_url
+    client = UpstreamClient(timeout=(3.05, 10), max_retries=2)
+    started = time.monotonic()
+    with http_client.deadline(started + 0.5):
+        with pytest.raises(requests.exceptions.Timeout):
+            client.get(url)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert server.hits == 1
+
+
+def test_request_after_deadline_does_not_reach_upstream(slow_url):
+    server, url = slow_url
+    with http_client.deadline(time.monotonic() - 1):
+        with pytest.raises(DeadlineExceeded):
+            UpstreamClient().get(url)
+    assert server.hits == 0
+
+
+def test_nested_deadline_keeps_the_earlier_one():
+    now = time.monotonic()
+    with http_client.deadline(now + 1):
+        with http_client.deadline(now + 100):
+            assert http_client.remaining_time() <= 1
+        assert http_client.remaining_time() <= 1
+    assert http_client.remaining_time() is None
+
+
+def test_snapshot_waiter_gives_up_at_its_deadline(monkeypatch):
+    weather_snapshot.clear_snapshots()
+    release = threading.Event()
+
+    def slow_fetch(lat, lon, api_key):
+        release.wait(5)
+        return {"current": {}}
+
+    monkeypatch.setattr(weather_snapshot, "_fetch_onecall", slow_fetch)
+    monkeypatch.setattr(weather_snapshot, "_record_history", lambda *args: None)
+    holder = threading.Thread(target=weather_snapshot.get_weather_snapshot, args=(1.0, 2.0, "key"))
+    holder.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    with http_client.deadline(started + 0.3):
+        with pytest.raises(DeadlineExceeded):
+            weather_snapshot.get_weather_snapshot(1.0, 2.0, "key")
+    assert time.monotonic() - started < 1.0
+
+    release.set()
+    holder.join()
+    assert weather_snapshot.get_weather_snapshot(1.0, 2.0, "key") == {"current": {}}
+    weather_snapshot.clear_snapshots()
@@ -0,0 +1,113 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from llm_batch import batch_lookup, parse_batch_reply
+
+
+def reply(results):
+    return json.dumps({"results": results})
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    None,
+    "not json",
+    '{"results": [{"city": "Paris"',          # cut off mid-answer
+    '{"answers": [{"city": "Paris"}]}',       # wrong top-level key
+    '{"results": {"city": "Paris"}}',         # results not a list
+    '[{"city": "Paris"}]',
+])
+def test_malformed_replies_parse_to_nothing(text):
+    assert parse_batch_reply(text) == {}
+
+
+def test_fenced_reply_is_parsed():
+    text = '```json\n' + reply([{"city": "Paris", "latitude": 48.85}]) + '\n```'
+    assert parse_batch_reply(text) == {"paris": {"city": "Paris", "latitude": 48.85}}
+
+
+def test_bad_entries_are_skipped_and_names_match_case_insensitively():
+    parsed = parse_batch_reply(reply([
+        {"city": "  PARIS ", "latitude": 48.85},
+        {"city": 42},
+        "Lyon",
+        {"latitude": 1.0},
+    ]))
+    assert parsed == {"paris": {"city": "  PARIS ", "latitude": 48.85}}
+
+
+class FakeClient:
+    """Stands in for the OpenAI client: answers each chat completion from `replies`."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][-1]["content"])
+        content = self.replies.pop(0)
+        if isinstance(content, Exception):
+            raise content
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def valid_coords(item):
+    lat = item.get("latitude")
+    return {"latitude": lat} if isinstance(lat, (int, float)) else None
+
+
+def lookup(client, names, fallback=None, batch_size=40):
+    return batch_lookup(client, "model", "system", "Give coordinates.", ["latitude"], names,
+                        valid_coords, fallback=fallback, batch_size=batch_size)
+
+
+def test_missing_and_invalid_items_fall_back_one_at_a_time():
+    client = FakeClient([reply([
+        {"city": "paris", "latitude": 48.85},
+        {"city": "Lyon", "latitude": "unknown"},
+    ])])
+    fallbacks = []
+
+    def fallback(name):
+        fallbacks.append(name)
+        return {"latitude": 0.0} if name == "Lyon" else None
+
+    results = lookup(client, ["Paris", "Lyon", "Nice", "Paris"], fallback=fallback)
+
+    assert results == {"Paris": {"latitude": 48.85}, "Lyon": {"latitude": 0.0}, "Nice": None}
+    assert sorted(fallbacks) == ["Lyon", "Nice"]
+    assert len(client.prompts) == 1
+
+
+def test_failed_batch_request_falls_back_for_its_names_only():
+    client = FakeClient([
+        RuntimeError("rate limited"),
+        '```json\n' + reply([{"city": "Nice", "latitude": 43.7}]) + '\n```',
+    ])
+    fallbacks = []
+
+    def fallback(name):
+        fallbacks.append(name)
+        return {"latitude": -1.0}
+
+    results = lookup(client, ["Paris", "Lyon", "Nice"], fallback=fallback, batch_size=2)
+
+    assert results == {"Paris": {"latitude": -1.0}, "Lyon": {"latitude": -1.0}, "Nice": {"latitude": 43.7}}
+    assert fallbacks == ["Paris", "Lyon"]
+
+
+def test_without_fallback_unanswered_names_are_none():
+    client = FakeClient(["I'm sorry, I can't help with that."])
+    assert lookup(client, ["Paris", "Lyon"]) == {"Paris": None, "Lyon": None}
+
+
+def test_fallback_errors_leave_the_name_unresolved():
+    client = FakeClient([reply([])])
+
+    def fallback(name):
+        raise TimeoutError("upstream timeout")
+
+    assert lookup(client, ["Paris"], fallback=fallback) == {"Paris": None}
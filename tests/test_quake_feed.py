@@ -0,0 +1,143 @@
+import time
+
+import pytest
+
+from python.kv_store import KVStore
+from python.quake_poller import QuakePoller, QuakeFeedPublisher, QuakeFeedReader, FEED_STALE_AFTER_S
+from refresh_scheduler import RefreshScheduler
+
+NOW_MS = int(time.time() * 1000)
+
+
+def feature(event_id, lat, lon, mag=5.0, minutes_ago=10):
+    return {
+        "id": event_id,
+        "properties": {"mag": mag, "place": event_id, "time": NOW_MS - minutes_ago * 60000,
+                       "updated": NOW_MS - minutes_ago * 60000},
+        "geometry": {"coordinates": [lon, lat, 10.0]}
+    }
+
+
+class FakePoller:
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.last_success = None
+        self.watermark_ms = None
+        self.calls = 0
+
+    def fetch_updates(self):
+        self.calls += 1
+        features = self.batches.pop(0)
+        if features is None:   # USGS failed
+            return []
+        self.last_success = time.time()
+        return features
+
+
+class ScriptedPoller(QuakePoller):
+    """A real QuakePoller (index, watermark, fan_out) whose USGS answers are scripted."""
+
+    def __init__(self, batches, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = list(batches)
+
+    def fetch_updates(self):
+        features = self.batches.pop(0)
+        self.last_success = time.time()
+        self.watermark_ms = max([f["properties"]["updated"] for f in features] + [self.watermark_ms or 0])
+        return features
+
+
+@pytest.fixture
+def store(tmp_path):
+    return KVStore(str(tmp_path / "cache.sqlite3"))
+
+
+def test_reader_answers_every_location_from_one_poll(store):
+    poller = FakePoller([[
+        feature("honshu_old", 38.0, 142.0, minutes_ago=120),
+        feature("honshu_new", 38.5, 142.5, minutes_ago=5),
+        feature("chile", -33.0, -72.0),
+        feature("small", 38.3, 142.3, mag=4.0, minutes_ago=1),
+    ]])
+    QuakeFeedPublisher(store, poller).poll()
+    reader = QuakeFeedReader(store)
+
+    assert reader.is_live()
+    assert reader.latest_near(38.322, 142.369, 500)["id"] == "honshu_new"
+    assert reader.latest_near(-33.45, -70.67, 500)["id"] == "chile"
+    assert reader.latest_near(19.08, 72.88, 500) is None
+    assert poller.calls == 1
+
+
+def test_revised_event_replaces_the_stored_copy(store):
+    revised = feature("honshu", 38.5, 142.5, mag=7.1)
+    poller = FakePoller([[feature("honshu", 38.5, 142.5, mag=6.8)], [revised]])
+    publisher = QuakeFeedPublisher(store, poller)
+    publisher.poll()
+    publisher.poll()
+    assert QuakeFeedReader(store).latest_near(38.322, 142.369, 500)["properties"]["mag"] == 7.1
+
+
+def test_feed_is_not_live_until_a_poll_succeeds(store):
+    QuakeFeedPublisher(store, FakePoller([None])).poll()
+    assert not QuakeFeedReader(store).is_live()
+
+
+def test_feed_goes_stale_without_polls(store):
+    QuakeFeedPublisher(store, FakePoller([[]])).poll()
+    status = store.get("quake_feed", "status")
+    store.set("quake_feed", "status", dict(status, polled_at=time.time() - FEED_STALE_AFTER_S - 1))
+    assert not QuakeFeedReader(store).is_live()
+
+
+def test_new_events_are_fanned_out_to_the_locations_they_reach(store):
+    locations = [
+        {"name": "sendai", "lat": 38.27, "lon": 140.87, "radius_km": 500},
+        {"name": "tokyo", "lat": 35.68, "lon": 139.69, "radius_km": 500},
+        {"name": "santiago", "lat": -33.45, "lon": -70.67, "radius_km": 500},
+    ]
+    poller = ScriptedPoller([
+        [feature("backfill", 38.5, 142.5, minutes_ago=600)],
+        [feature("honshu", 37.0, 141.5)],
+        [],
+    ], regions={"Japan-Kuril Trench": [140, 30, 160, 50]})
+    affected = []
+    publisher = QuakeFeedPublisher(store, poller, locations_loader=lambda: locations,
+                                   on_affected=affected.append)
+
+    publisher.poll()   # the backfill is not news
+    assert affected == []
+    publisher.poll()
+    assert affected == [["sendai", "tokyo"]]
+    assert poller.fan_out(feature("honshu", 37.0, 141.5))["regions"] == ["Japan-Kuril Trench"]
+
+    locations.pop(0)
+    publisher.poll()
+    assert sorted(poller.locations) == ["santiago", "tokyo"]
+    assert affected == [["sendai", "tokyo"]]
+
+
+def test_refresh_now_moves_a_tracked_city_forward():
+    refreshed = []
+    scheduler = RefreshScheduler(refresh_fn=refreshed.append)
+    scheduler.track("tokyo", 300)
+    scheduler.track("paris", 300)
+    scheduler.refresh_now(["tokyo", "nowhere"])
+    wait = scheduler.run_pending()
+    scheduler._executor.shutdown(wait=True)
+
+    assert refreshed == ["tokyo"]
+    assert wait > 0
+    assert scheduler._next_due["tokyo"] > time.time() + 250
+
+
+def test_scheduler_runs_the_poll_as_a_periodic_job():
+    calls = []
+    scheduler = RefreshScheduler(refresh_fn=lambda city: None)
+    scheduler.every(60, lambda: calls.append(time.time()), "quake-feed")
+    now = time.time()
+    wait = scheduler.run_pending(now)
+    scheduler._executor.shutdown(wait=True)
+    assert len(calls) == 1
+    assert 59 <= wait <= 60
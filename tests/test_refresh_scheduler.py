@@ -0,0 +1,33 @@
+from refresh_scheduler import RefreshScheduler
+
+
+class CountingScheduler(RefreshScheduler):
+    snapshots = 0
+
+    def tracked(self):
+        self.snapshots += 1
+        return super().tracked()
+
+
+def test_registry_sync_takes_one_snapshot_per_sync():
+    registry = {f"city-{i}": 300 for i in range(500)}
+    prefetched = []
+    scheduler = CountingScheduler(lambda city: None, registry_loader=lambda: dict(registry),
+                                  prefetch_fn=prefetched.extend)
+    try:
+        scheduler._sync_registry()
+        assert scheduler.snapshots == 1
+        assert scheduler.tracked() == registry
+        assert sorted(prefetched) == sorted(registry)
+
+        registry["city-0"] = 60
+        del registry["city-1"]
+        registry["city-new"] = 300
+        scheduler._last_sync = 0
+        scheduler.snapshots = 0
+        scheduler._sync_registry()
+        assert scheduler.snapshots == 1
+        assert scheduler.tracked() == registry
+        assert prefetched[-1] == "city-new"
+    finally:
+        scheduler._executor.shutdown()
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from python.geo_math import haversine_km
+from python.spatial_index import GridIndex, RegionIndex
+
+
+def lon_in_range(lon, min_lon, max_lon):
+    if min_lon <= max_lon:
+        return (lon >= min_lon) & (lon <= max_lon)
+    return (lon >= min_lon) | (lon <= max_lon)
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(9)
+    n = 20000
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))   # uniform over the sphere
+    lons = rng.uniform(-180, 180, n)
+    radii = rng.uniform(50, 1500, n)
+    index = GridIndex(cell_deg=2.0)
+    for i in range(n):
+        index.add(i, lats[i], lons[i], radii[i])
+    return index, lats, lons, radii
+
+
+def query_centres(rng, n):
+    # Random centres plus the awkward ones: poles, antimeridian, equator.
+    fixed = [(90, 0), (-89.9, 45), (0, 180), (0, -179.9), (65, 179.5), (-45, -180), (0, 0)]
+    random = zip(np.degrees(np.arcsin(rng.uniform(-1, 1, n))), rng.uniform(-180, 180, n))
+    return fixed + list(random)
+
+
+def test_query_radius_matches_brute_force(points):
+    index, lats, lons, _ = points
+    rng = np.random.default_rng(1)
+    for lat, lon in query_centres(rng, 200):
+        radius_km = rng.uniform(10, 3000)
+        distances = haversine_km(lat, lon, lats, lons)
+        expected = set(np.flatnonzero(distances <= radius_km).tolist())
+
+        result = index.query_radius(lat, lon, radius_km)
+
+        assert {i for i, _ in result} == expected
+        assert [d for _, d in result] == sorted(d for _, d in result)
+
+
+def test_query_containing_matches_brute_force(points):
+    index, lats, lons, radii = points
+    rng = np.random.default_rng(2)
+    for lat, lon in query_centres(rng, 200):
+        distances = haversine_km(lat, lon, lats, lons)
+        expected = set(np.flatnonzero(distances <= radii).tolist())
+
+        assert {i for i, _ in index.query_containing(lat, lon)} == expected
+
+
+def test_query_bbox_matches_brute_force(points):
+    index, lats, lons, _ = points
+    rng = np.random.default_rng(3)
+    for _ in range(150):
+        min_lat, max_lat = sorted(rng.uniform(-90, 90, 2))
+        min_lon, max_lon = rng.uniform(-180, 180, 2)   # min_lon > max_lon wraps
+        expected = (lats >= min_lat) & (lats <= max_lat) & lon_in_range(lons, min_lon, max_lon)
+
+        assert set(index.query_bbox(min_lat, min_lon, max_lat, max_lon)) == \
+            set(np.flatnonzero(expected).tolist())
+
+
+def test_moved_and_removed_points_are_not_returned():
+    index = GridIndex()
+    index.add("a", 10, 10)
+    index.add("a", -10, -10)
+    index.add("b", 10.1, 10.1)
+    index.remove("b")
+
+    assert index.query_radius(10, 10, 100) == []
+    assert [i for i, _ in index.query_radius(-10, -10, 100)] == ["a"]
+    assert len(index) == 1
+
+
+@pytest.fixture(scope="module")
+def regions():
+    rng = np.random.default_rng(4)
+    n = 3000
+    min_lats = rng.uniform(-90, 80, n)
+    max_lats = np.minimum(min_lats + rng.uniform(0.5, 30, n), 90)
+    min_lons = rng.uniform(-180, 180, n)
+    max_lons = (min_lons + rng.uniform(0.5, 60, n) + 180) % 360 - 180   # some wrap
+    index = RegionIndex()
+    for i in range(n):
+        index.add(i, min_lons[i], min_lats[i], max_lons[i], max_lats[i])
+    return index, min_lats, min_lons, max_lats, max_lons
+
+
+def test_region_query_point_matches_brute_force(regions):
+    index, min_lats, min_lons, max_lats, max_lons = regions
+    rng = np.random.default_rng(5)
+    for lat, lon in query_centres(rng, 500):
+        expected = [i for i in range(len(min_lats))
+                    if min_lats[i] <= lat <= max_lats[i] and lon_in_range(lon, min_lons[i], max_lons[i])]
+
+        assert index.query_point(lat, lon) == expected
+
+
+def test_region_query_bbox_matches_brute_force(regions):
+    index, min_lats, min_lons, max_lats, max_lons = regions
+
+    # Reference for the longitude test: sample every region's range densely.
+    widths = (max_lons - min_lons) % 360
+    samples = (min_lons[:, None] + widths[:, None] * np.linspace(0, 1, 721) + 180) % 360 - 180
+
+    rng = np.random.default_rng(6)
+    for _ in range(100):
+        min_lat, max_lat = sorted(rng.uniform(-90, 90, 2))
+        min_lon, max_lon = rng.uniform(-180, 180, 2)
+        lon_overlap = lon_in_range(samples, min_lon, max_lon).any(axis=1)
+        expected = (min_lats <= max_lat) & (max_lats >= min_lat) & lon_overlap
+
+        assert set(index.query_bbox(min_lat, min_lon, max_lat, max_lon)) == set(np.flatnonzero(expected).tolist())
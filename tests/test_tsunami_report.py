@@ -0,0 +1,105 @@
+import json
+import threading
+
+import pytest
+
+from python.tsunami_report import ReportPublisher, template_analysis, write_report
+
+
+def quake(mag=7.8, depth=25.0):
+    return {
+        "id": "us7000abcd",
+        "properties": {"mag": mag, "place": "80 km E of Miyako, Japan", "time": 1_700_000_000_000},
+        "geometry": {"coordinates": [142.4, 39.6, depth]}
+    }
+
+
+HIGH = {"risk_level": "HIGH", "reason": "Matches high-risk profile for Japan-Kuril Trench."}
+LOW = {"risk_level": "LOW", "reason": "No match with high-risk regions."}
+
+
+def test_high_risk_template_warns_and_adds_shallow_and_strong_notes():
+    analysis = template_analysis(quake(), HIGH)
+
+    assert set(analysis) == {"summary", "alerts", "suggestions"}
+    assert analysis["summary"] == ("M7.8 earthquake 80 km E of Miyako, Japan at 25 km depth (2023-11-14 22:13 UTC): "
+                                   "Matches high-risk profile for Japan-Kuril Trench. A tsunami is possible.")
+    assert any("DART" in alert for alert in analysis["alerts"])
+    assert analysis["alerts"][-1].startswith("M7.8 is strong enough")
+    assert analysis["suggestions"][-1].startswith("Shallow rupture")
+
+
+def test_low_risk_template_without_extras():
+    analysis = template_analysis(quake(mag=6.1, depth=300.0), LOW)
+
+    assert analysis["summary"].endswith("A damaging tsunami is unlikely.")
+    assert not any("strong enough" in alert for alert in analysis["alerts"])
+    assert not any("Shallow" in s for s in analysis["suggestions"])
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.written = []
+
+    def __call__(self, report, path):
+        self.written.append(json.loads(json.dumps(report)))
+
+
+def test_template_first_then_gemini_as_version_two():
+    writer = RecordingWriter()
+    publisher = ReportPublisher("report.json", writer=writer)
+    assert publisher.publish({"gemini_analysis": template_analysis(quake(), HIGH),
+                              "analysis_status": "pending"}) == 1
+    first = publisher.report
+
+    gemini = {"summary": "Gemini says so.", "alerts": [], "suggestions": []}
+    publisher.enrich_async(lambda: gemini).join()
+
+    v1, v2 = writer.written
+    assert v1["report_version"] == 1 and v1["analysis_status"] == "pending"
+    assert v2["report_version"] == 2
+    assert v2["gemini_analysis"] == gemini
+    assert (v2["analysis_source"], v2["analysis_status"]) == ("gemini", "complete")
+    # The first version's dict was not changed after it was written.
+    assert first["report_version"] == 1 and first["analysis_status"] == "pending"
+
+
+@pytest.mark.parametrize("fn", [
+    lambda: {"error": "Gemini response error: 503"},
+    lambda: 1 / 0,
+])
+def test_failed_enrichment_keeps_the_template(fn):
+    writer = RecordingWriter()
+    publisher = ReportPublisher("report.json", writer=writer)
+    template = template_analysis(quake(), HIGH)
+    publisher.publish({"gemini_analysis": template, "analysis_status": "pending"})
+
+    publisher.enrich_async(fn).join()
+
+    latest = writer.written[-1]
+    assert latest["report_version"] == 2
+    assert latest["gemini_analysis"] == template
+    assert latest["analysis_status"] == "template_only"
+    assert latest["gemini_error"].startswith("Gemini response error")
+
+
+def test_concurrent_merges_each_get_their_own_version():
+    writer = RecordingWriter()
+    publisher = ReportPublisher("report.json", writer=writer)
+    publisher.publish({})
+    threads = [threading.Thread(target=publisher.merge_analysis, args=({"summary": str(i)},)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [r["report_version"] for r in writer.written] == list(range(1, 22))
+
+
+def test_write_report_replaces_the_file_atomically(tmp_path):
+    path = tmp_path / "report.json"
+    write_report({"report_version": 1}, str(path))
+    write_report({"report_version": 2}, str(path))
+
+    assert json.loads(path.read_text()) == {"report_version": 2}
+    assert [p.name for p in tmp_path.iterdir()] == ["report.json"]
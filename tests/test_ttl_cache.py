@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from ttl_cache import TTLCache
+
+THREADS = 8
+
+
+def run_concurrently(cache, key, loader):
+    """Calls get_or_load from THREADS threads at once; returns their results or errors."""
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = cache.get_or_load(key, loader)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def slow_loader(value, calls):
+    def load():
+        calls.append(1)
+        time.sleep(0.2)
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return load
+
+
+def test_concurrent_misses_run_the_loader_once():
+    cache = TTLCache()
+    calls = []
+    results = run_concurrently(cache, "paris", slow_loader({"lat": 48.85}, calls))
+
+    assert len(calls) == 1
+    assert all(value == {"lat": 48.85} for value, _ in results)
+    # One caller loaded it; the waiters got a value that is now cached.
+    assert sorted(cached for _, cached in results) == [False] + [True] * (THREADS - 1)
+    assert cache.stats()["coalesced"] == THREADS - 1
+    assert cache.get_or_load("paris", lambda: pytest.fail("reloaded")) == ({"lat": 48.85}, True)
+
+
+def test_failed_load_is_not_reported_as_cached():
+    cache = TTLCache()
+    calls = []
+    results = run_concurrently(cache, "nowhere", slow_loader(None, calls))
+
+    assert len(calls) == 1
+    assert results == [(None, False)] * THREADS
+    assert cache.get("nowhere") is None
+    assert cache.get_or_load("nowhere", lambda: "found") == ("found", False)
+
+
+def test_loader_error_reaches_every_waiter_and_is_not_cached():
+    cache = TTLCache()
+    calls = []
+    error = RuntimeError("upstream down")
+    results = run_concurrently(cache, "paris", slow_loader(error, calls))
+
+    assert len(calls) == 1
+    assert all(result is error for result in results)
+    assert cache.get_or_load("paris", lambda: "recovered") == ("recovered", False)
+
+
+def test_least_recently_used_entry_is_evicted_at_maxsize():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1   # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get_or_load("a", lambda: 2) == (1, True)
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.get_or_load("a", lambda: 2) == (2, False)
@@ -0,0 +1,133 @@
+# ttl_cache.py -> bounded LRU cache with per-entry TTL and single-flight loads
+import time
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class _InFlight:
+    """A load in progress that other callers for the same key can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache. Entries expire `ttl` seconds after they were stored
+    and the least recently used entry is evicted once `maxsize` is reached.
+
+    get_or_load() coalesces concurrent misses for the same key: only the first
+    caller runs the loader, the others wait for its result.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def _get_locked(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return _MISSING
+        value, expires_at = item
+        if expires_at <= now:
+            del self._data[key]
+            self.expirations += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def _set_locked(self, key, value, now):
+        self._data[key] = (value, now + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        """Returns the cached value for key, or default if missing/expired."""
+        with self._lock:
+            value = self._get_locked(key, time.monotonic())
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Stores a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._set_locked(key, value, time.monotonic())
+
+    def get_or_load(self, key, loader):
+        """
+        Returns (value, cached). On a miss, loader() is called once no matter
+        how many threads ask for the same key at the same time. A loader
+        result of None is treated as a failure and not cached, so `cached` is
+        only True for a value that is actually in the cache: a stored hit or
+        another caller's successful load.
+        """
+        with self._lock:
+            value = self._get_locked(key, time.monotonic())
+            if value is not _MISSING:
+                self.hits += 1
+                return value, True
+
+            self.misses += 1
+            call = self._inflight.get(key)
+            if call is None:
+                call = self._inflight[key] = _InFlight()
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, call.value is not None
+
+        try:
+            call.value = loader()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and call.value is not None:
+                    self._set_locked(key, call.value, time.monotonic())
+                del self._inflight[key]
+            call.done.set()
+
+        return call.value, False
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Returns the cache counters as a dict."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced
+            }